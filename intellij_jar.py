@@ -0,0 +1,245 @@
+#!/usr/bin/env python3
+"""
+Read IntelliJ's bundled themes straight from the IDE's jar files.
+
+Instead of `jar xf app-client.jar "themes/*"` into extracted-themes/ (see
+EXTRACT_INTELLIJ_THEMES.md), this indexes the theme entries of a jar once: for every
+themes/**/*.theme.json, and every editor scheme XML under themes/ or colorSchemes/
+(where the IDE bundles Darcula, Default and the other standalone schemes), it stores
+the entry's offset, compression and CRC, its kind (theme or scheme) and the theme or
+scheme name. The index is cached on disk keyed by the jar's
+size and modification time, so later runs read an entry with one seek and one
+decompress, without parsing the jar's central directory again.
+
+Entries are parsed by the same functions as files on disk (theme_common), so the
+converters and resolvers accept jar themes unchanged.
+
+Usage:
+    python3 intellij_jar.py "/Applications/IntelliJ IDEA CE.app/Contents/lib"
+    python3 intellij_jar.py /opt/idea/lib/app-client.jar --show Darcula
+    python3 intellij_jar.py /opt/idea/lib/app-client.jar --show Darcula --kind scheme
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import struct
+import sys
+import zipfile
+import zlib
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from theme_common import (IntelliJScheme, PathLike, file_signature, parse_json_data, parse_scheme_data,
+                          write_text)
+from theme_log import add_logging_arguments, configure_from_args, get_logger
+
+log = get_logger('jar')
+
+INDEX_VERSION = 2
+CACHE_DIR = Path(os.environ.get('XDG_CACHE_HOME') or Path.home() / '.cache') / 'dark-themes' / 'jar-index'
+
+THEMES_PREFIX = 'themes/'
+# Directories the IDE loads bundled editor schemes from
+SCHEME_PREFIXES = (THEMES_PREFIX, 'colorSchemes/')
+
+# Entry kinds
+THEME_KIND = 'theme'
+SCHEME_KIND = 'scheme'
+
+# Local file header: signature, version, flags, method, time, date, crc, sizes, name/extra lengths
+_LOCAL_HEADER = struct.Struct('<IHHHHHIIIHH')
+_LOCAL_HEADER_SIGNATURE = 0x04034B50
+
+
+class JarThemeIndex:
+    """Theme entries of one jar: entry name -> (offset, method, compressed size, size, crc)."""
+
+    def __init__(self, jar_path: PathLike, signature: Tuple[int, int],
+                 entries: Dict[str, List[int]], kinds: Dict[str, str], names: Dict[str, Optional[str]]):
+        self.jar_path = Path(jar_path)
+        self.signature = tuple(signature)
+        self.entries = entries
+        # Entry name -> THEME_KIND (theme.json) or SCHEME_KIND (editor scheme XML)
+        self.kinds = kinds
+        # Entry name -> theme "name" (theme.json) or scheme name attribute (XML)
+        self.names = names
+        self._parsed: Dict[str, Any] = {}
+
+    @classmethod
+    def open(cls, jar_path: PathLike, cache_dir: Optional[Path] = CACHE_DIR) -> 'JarThemeIndex':
+        """Return the index of a jar, from the cache when the jar did not change."""
+        jar_path = Path(jar_path).resolve()
+        signature = file_signature(jar_path)
+        cache_file = None
+        if cache_dir is not None:
+            cache_file = Path(cache_dir) / (hashlib.sha1(str(jar_path).encode()).hexdigest() + '.json')
+            try:
+                cached = json.loads(cache_file.read_text(encoding='utf-8'))
+                if cached.get('version') == INDEX_VERSION and tuple(cached['signature']) == signature:
+                    log.debug('index_cached', jar=str(jar_path), entries=len(cached['entries']))
+                    return cls(jar_path, signature, cached['entries'], cached['kinds'], cached['names'])
+            except (OSError, ValueError, KeyError):
+                pass
+
+        index = cls.build(jar_path)
+        if cache_file is not None:
+            write_text(cache_file, json.dumps({
+                'version': INDEX_VERSION,
+                'jar': str(jar_path),
+                'signature': list(index.signature),
+                'entries': index.entries,
+                'kinds': index.kinds,
+                'names': index.names,
+            }))
+        return index
+
+    @classmethod
+    def build(cls, jar_path: PathLike) -> 'JarThemeIndex':
+        """Scan the jar's central directory for theme entries."""
+        jar_path = Path(jar_path)
+        signature = file_signature(jar_path)
+        entries: Dict[str, List[int]] = {}
+        kinds: Dict[str, str] = {}
+        with zipfile.ZipFile(jar_path) as jar:
+            for info in jar.infolist():
+                name = info.filename
+                if name.startswith(THEMES_PREFIX) and name.endswith('.theme.json'):
+                    kinds[name] = THEME_KIND
+                elif name.startswith(SCHEME_PREFIXES) and name.endswith('.xml'):
+                    kinds[name] = SCHEME_KIND
+                else:
+                    continue
+                entries[name] = [info.header_offset, info.compress_type, info.compress_size,
+                                 info.file_size, info.CRC]
+        index = cls(jar_path, signature, entries, kinds, {})
+        for name in entries:
+            index.names[name] = index._entry_title(name)
+        log.info('index_built', jar=str(jar_path), entries=len(entries))
+        return index
+
+    def _entry_title(self, name: str) -> Optional[str]:
+        try:
+            if self.kinds[name] == THEME_KIND:
+                return self.load_theme_json(name).get('name')
+            return self.load_scheme(name).name
+        except ValueError as e:
+            log.warning('entry_unreadable', jar=str(self.jar_path), entry=name, error=str(e))
+            return None
+
+    def theme_json_entries(self) -> List[str]:
+        return sorted(name for name, kind in self.kinds.items() if kind == THEME_KIND)
+
+    def scheme_entries(self) -> List[str]:
+        return sorted(name for name, kind in self.kinds.items() if kind == SCHEME_KIND)
+
+    def find(self, title: str, kind: Optional[str] = None) -> Optional[str]:
+        """Entry whose theme/scheme name or file stem equals `title`, only of `kind` if given.
+
+        A theme.json and a scheme often share a name ("Darcula"), so callers that need one
+        or the other must pass the kind.
+        """
+        candidates = [name for name in self.entries if kind is None or self.kinds[name] == kind]
+        for name in candidates:
+            if self.names.get(name) == title:
+                return name
+        for name in candidates:
+            stem = Path(name).name.split('.')[0]
+            if stem == title:
+                return name
+        return None
+
+    def read(self, name: str) -> bytes:
+        """Raw bytes of one entry, read through the cached offsets."""
+        offset, method, compressed_size, size, crc = self.entries[name]
+        with open(self.jar_path, 'rb') as f:
+            f.seek(offset)
+            header = f.read(_LOCAL_HEADER.size)
+            fields = _LOCAL_HEADER.unpack(header)
+            if fields[0] != _LOCAL_HEADER_SIGNATURE:
+                raise ValueError(f"{self.jar_path}: bad local header for {name}")
+            f.seek(fields[9] + fields[10], os.SEEK_CUR)
+            data = f.read(compressed_size)
+
+        if method == zipfile.ZIP_DEFLATED:
+            data = zlib.decompress(data, -15)
+        elif method != zipfile.ZIP_STORED:
+            with zipfile.ZipFile(self.jar_path) as jar:
+                data = jar.read(name)
+        if len(data) != size or zlib.crc32(data) != crc:
+            raise ValueError(f"{self.jar_path}: CRC mismatch for {name}")
+        return data
+
+    def load_theme_json(self, name: str) -> Dict[str, Any]:
+        """Parsed theme.json entry. Shared, treat it as read-only."""
+        if name not in self._parsed:
+            self._parsed[name] = parse_json_data(self.read(name))
+        return self._parsed[name]
+
+    def load_scheme(self, name: str) -> IntelliJScheme:
+        """Parsed editor scheme entry. Shared, treat it as read-only."""
+        if name not in self._parsed:
+            self._parsed[name] = parse_scheme_data(self.read(name))
+        return self._parsed[name]
+
+
+def find_theme_jars(lib: PathLike, cache_dir: Optional[Path] = CACHE_DIR) -> List[JarThemeIndex]:
+    """Indexes of every jar in an IDE lib directory (or the given jar) that bundles themes."""
+    lib = Path(lib)
+    jars = [lib] if lib.is_file() else sorted(lib.glob('*.jar'))
+    indexes = []
+    for jar in jars:
+        try:
+            index = JarThemeIndex.open(jar, cache_dir)
+        except (OSError, zipfile.BadZipFile) as e:
+            log.warning('jar_unreadable', jar=str(jar), error=str(e))
+            continue
+        if index.entries:
+            indexes.append(index)
+    return indexes
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="List and read IntelliJ's bundled themes directly from its jar files",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument('lib', type=Path, help='IntelliJ lib directory or a single jar')
+    parser.add_argument('--show', metavar='NAME', help='Print the theme.json / scheme with this name or file stem')
+    parser.add_argument('--kind', choices=(THEME_KIND, SCHEME_KIND),
+                        help='With --show, only consider this kind of entry (default: theme.json first)')
+    parser.add_argument('--no-cache', action='store_true', help='Rebuild the index instead of using the cache')
+    add_logging_arguments(parser)
+
+    args = parser.parse_args()
+    configure_from_args(args)
+
+    if not args.lib.exists():
+        print(f"❌ Not found: {args.lib}")
+        return 1
+
+    indexes = find_theme_jars(args.lib, None if args.no_cache else CACHE_DIR)
+    if not indexes:
+        print(f"❌ No jar with theme or scheme entries in {args.lib}")
+        return 1
+
+    if args.show:
+        for kind in [args.kind] if args.kind else [THEME_KIND, SCHEME_KIND]:
+            for index in indexes:
+                entry = index.find(args.show, kind)
+                if entry is not None:
+                    sys.stdout.write(index.read(entry).decode('utf-8'))
+                    return 0
+        print(f"❌ No theme named {args.show}")
+        return 1
+
+    for index in indexes:
+        print(f"📦 {index.jar_path.name}")
+        for name in index.theme_json_entries() + index.scheme_entries():
+            print(f"  {name:<60} {index.kinds[name]:<7} {index.names.get(name) or ''}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -25,18 +25,29 @@ popup's uses css
 </div>
 """
 
-import xml.etree.ElementTree as ET
 import argparse
-import sys
 import os
-import json
-from typing import Dict, List, Optional, Tuple
+import sys
+from typing import Dict, Optional, Tuple
+
+from theme_common import IntelliJScheme, load_scheme, relative_luminance, write_json
+from theme_emitters import ThemeEmitter, ThemeJob, register_emitter
+from theme_log import add_logging_arguments, configure_from_args, get_logger
+from theme_palette import DEFAULT_DELTA_E, compact_sublime
+from sublime_rules import compact_rules
+
+log = get_logger('sublime')
 
 
 class IntelliJToSublimeJSONConverter:
     """Converts IntelliJ themes to Sublime Text's modern JSON format."""
 
-    def __init__(self):
+    def __init__(self, palette_threshold: Optional[float] = None, compact: bool = False):
+        # ΔE for palette extraction of the written file; None writes colors as generated
+        self.palette_threshold = palette_threshold
+        # Merge same-style rules and drop shadowed rules / unused variables before writing
+        self.compact = compact
+
         # Comprehensive mapping from IntelliJ attributes to grouped Sublime scopes
         # Following the semantic grouping approach used in real Sublime themes
         self.semantic_groups = {
@@ -196,56 +207,26 @@ class IntelliJToSublimeJSONConverter:
 
     def parse_intellij_theme(self, file_path: str) -> Tuple[Dict, Dict, str]:
         """Parse IntelliJ theme file and extract colors, attributes, and theme name."""
-        try:
-            tree = ET.parse(file_path)
-            root = tree.getroot()
-
-            theme_name = root.get('name', 'Converted Theme')
-
-            # Parse colors section
-            colors = {}
-            colors_section = root.find('colors')
-            if colors_section is not None:
-                for option in colors_section.findall('option'):
-                    name = option.get('name')
-                    value = option.get('value')
-                    if name and value:
-                        colors[name] = self.normalize_color(value)
-
-            # Parse attributes section
-            attributes = {}
-            attributes_section = root.find('attributes')
-            if attributes_section is not None:
-                for option in attributes_section.findall('option'):
-                    name = option.get('name')
-                    if name:
-                        attr_dict = {}
-
-                        # Check if it uses baseAttributes
-                        base_attrs = option.get('baseAttributes')
-                        if base_attrs:
-                            attr_dict['baseAttributes'] = base_attrs
-
-                        # Parse value section
-                        value_section = option.find('value')
-                        if value_section is not None:
-                            for value_option in value_section.findall('option'):
-                                attr_name = value_option.get('name')
-                                attr_value = value_option.get('value')
-                                if attr_name and attr_value:
-                                    if attr_name in ['FOREGROUND', 'BACKGROUND', 'EFFECT_COLOR']:
-                                        attr_value = self.normalize_color(attr_value)
-                                    attr_dict[attr_name] = attr_value
-
-                        if attr_dict:
-                            attributes[name] = attr_dict
-
-            return colors, attributes, theme_name
-
-        except ET.ParseError as e:
-            raise ValueError(f"Error parsing IntelliJ theme file: {e}")
-        except Exception as e:
-            raise ValueError(f"Error reading theme file: {e}")
+        return self.extract_scheme(load_scheme(file_path))
+
+    def extract_scheme(self, scheme: IntelliJScheme) -> Tuple[Dict, Dict, str]:
+        """Extract colors, attributes, and theme name from a parsed IntelliJ scheme."""
+        theme_name = scheme.name if scheme.name is not None else 'Converted Theme'
+
+        # Parse colors section
+        colors = {name: self.normalize_color(value) for name, value in scheme.colors.items()}
+
+        # Parse attributes section
+        attributes = {}
+        for name, attr in scheme.attributes.items():
+            attr_dict = {}
+            for attr_name, attr_value in attr.items():
+                if attr_name in ['FOREGROUND', 'BACKGROUND', 'EFFECT_COLOR']:
+                    attr_value = self.normalize_color(attr_value)
+                attr_dict[attr_name] = attr_value
+            attributes[name] = attr_dict
+
+        return colors, attributes, theme_name
 
 
     def create_sublime_json_theme(self, colors: Dict, attributes: Dict, theme_name: str) -> Dict:
@@ -365,15 +346,7 @@ class IntelliJToSublimeJSONConverter:
             bg_color = base_colors['background'].lstrip('#')
             if len(bg_color) == 6:
                 # Calculate perceived brightness using relative luminance
-                r = int(bg_color[0:2], 16) / 255
-                g = int(bg_color[2:4], 16) / 255
-                b = int(bg_color[4:6], 16) / 255
-                # Apply gamma correction and calculate luminance
-                r = r / 12.92 if r <= 0.03928 else ((r + 0.055) / 1.055) ** 2.4
-                g = g / 12.92 if g <= 0.03928 else ((g + 0.055) / 1.055) ** 2.4
-                b = b / 12.92 if b <= 0.03928 else ((b + 0.055) / 1.055) ** 2.4
-                luminance = 0.2126 * r + 0.7152 * g + 0.0722 * b
-                is_light_theme = luminance > 0.5
+                is_light_theme = relative_luminance(bg_color) > 0.5
 
         # Create better popup backgrounds for contrast - opposite of main background
         main_bg = base_colors.get('background', '#ffffff')
@@ -413,7 +386,7 @@ class IntelliJToSublimeJSONConverter:
         chosen_popup_colors["popups_background"] = generic_popup_bg
 
         css_variables_string = self.json_to_css_variables(chosen_popup_colors)
-        print(css_variables_string)
+        log.debug('popup_css_variables', theme=theme_name, css=css_variables_string)
 
         variables.update(chosen_colors)
         variables.update(chosen_git_colors)
@@ -702,29 +675,49 @@ class IntelliJToSublimeJSONConverter:
         return theme
 
 
-    def convert(self, input_file: str, output_file: str) -> None:
+    def convert(self, input_file: str, output_file: str) -> Dict:
         """Convert IntelliJ theme to Sublime JSON theme."""
         if not os.path.exists(input_file):
             raise FileNotFoundError(f"Input file not found: {input_file}")
 
-        print(f"Converting {input_file} to {output_file}...")
+        log.info('converting', input=input_file, output=output_file)
 
         # Parse IntelliJ theme
         colors, attributes, theme_name = self.parse_intellij_theme(input_file)
 
-        print(f"Found {len(colors)} colors and {len(attributes)} attributes")
-        print(f"Theme name: {theme_name}")
+        log.debug('parsed', theme=theme_name, colors=len(colors), attributes=len(attributes))
 
         # Create Sublime theme JSON structure
         theme_json = self.create_sublime_json_theme(colors, attributes, theme_name)
+        if self.palette_threshold is not None:
+            theme_json = compact_sublime(theme_json, self.palette_threshold)
+        if self.compact:
+            theme_json, stats = compact_rules(theme_json)
+            log.debug('rules_compacted', theme=theme_name, **stats)
 
         # Write output file
-        os.makedirs(os.path.dirname(output_file), exist_ok=True)
-        with open(output_file, 'w', encoding='utf-8') as f:
-            json.dump(theme_json, f, indent=4, ensure_ascii=False)
+        write_json(output_file, theme_json, indent=4)
+
+        log.info('converted', theme=theme_name, output=output_file,
+                 variables=len(theme_json['variables']), rules=len(theme_json['rules']))
+        return theme_json
 
-        print(f"✅ Successfully converted theme to {output_file}")
-        print(f"📊 Generated {len(theme_json['variables'])} variables and {len(theme_json['rules'])} rules")
+
+@register_emitter
+class SublimeEmitter(ThemeEmitter):
+    """IntelliJ scheme -> Sublime Text .sublime-color-scheme."""
+
+    name = 'sublime'
+    description = 'Sublime Text color scheme (.sublime-color-scheme)'
+    suffix = '.sublime-color-scheme'
+    indent = 4
+
+    def __init__(self):
+        self.converter = IntelliJToSublimeJSONConverter()
+
+    def emit(self, scheme: IntelliJScheme, job: ThemeJob) -> Dict:
+        colors, attributes, theme_name = self.converter.extract_scheme(scheme)
+        return self.converter.create_sublime_json_theme(colors, attributes, theme_name)
 
 
 def main():
@@ -741,15 +734,22 @@ Examples:
 
     parser.add_argument('input', help='Input IntelliJ theme file (.icls or .xml)')
     parser.add_argument('output', help='Output Sublime theme file (.sublime-color-scheme)')
-    parser.add_argument('--verbose', '-v', action='store_true',
-                        help='Enable verbose output')
+    parser.add_argument('--palette-delta-e', type=float, nargs='?', const=DEFAULT_DELTA_E,
+                        help=f'Rewrite colors to reference a palette, merging colors within this ΔE '
+                             f'(default when given: {DEFAULT_DELTA_E})')
+    parser.add_argument('--compact-rules', action='store_true',
+                        help='Merge rules with the same style and drop shadowed rules and unused variables')
+    add_logging_arguments(parser)
 
     args = parser.parse_args()
+    configure_from_args(args)
 
-    converter = IntelliJToSublimeJSONConverter()
+    converter = IntelliJToSublimeJSONConverter(args.palette_delta_e, args.compact_rules)
 
     try:
-        converter.convert(args.input, args.output)
+        theme_json = converter.convert(args.input, args.output)
+        print(f"✅ Successfully converted theme to {args.output}")
+        print(f"📊 Generated {len(theme_json['variables'])} variables and {len(theme_json['rules'])} rules")
     except Exception as e:
         print(f"❌ Error: {e}", file=sys.stderr)
         sys.exit(1)
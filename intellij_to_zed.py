@@ -3,12 +3,20 @@ IntelliJ to Zed Theme Converter
 Converts IntelliJ .icls theme files to Zed .json theme files
 """
 
-import json
 import xml.etree.ElementTree as ET
 from pathlib import Path
 import argparse
 import re
-from typing import Dict, List, Any, Optional
+from typing import Dict, List, Any, Optional, Tuple
+
+import theme_common
+from theme_backends import parse_xml
+from theme_common import IntelliJScheme, load_json, load_scheme, write_json
+from theme_emitters import ThemeEmitter, ThemeJob, register_emitter
+from theme_inheritance import ThemeResolver, flatten_ui
+from theme_log import add_logging_arguments, configure_from_args, get_logger
+
+log = get_logger('zed')
 
 
 class IntelliJToZedConverter:
@@ -116,6 +124,51 @@ class IntelliJToZedConverter:
             'title_bar.background': 'surface.background',
         }
 
+        # Map flattened theme.json ui keys to Zed UI colors; candidates in order of preference.
+        # Only keys the theme itself sets are used, so IntelliJ's stock values never leak in.
+        self.theme_json_mapping = {
+            'background': ['Panel.background', '*.background'],
+            'surface.background': ['ToolWindow.background', 'Panel.background', '*.background'],
+            'panel.background': ['ToolWindow.background', 'SidePanel.background', 'Panel.background', '*.background'],
+            'elevated_surface.background': ['Popup.background', 'PopupMenu.background', 'CompletionPopup.background'],
+            'title_bar.background': ['MainToolbar.background', 'TitlePane.background', 'ToolWindow.Header.background'],
+            'tab_bar.background': ['EditorTabs.background', 'DefaultTabs.background'],
+            'tab.inactive_background': ['EditorTabs.background', 'DefaultTabs.background'],
+            'tab.active_background': ['EditorTabs.underlinedTabBackground', 'DefaultTabs.underlinedTabBackground'],
+            'status_bar.background': ['StatusBar.background', 'Panel.background', '*.background'],
+            'border.variant': ['Borders.ContrastBorderColor', 'EditorTabs.underTabsBorderColor'],
+            'border.focused': ['Component.focusedBorderColor', 'Button.focusedBorderColor'],
+            'border.selected': ['EditorTabs.underlinedBorderColor', 'TabbedPane.underlineColor'],
+            'element.hover': ['ActionButton.hoverBackground', 'Table.hoverBackground'],
+            'element.selected': ['List.selectionBackground', 'Tree.selectionBackground', '*.selectionBackground'],
+            'ghost_element.hover': ['ActionButton.hoverBackground', 'EditorTabs.hoverBackground'],
+            'ghost_element.selected': ['List.selectionBackground', 'Tree.selectionBackground', '*.selectionBackground'],
+            'scrollbar.thumb.background': ['ScrollBar.thumbColor', 'ScrollBar.Transparent.thumbColor'],
+            'scrollbar.thumb.hover_background': ['ScrollBar.hoverThumbColor', 'ScrollBar.Transparent.hoverThumbColor'],
+            'scrollbar.track.background': ['ScrollBar.trackColor', 'ScrollBar.Transparent.trackColor'],
+            'text.muted': ['Label.infoForeground', '*.infoForeground', '*.inactiveForeground'],
+            'text.disabled': ['Label.disabledForeground', '*.disabledForeground', '*.disabledText'],
+            'link_text.hover': ['Link.hoverForeground', 'Link.activeForeground'],
+            'search.match_background': ['SearchMatch.startBackground', 'SearchMatch.endBackground'],
+            'terminal.background': ['Terminal.background'],
+            'terminal.foreground': ['Terminal.foreground'],
+            'info.background': ['Notification.ToolWindow.informativeBackground', 'Notification.background'],
+            'info.border': ['Notification.ToolWindow.informativeBorderColor', 'Notification.borderColor'],
+            'warning.background': ['Notification.ToolWindow.warningBackground', 'ValidationTooltip.warningBackground'],
+            'warning.border': ['Notification.ToolWindow.warningBorderColor'],
+            'error.background': ['Notification.ToolWindow.errorBackground', 'Notification.errorBackground',
+                                 'ValidationTooltip.errorBackground'],
+            'error.border': ['Notification.ToolWindow.errorBorderColor', 'Notification.errorBorderColor'],
+        }
+
+        # Compiled: ui key -> [(zed key, preference)], so one pass over a theme's keys applies the map
+        self._ui_key_index: Dict[str, List[Tuple[str, int]]] = {}
+        for zed_key, ui_keys in self.theme_json_mapping.items():
+            for rank, ui_key in enumerate(ui_keys):
+                self._ui_key_index.setdefault(ui_key, []).append((zed_key, rank))
+
+        self.theme_resolver = ThemeResolver()
+
         # Map IntelliJ attributes to Zed syntax elements
         self.syntax_mapping = {
             # Comments
@@ -186,8 +239,7 @@ class IntelliJToZedConverter:
     def load_intellij_theme(self, theme_path: Path) -> ET.Element:
         """Load IntelliJ theme from .icls file."""
         try:
-            tree = ET.parse(theme_path)
-            return tree.getroot()
+            return parse_xml(Path(theme_path).read_bytes())
         except ET.ParseError as e:
             raise ValueError(f"Error parsing IntelliJ theme XML: {e}")
         except Exception as e:
@@ -195,13 +247,7 @@ class IntelliJToZedConverter:
 
     def load_theme_json(self, theme_json_path: Path) -> Dict[str, Any]:
         """Load IntelliJ theme.json file for additional UI colors."""
-        try:
-            with open(theme_json_path, 'r', encoding='utf-8') as f:
-                return json.load(f)
-        except json.JSONDecodeError as e:
-            raise ValueError(f"Error parsing theme.json file: {e}")
-        except Exception as e:
-            raise ValueError(f"Error loading theme.json file: {e}")
+        return load_json(theme_json_path)
 
     def normalize_color(self, color: str) -> str:
         """Normalize color format for Zed (ensure proper hex format)."""
@@ -225,113 +271,69 @@ class IntelliJToZedConverter:
 
         return color
 
-    def extract_colors(self, root: ET.Element) -> Dict[str, str]:
+    def extract_colors(self, scheme: IntelliJScheme) -> Dict[str, str]:
         """Extract color definitions from IntelliJ theme."""
         colors = {}
 
         # Extract from colors section
-        colors_element = root.find('colors')
-        if colors_element is not None:
-            for option in colors_element.findall('option'):
-                name = option.get('name')
-                value = option.get('value')
-                if name and value:
-                    normalized_color = self.normalize_color(value)
-                    if normalized_color:
-                        colors[name] = normalized_color
+        for name, value in scheme.colors.items():
+            normalized_color = self.normalize_color(value)
+            if normalized_color:
+                colors[name] = normalized_color
 
         # Extract colors from TEXT attribute (background and foreground)
-        attributes_element = root.find('attributes')
-        if attributes_element is not None:
-            text_option = attributes_element.find("option[@name='TEXT']")
-            if text_option is not None:
-                value_element = text_option.find('value')
-                if value_element is not None:
-                    # Extract TEXT foreground
-                    fg_option = value_element.find("option[@name='FOREGROUND']")
-                    if fg_option is not None:
-                        fg_color = self.normalize_color(fg_option.get('value'))
-                        if fg_color:
-                            colors['TEXT.FOREGROUND'] = fg_color
-
-                    # Extract TEXT background
-                    bg_option = value_element.find("option[@name='BACKGROUND']")
-                    if bg_option is not None:
-                        bg_color = self.normalize_color(bg_option.get('value'))
-                        if bg_color:
-                            colors['TEXT.BACKGROUND'] = bg_color
-
-        # Extract background colors from all attributes for color mapping
-        attributes_element = root.find('attributes')
-        if attributes_element is not None:
-            for option in attributes_element.findall('option'):
-                name = option.get('name')
-                if not name:
-                    continue
-
-                value_element = option.find('value')
-                if value_element is not None:
-                    # Extract background color for this attribute
-                    bg_option = value_element.find("option[@name='BACKGROUND']")
-                    if bg_option is not None:
-                        bg_color = self.normalize_color(bg_option.get('value'))
-                        if bg_color:
-                            colors[f'{name}.BACKGROUND'] = bg_color
-
-                    # Extract foreground color for this attribute
-                    fg_option = value_element.find("option[@name='FOREGROUND']")
-                    if fg_option is not None:
-                        fg_color = self.normalize_color(fg_option.get('value'))
-                        if fg_color:
-                            colors[f'{name}.FOREGROUND'] = fg_color
+        text_attr = scheme.attributes.get('TEXT', {})
+        fg_color = self.normalize_color(text_attr.get('FOREGROUND'))
+        if fg_color:
+            colors['TEXT.FOREGROUND'] = fg_color
+        bg_color = self.normalize_color(text_attr.get('BACKGROUND'))
+        if bg_color:
+            colors['TEXT.BACKGROUND'] = bg_color
+
+        # Extract background and foreground colors from all attributes for color mapping
+        for name, attr in scheme.attributes.items():
+            bg_color = self.normalize_color(attr.get('BACKGROUND'))
+            if bg_color:
+                colors[f'{name}.BACKGROUND'] = bg_color
+
+            fg_color = self.normalize_color(attr.get('FOREGROUND'))
+            if fg_color:
+                colors[f'{name}.FOREGROUND'] = fg_color
 
         return colors
 
 
-    def extract_attributes(self, root: ET.Element) -> Dict[str, Dict[str, Any]]:
+    def extract_attributes(self, scheme: IntelliJScheme) -> Dict[str, Dict[str, Any]]:
         """Extract syntax highlighting attributes from IntelliJ theme."""
         attributes = {}
 
-        attributes_element = root.find('attributes')
-        if attributes_element is not None:
-            for option in attributes_element.findall('option'):
-                name = option.get('name')
-                if not name:
-                    continue
-
-                attribute = {}
-                value_element = option.find('value')
-                if value_element is not None:
-                    # Extract foreground color
-                    fg_option = value_element.find("option[@name='FOREGROUND']")
-                    if fg_option is not None:
-                        fg_color = self.normalize_color(fg_option.get('value'))
-                        if fg_color:
-                            attribute['color'] = fg_color
-
-                    # Extract background color
-                    bg_option = value_element.find("option[@name='BACKGROUND']")
-                    if bg_option is not None:
-                        bg_color = self.normalize_color(bg_option.get('value'))
-                        if bg_color:
-                            attribute['background'] = bg_color
-
-                    # Extract font style
-                    font_option = value_element.find("option[@name='FONT_TYPE']")
-                    if font_option is not None:
-                        font_type = font_option.get('value')
-                        if font_type:
-                            try:
-                                font_int = int(font_type)
-                                if font_int & 1:  # Bold
-                                    attribute['font_weight'] = 'bold'
-                                if font_int & 2:  # Italic
-                                    attribute['font_style'] = 'italic'
-                            except ValueError:
-                                pass
-
-                if attribute:
-                    attributes[name] = attribute
+        for name, attr in scheme.attributes.items():
+            attribute = {}
+
+            # Extract foreground color
+            fg_color = self.normalize_color(attr.get('FOREGROUND'))
+            if fg_color:
+                attribute['color'] = fg_color
+
+            # Extract background color
+            bg_color = self.normalize_color(attr.get('BACKGROUND'))
+            if bg_color:
+                attribute['background'] = bg_color
+
+            # Extract font style
+            font_type = attr.get('FONT_TYPE')
+            if font_type:
+                try:
+                    font_int = int(font_type)
+                    if font_int & 1:  # Bold
+                        attribute['font_weight'] = 'bold'
+                    if font_int & 2:  # Italic
+                        attribute['font_style'] = 'italic'
+                except ValueError:
+                    pass
+
+            if attribute:
+                attributes[name] = attribute
         return attributes
 
     def map_colors_to_zed(self, intellij_colors: Dict[str, str]) -> Dict[str, str]:
@@ -408,6 +410,24 @@ class IntelliJToZedConverter:
 
         return zed_colors
 
+    def map_theme_json_to_zed(self, theme_json: Dict[str, Any]) -> Dict[str, str]:
+        """Map the theme.json UI colors to Zed UI colors in one pass over its flattened ui keys."""
+        resolved = self.theme_resolver.resolve(theme_json)
+        chosen: Dict[str, Tuple[int, Any]] = {}
+        for ui_key, value in flatten_ui(theme_json.get('ui') or {}).items():
+            for zed_key, rank in self._ui_key_index.get(ui_key, ()):
+                if zed_key not in chosen or rank < chosen[zed_key][0]:
+                    chosen[zed_key] = (rank, value)
+
+        zed_colors = {}
+        for zed_key, (_, value) in chosen.items():
+            # Named colors ("Gray12", "hover") resolve through the theme and its parents
+            color = resolved.color(value)
+            if isinstance(color, str) and color.startswith('#') and theme_common.parse_hex_rgba(color):
+                # Keep the alpha channel: hover/selection overlays are mostly translucent
+                zed_colors[zed_key] = color.upper()
+        return zed_colors
+
     def map_syntax_to_zed(self, intellij_attributes: Dict[str, Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
         """Map IntelliJ syntax attributes to Zed syntax elements."""
         zed_syntax = {}
@@ -540,81 +560,17 @@ class IntelliJToZedConverter:
 
     def adjust_brightness(self, hex_color: str, factor: float) -> str:
         """Adjust brightness of a color by a factor (0.0 = black, 1.0 = original, >1.0 = brighter)."""
-        try:
-            # Remove # if present
-            hex_color = hex_color.lstrip('#')
-
-            # Convert to RGB
-            r = int(hex_color[0:2], 16)
-            g = int(hex_color[2:4], 16)
-            b = int(hex_color[4:6], 16)
-
-            # Adjust brightness
-            r = max(0, min(255, int(r * factor)))
-            g = max(0, min(255, int(g * factor)))
-            b = max(0, min(255, int(b * factor)))
-
-            return f'#{r:02X}{g:02X}{b:02X}'
-        except:
-            # Fallback to original color
-            return hex_color if hex_color.startswith('#') else f'#{hex_color}'
+        return theme_common.adjust_brightness(hex_color, factor)
 
     def adjust_saturation(self, hex_color: str, factor: float) -> str:
         """Adjust saturation of a color (0.0 = grayscale, 1.0 = original, >1.0 = more saturated)."""
-        try:
-            # Remove # if present
-            hex_color = hex_color.lstrip('#')
-
-            # Convert to RGB
-            r = int(hex_color[0:2], 16) / 255.0
-            g = int(hex_color[2:4], 16) / 255.0
-            b = int(hex_color[4:6], 16) / 255.0
-
-            # Convert to HSL-like adjustment
-            max_val = max(r, g, b)
-            min_val = min(r, g, b)
-            diff = max_val - min_val
-
-            # Calculate luminance
-            luminance = (max_val + min_val) / 2
-
-            # Adjust saturation
-            if diff == 0:  # Grayscale
-                return hex_color if hex_color.startswith('#') else f'#{hex_color}'
-
-            # Apply saturation adjustment
-            r = luminance + (r - luminance) * factor
-            g = luminance + (g - luminance) * factor
-            b = luminance + (b - luminance) * factor
-
-            # Clamp values
-            r = max(0, min(1, r))
-            g = max(0, min(1, g))
-            b = max(0, min(1, b))
-
-            # Convert back to RGB
-            r_int = int(r * 255)
-            g_int = int(g * 255)
-            b_int = int(b * 255)
-
-            return f'#{r_int:02X}{g_int:02X}{b_int:02X}'
-        except:
-            # Fallback to original color
-            return hex_color if hex_color.startswith('#') else f'#{hex_color}'
+        return theme_common.adjust_saturation(hex_color, factor)
 
     def add_alpha(self, hex_color: str, alpha: float) -> str:
         """Add alpha channel to a hex color (alpha: 0.0-1.0)."""
         try:
-            # Ensure proper hex format
-            if not hex_color.startswith('#'):
-                hex_color = f'#{hex_color}'
-
-            # Clamp alpha value
-            alpha = max(0.0, min(1.0, alpha))
-            alpha_hex = format(int(alpha * 255), '02X')
-
-            return f'{hex_color}{alpha_hex}'
-        except:
+            return theme_common.add_alpha(hex_color, alpha)
+        except (TypeError, AttributeError):
             return hex_color
 
     def generate_color_variants(self, base_color: str) -> Dict[str, str]:
@@ -672,10 +628,17 @@ class IntelliJToZedConverter:
 
     def convert_to_zed(self, intellij_root: ET.Element, theme_name: str, author: str = "Converted from IntelliJ", theme_json: Dict[str, Any] = None) -> Dict[str, Any]:
         """Convert IntelliJ theme to Zed format."""
+        return self.convert_scheme(IntelliJScheme.from_root(intellij_root), theme_name, author, theme_json)
+
+    def convert_scheme(self, scheme: IntelliJScheme, theme_name: str, author: str = "Converted from IntelliJ", theme_json: Dict[str, Any] = None) -> Dict[str, Any]:
+        """Convert a parsed IntelliJ scheme to Zed format."""
+
+        # Reset the syntax fallback so a reused converter does not carry the previous theme's color
+        self._fallback_color = '#BBBBBB'
 
         # Extract colors and attributes from .icls file
-        intellij_colors = self.extract_colors(intellij_root)
-        intellij_attributes = self.extract_attributes(intellij_root)
+        intellij_colors = self.extract_colors(scheme)
+        intellij_attributes = self.extract_attributes(scheme)
 
         # Map .icls colors to Zed format
         zed_ui_colors = self.map_colors_to_zed(intellij_colors)
@@ -791,6 +754,10 @@ class IntelliJToZedConverter:
             zed_ui_colors["border"] = border_color_dark
 
 
+        # UI colors the IntelliJ theme defines itself win over the derived and default ones
+        if theme_json:
+            zed_ui_colors.update(self.map_theme_json_to_zed(theme_json))
+
         # Build Zed theme structure
         zed_theme = {
             "$schema": "https://zed.dev/schema/themes/v0.1.0.json",
@@ -815,7 +782,7 @@ class IntelliJToZedConverter:
         """Convert an IntelliJ theme file to Zed format."""
 
         # Load IntelliJ theme
-        intellij_root = self.load_intellij_theme(input_path)
+        scheme = load_scheme(input_path)
 
         # Load optional theme.json file
         theme_json = None
@@ -823,7 +790,7 @@ class IntelliJToZedConverter:
             theme_json = self.load_theme_json(theme_json_path)
 
         # Get theme name
-        theme_name = intellij_root.get('name', input_path.stem)
+        theme_name = scheme.name if scheme.name is not None else input_path.stem
 
         # Generate output path if not provided
         if output_path is None:
@@ -834,23 +801,44 @@ class IntelliJToZedConverter:
             author = f"Converted from IntelliJ ({theme_name})"
 
         # Convert to Zed format
-        zed_theme = self.convert_to_zed(intellij_root, theme_name, author, theme_json)
+        zed_theme = self.convert_scheme(scheme, theme_name, author, theme_json)
 
         # Write output file with proper formatting
-        with open(output_path, 'w', encoding='utf-8') as f:
-            json.dump(zed_theme, f, indent=2, ensure_ascii=False)
+        write_json(output_path, zed_theme, indent=2)
+        log.info('converted', theme=theme_name, input=str(input_path), output=str(output_path),
+                 appearance=zed_theme['themes'][0]['appearance'])
 
         return output_path
 
 
+@register_emitter
+class ZedEmitter(ThemeEmitter):
+    """IntelliJ scheme (+ theme.json) -> Zed theme family file."""
+
+    name = 'zed'
+    description = 'Zed theme (.json)'
+    suffix = '_zed.json'
+    indent = 2
+
+    def __init__(self):
+        self.converter = IntelliJToZedConverter()
+
+    def emit(self, scheme: IntelliJScheme, job: ThemeJob) -> Dict[str, Any]:
+        theme_name = scheme.name if scheme.name is not None else job.stem
+        author = f"Converted from IntelliJ ({theme_name})"
+        return self.converter.convert_scheme(scheme, theme_name, author, job.theme_json)
+
+
 def main():
     parser = argparse.ArgumentParser(description='Convert IntelliJ themes to Zed format')
     parser.add_argument('input', type=Path, help='Input IntelliJ theme .icls file')
     parser.add_argument('-o', '--output', type=Path, help='Output Zed theme .json file')
     parser.add_argument('-a', '--author', type=str, help='Theme author name')
     parser.add_argument('-t', '--theme-json', type=Path, help='Optional IntelliJ theme.json file for enhanced UI colors')
+    add_logging_arguments(parser)
 
     args = parser.parse_args()
+    configure_from_args(args)
 
     converter = IntelliJToZedConverter()
 
@@ -863,6 +851,7 @@ def main():
         print(f"📁 Output: {output_path}")
 
     except Exception as e:
+        log.error('conversion_failed', input=str(args.input), error=str(e), exc_info=True)
         print(f"❌ Error converting theme: {e}")
         return 1
 
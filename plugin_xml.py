@@ -0,0 +1,198 @@
+#!/usr/bin/env python3
+"""
+The themeProvider entries of the plugin descriptor (src/main/resources/META-INF/plugin.xml).
+
+Entries are read line by line with one regex rather than an XML parser, because
+commented-out providers (<!-- <themeProvider .../> -->) matter too: they are themes
+that are deliberately disabled, not missing ones.
+
+Checked against the themes directory (read once into a theme index):
+
+    missing     an active entry points at a file that does not exist       (error)
+    duplicate   an id or path is listed by more than one active entry      (error)
+    orphaned    a .theme.json no entry, active or commented out, refers to  (warning)
+
+--sync comments out entries with missing files and later duplicates, and appends
+orphaned themes as commented-out entries, so enabling one is a one-line change.
+plugin.xml is only rewritten when that changes its content, which keeps Gradle's
+patchPluginXml and resource processing up to date.
+
+Usage:
+    python3 plugin_xml.py            # validate
+    python3 plugin_xml.py --sync
+"""
+
+import argparse
+import re
+import sys
+from collections import Counter
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from theme_common import THEMES_DIR, PathLike, load_json, write_text
+from theme_log import add_logging_arguments, configure_from_args, get_logger
+
+log = get_logger('plugin_xml')
+
+PLUGIN_XML = Path(__file__).parent / 'src' / 'main' / 'resources' / 'META-INF' / 'plugin.xml'
+
+_PROVIDER_RE = re.compile(r'^(\s*)(<!--\s*)?<themeProvider\s+id="([^"]+)"\s+path="([^"]+)"\s*/>')
+
+
+class ThemeProvider:
+    """One <themeProvider id=... path=.../> line; `active` is False when commented out."""
+
+    def __init__(self, provider_id: str, path: str, active: bool = True, line: Optional[int] = None):
+        self.id = provider_id
+        # Resource path, e.g. "/themes/gruvbox.theme.json"
+        self.path = path
+        self.active = active
+        self.line = line
+
+    def file(self, themes_dir: PathLike = THEMES_DIR) -> Path:
+        """The theme.json this entry points at (resource paths are relative to themes/'s parent)."""
+        return Path(themes_dir).parent / self.path.lstrip('/')
+
+    def __repr__(self) -> str:
+        return f'ThemeProvider({self.id!r}, {self.path!r}, active={self.active})'
+
+
+def read_theme_providers(plugin_xml: PathLike = PLUGIN_XML) -> List[ThemeProvider]:
+    providers = []
+    with open(plugin_xml, 'r', encoding='utf-8') as f:
+        for number, line in enumerate(f, 1):
+            match = _PROVIDER_RE.match(line)
+            if match:
+                providers.append(ThemeProvider(match.group(3), match.group(4), not match.group(2), number))
+    return providers
+
+
+def theme_index(themes_dir: PathLike = THEMES_DIR) -> Dict[str, Dict[str, Any]]:
+    """Every .theme.json in `themes_dir`: file name -> name, dark, editorScheme."""
+    index = {}
+    for path in sorted(Path(themes_dir).glob('*.theme.json')):
+        try:
+            theme_json = load_json(path)
+        except ValueError as e:
+            log.warning('theme_read_failed', file=path.name, error=str(e))
+            continue
+        index[path.name] = {
+            'name': theme_json.get('name'),
+            'dark': bool(theme_json.get('dark', False)),
+            'editorScheme': theme_json.get('editorScheme'),
+        }
+    return index
+
+
+def validate_providers(providers: List[ThemeProvider], index: Dict[str, Dict[str, Any]],
+                       themes_dir: PathLike = THEMES_DIR) -> List[Dict[str, Any]]:
+    """Missing, duplicate and orphaned entries, in plugin.xml order."""
+    problems = []
+    active = [p for p in providers if p.active]
+    ids = Counter(p.id for p in active)
+    paths = Counter(p.path for p in active)
+    reported = set()
+    for provider in providers:
+        if provider.active and not provider.file(themes_dir).exists():
+            problems.append({'kind': 'missing', 'severity': 'error', 'line': provider.line,
+                             'message': f"{provider.id} points at missing {provider.path}"})
+        for label, value, counter in (('id', provider.id, ids), ('path', provider.path, paths)):
+            if provider.active and counter[value] > 1 and (label, value) not in reported:
+                reported.add((label, value))
+                problems.append({'kind': 'duplicate', 'severity': 'error', 'line': provider.line,
+                                 'message': f"{label} {value} is listed {counter[value]} times"})
+
+    listed = {Path(p.path).name for p in providers}
+    for file_name in index:
+        if file_name not in listed:
+            problems.append({'kind': 'orphaned', 'severity': 'warning', 'line': None,
+                             'message': f"{file_name} has no themeProvider entry"})
+    return problems
+
+
+def provider_line(provider_id: str, path: str, active: bool, indent: str = '        ') -> str:
+    entry = f'<themeProvider id="{provider_id}" path="{path}"/>'
+    return f'{indent}{entry}\n' if active else f'<!--{indent}{entry}-->\n'
+
+
+def synced_plugin_xml(text: str, index: Dict[str, Dict[str, Any]], themes_dir: PathLike = THEMES_DIR) -> str:
+    """plugin.xml content with broken entries commented out and orphaned themes appended (disabled)."""
+    lines = text.splitlines(keepends=True)
+    providers = []
+    seen_ids, seen_paths = set(), set()
+    last_line = None
+    for number, line in enumerate(lines):
+        match = _PROVIDER_RE.match(line)
+        if not match:
+            continue
+        last_line = number
+        provider = ThemeProvider(match.group(3), match.group(4), not match.group(2), number + 1)
+        providers.append(provider)
+        if not provider.active:
+            continue
+        # Entries that get disabled do not count as the first of a duplicate
+        if provider.id in seen_ids or provider.path in seen_paths or not provider.file(themes_dir).exists():
+            lines[number] = provider_line(provider.id, provider.path, False, match.group(1))
+            continue
+        seen_ids.add(provider.id)
+        seen_paths.add(provider.path)
+
+    if last_line is None:
+        raise ValueError("plugin.xml has no themeProvider entries to extend")
+
+    # New ids follow the prefix the existing entries use
+    prefixes = Counter(p.id.rsplit('.', 1)[0] for p in providers if '.' in p.id)
+    prefix = prefixes.most_common(1)[0][0] + '.' if prefixes else ''
+    listed = {Path(p.path).name for p in providers}
+    resource_dir = Path(themes_dir).name
+    additions = [provider_line(f"{prefix}{file_name[:-len('.theme.json')]}", f'/{resource_dir}/{file_name}', False)
+                 for file_name in index if file_name not in listed]
+    lines[last_line + 1:last_line + 1] = additions
+    return ''.join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Validate (or --sync) the themeProvider entries of plugin.xml against the themes directory',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument('--plugin-xml', type=Path, default=PLUGIN_XML, help='Plugin descriptor')
+    parser.add_argument('--themes-dir', type=Path, default=THEMES_DIR, help='Directory with .theme.json files')
+    parser.add_argument('--sync', action='store_true',
+                        help='Comment out broken entries and add orphaned themes (disabled)')
+    add_logging_arguments(parser)
+
+    args = parser.parse_args()
+    configure_from_args(args)
+
+    index = theme_index(args.themes_dir)
+
+    if args.sync:
+        text = args.plugin_xml.read_text(encoding='utf-8')
+        try:
+            synced = synced_plugin_xml(text, index, args.themes_dir)
+        except ValueError as e:
+            print(f"❌ {e}")
+            return 1
+        if write_text(args.plugin_xml, synced):
+            print(f"✅ Updated {args.plugin_xml}")
+        else:
+            print(f"✓ {args.plugin_xml} already in sync")
+
+    providers = read_theme_providers(args.plugin_xml)
+    problems = validate_providers(providers, index, args.themes_dir)
+    for problem in problems:
+        icon = '❌' if problem['severity'] == 'error' else '⚠️ '
+        where = f"line {problem['line']}: " if problem['line'] else ''
+        print(f"{icon} [{problem['kind']}] {where}{problem['message']}")
+        log.info('provider_problem', **problem)
+
+    active = sum(1 for p in providers if p.active)
+    errors = sum(1 for p in problems if p['severity'] == 'error')
+    print(f"\n📋 {active} active / {len(providers)} themeProvider entries, {len(index)} theme files, "
+          f"{len(problems)} problems")
+    return 1 if errors else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,357 @@
+#!/usr/bin/env python3
+"""
+Rule compaction for Sublime Text color schemes.
+
+Sublime matches every rule against every token's scope, so the converter's output
+(semantic groups, then region, diff, LSP and side-by-side rules) costs highlighting
+time per rule. This pass shrinks the rule list without changing what any scope resolves
+to:
+
+    shadowed   a selector is dropped from a rule when later rules with the very same
+               selector set every property it sets (equal score, the later rule wins);
+               rules left without selectors are removed
+    merged     rules with the same style (foreground, background, font_style, ...) are
+               combined into one rule with a comma-separated selector, as long as no rule
+               in between could match the same token and set the same property
+    variables  variables nothing references are dropped; "--name" variables are kept,
+               plugins read them from minihtml
+
+The result is checked by resolving every selector of the original rules (and a child
+scope of each) against both rule lists.
+
+Usage:
+    python3 sublime_rules.py                                    # report for all schemes
+    python3 sublime_rules.py gruvbox.sublime-color-scheme -o build/rules
+    python3 intellij_to_sublime_json.py gruvbox.xml gruvbox.sublime-color-scheme --compact-rules
+"""
+
+import argparse
+import copy
+import re
+import sys
+from functools import partial
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from theme_common import THEMES_DIR, dump_json, load_json, parallel_map, write_text
+from theme_emitters import ThemeJob
+from theme_log import add_logging_arguments, configure_from_args, get_logger
+
+log = get_logger('rules')
+
+# Rule keys that are not part of the style
+RULE_META_KEYS = ('name', 'scope')
+
+_VAR_RE = re.compile(r'var\(\s*([\w-]+)\s*\)')
+
+# A selector that is a single scope name: no descendants, exclusions or grouping
+_PLAIN_SELECTOR_RE = re.compile(r'^[\w.+-]+$')
+
+
+def split_selector(scope: str) -> List[str]:
+    """Comma-separated alternatives of a scope selector, without duplicates."""
+    selectors = []
+    for selector in scope.split(','):
+        selector = ' '.join(selector.split())
+        if selector and selector not in selectors:
+            selectors.append(selector)
+    return selectors
+
+
+def is_plain(selector: str) -> bool:
+    return bool(_PLAIN_SELECTOR_RE.match(selector)) and not selector.startswith('-')
+
+
+def style_signature(rule: Dict[str, Any]) -> Tuple:
+    return tuple(sorted((key, str(value)) for key, value in rule.items() if key not in RULE_META_KEYS))
+
+
+def _selector_score(selector: str, stack: List[str]) -> Optional[Tuple]:
+    """Score of a descendant selector against a scope stack; higher is more specific."""
+    if not is_plain(selector.replace(' ', '.')):
+        return None
+    atoms = selector.split(' ')
+    score: List[Tuple[int, int]] = []
+    depth = len(stack) - 1
+    # Match from the innermost scope outwards; the last atom has to match the token itself
+    for index, atom in enumerate(reversed(atoms)):
+        while depth >= 0 and not (stack[depth] == atom or stack[depth].startswith(atom + '.')):
+            if index == 0:
+                return None
+            depth -= 1
+        if depth < 0:
+            return None
+        score.append((depth, atom.count('.') + 1))
+        depth -= 1
+    return tuple(score)
+
+
+def resolve_style(rules: List[Dict[str, Any]], stack: List[str]) -> Dict[str, Any]:
+    """Style Sublime applies to a token: per property, the best-scoring rule, the later on ties."""
+    best: Dict[str, Tuple[Tuple, Any]] = {}
+    for rule in rules:
+        scores = [s for s in (_selector_score(sel, stack) for sel in split_selector(rule.get('scope', '')))
+                  if s is not None]
+        if not scores:
+            continue
+        score = max(scores)
+        for key, value in rule.items():
+            if key in RULE_META_KEYS:
+                continue
+            if key not in best or score >= best[key][0]:
+                best[key] = (score, value)
+    return {key: value for key, (_, value) in best.items()}
+
+
+def drop_shadowed(rules: List[Dict[str, Any]]) -> Tuple[List[Dict[str, Any]], int]:
+    """Remove selectors whose every property is set again by a later rule with the same selector."""
+    later: Dict[str, set] = {}
+    kept: List[Dict[str, Any]] = []
+    dropped = 0
+    for rule in reversed(rules):
+        keys = {key for key in rule if key not in RULE_META_KEYS}
+        selectors = split_selector(rule.get('scope', ''))
+        alive = [sel for sel in selectors if not keys <= later.get(sel, set())]
+        dropped += len(selectors) - len(alive)
+        for selector in selectors:
+            later.setdefault(selector, set()).update(keys)
+        if alive:
+            rule = dict(rule, scope=', '.join(alive))
+            kept.append(rule)
+    kept.reverse()
+    return kept, dropped
+
+
+def _prefixes(selector: str) -> List[str]:
+    """'a.b.c' -> ['a', 'a.b', 'a.b.c']"""
+    parts = selector.split('.')
+    return ['.'.join(parts[:length]) for length in range(1, len(parts) + 1)]
+
+
+def merge_same_style(rules: List[Dict[str, Any]]) -> Tuple[List[Dict[str, Any]], int]:
+    """Fold each rule into the first earlier rule of the same style when nothing in between conflicts.
+
+    Output positions are indexed by selector, selector prefix, style and property, so each
+    rule is placed with a few lookups instead of a scan over the rules before it.
+    """
+    merged: List[Dict[str, Any]] = []
+    selectors_at: List[List[str]] = []
+    names_at: List[List[str]] = []
+    by_signature: Dict[Tuple, List[int]] = {}
+    exact: Dict[str, List[int]] = {}
+    by_prefix: Dict[str, List[int]] = {}
+    wild: List[int] = []
+    last_with_key: Dict[str, int] = {}
+
+    def index_selectors(position: int, selectors: List[str]):
+        for selector in selectors:
+            if is_plain(selector):
+                exact.setdefault(selector, []).append(position)
+                for prefix in _prefixes(selector):
+                    by_prefix.setdefault(prefix, []).append(position)
+            else:
+                wild.append(position)
+
+    for rule in rules:
+        signature = style_signature(rule)
+        keys = {key for key in rule if key not in RULE_META_KEYS}
+        selectors = split_selector(rule.get('scope', ''))
+
+        # The last earlier rule that could tie with one of these selectors and sets a shared property;
+        # moving the selectors above it would change which rule wins
+        if all(is_plain(selector) for selector in selectors):
+            overlapping = set(wild)
+            for selector in selectors:
+                overlapping.update(by_prefix.get(selector, ()))
+                for prefix in _prefixes(selector):
+                    overlapping.update(exact.get(prefix, ()))
+            conflicts = [position for position in overlapping if keys & set(merged[position])]
+            barrier = max(conflicts, default=-1)
+        else:
+            barrier = max((last_with_key[key] for key in keys if key in last_with_key), default=-1)
+
+        target = next((position for position in by_signature.get(signature, ()) if position >= barrier), None)
+        if target is None:
+            position = len(merged)
+            merged.append(dict(rule))
+            selectors_at.append(list(selectors))
+            names_at.append([rule['name']] if rule.get('name') else [])
+            by_signature.setdefault(signature, []).append(position)
+            index_selectors(position, selectors)
+            for key in keys:
+                last_with_key[key] = position
+            continue
+
+        added = [selector for selector in selectors if selector not in selectors_at[target]]
+        selectors_at[target].extend(added)
+        index_selectors(target, added)
+        if rule.get('name') and rule['name'] not in names_at[target]:
+            names_at[target].append(rule['name'])
+
+    for rule, selectors, names in zip(merged, selectors_at, names_at):
+        rule['scope'] = ', '.join(selectors)
+        if names:
+            rule['name'] = ', '.join(names)
+    return merged, len(rules) - len(merged)
+
+
+def used_variables(theme: Dict[str, Any]) -> set:
+    """Variables referenced from globals and rules, directly or through other variables."""
+    variables = theme.get('variables', {})
+    pending = [str(value) for value in theme.get('globals', {}).values()]
+    pending += [str(value) for rule in theme.get('rules', []) for key, value in rule.items()
+                if key not in RULE_META_KEYS]
+    used = set()
+    while pending:
+        for name in _VAR_RE.findall(pending.pop()):
+            if name in variables and name not in used:
+                used.add(name)
+                pending.append(str(variables[name]))
+    return used
+
+
+def sample_scopes(rules: List[Dict[str, Any]]) -> List[List[str]]:
+    """Scope stacks that exercise every plain selector: the selector itself and a child of it."""
+    stacks = {}
+    for rule in rules:
+        for selector in split_selector(rule.get('scope', '')):
+            atoms = selector.split(' ')
+            if is_plain(selector.replace(' ', '.')):
+                for stack in (['source'] + atoms, ['source'] + atoms[:-1] + [atoms[-1] + '.child']):
+                    stacks.setdefault(' '.join(stack), stack)
+    return list(stacks.values())
+
+
+def same_resolution(original: List[Dict[str, Any]], compacted: List[Dict[str, Any]],
+                    stacks: List[List[str]]) -> Optional[List[str]]:
+    """The first stack the two rule lists style differently, or None.
+
+    Rules are looked up by the last atom of their selectors (only rules whose last atom
+    prefixes the token's scope can match), which keeps this linear in the number of stacks.
+    """
+    indexes = []
+    for rules in (original, compacted):
+        index: Dict[str, set] = {}
+        for position, rule in enumerate(rules):
+            for selector in split_selector(rule.get('scope', '')):
+                index.setdefault(selector.split(' ')[-1], set()).add(position)
+        indexes.append(index)
+
+    for stack in stacks:
+        styles = []
+        for rules, index in zip((original, compacted), indexes):
+            positions = set()
+            for prefix in _prefixes(stack[-1]):
+                positions.update(index.get(prefix, ()))
+            styles.append(resolve_style([rules[position] for position in sorted(positions)], stack))
+        if styles[0] != styles[1]:
+            return stack
+    return None
+
+
+def compact_rules(theme: Dict[str, Any]) -> Tuple[Dict[str, Any], Dict[str, int]]:
+    """Return a copy of a Sublime color scheme with shadowed rules dropped and same-style rules merged."""
+    theme = copy.deepcopy(theme)
+    rules = theme.get('rules', [])
+    stats = {'rules_before': len(rules), 'variables_before': len(theme.get('variables', {}))}
+
+    compacted, stats['shadowed'] = drop_shadowed(rules)
+    compacted, stats['merged'] = merge_same_style(compacted)
+
+    mismatch = same_resolution(rules, compacted, sample_scopes(rules))
+    if mismatch is not None:
+        log.warning('rules_unverified', theme=theme.get('name'), scope=' '.join(mismatch))
+        compacted = rules
+        stats.update(shadowed=0, merged=0)
+    theme['rules'] = compacted
+
+    variables = theme.get('variables', {})
+    used = used_variables(theme)
+    theme['variables'] = {name: value for name, value in variables.items()
+                          if name in used or name.startswith('--')}
+
+    stats.update(rules_after=len(theme['rules']), variables_after=len(theme['variables']))
+    return theme, stats
+
+
+def compact_job(job: ThemeJob, out_dir: Optional[Path] = None) -> Dict[str, Any]:
+    """Convert one scheme to Sublime and compact its rules. Runs inside a worker process."""
+    from intellij_to_sublime_json import IntelliJToSublimeJSONConverter
+
+    try:
+        converter = IntelliJToSublimeJSONConverter()
+        theme = converter.create_sublime_json_theme(*converter.extract_scheme(job.scheme))
+        compacted, stats = compact_rules(theme)
+    except Exception as e:
+        return {'theme': job.stem, 'error': f'{type(e).__name__}: {e}'}
+    return _result(job.stem, theme, compacted, stats, out_dir)
+
+
+def compact_file(path: Path, out_dir: Optional[Path] = None) -> Dict[str, Any]:
+    """Compact an existing .sublime-color-scheme."""
+    try:
+        theme = load_json(path)
+        compacted, stats = compact_rules(theme)
+    except ValueError as e:
+        return {'theme': path.stem, 'error': str(e)}
+    return _result(path.stem, theme, compacted, stats, out_dir)
+
+
+def _result(stem: str, theme: Dict[str, Any], compacted: Dict[str, Any], stats: Dict[str, int],
+            out_dir: Optional[Path]) -> Dict[str, Any]:
+    result = {'theme': stem, **stats,
+              'bytes_before': len(dump_json(theme, 4)), 'bytes_after': len(dump_json(compacted, 4))}
+    if out_dir is not None:
+        write_text(out_dir / f'{stem}.sublime-color-scheme', dump_json(compacted, 4))
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Merge same-style Sublime rules, drop shadowed rules and unused variables',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument('files', nargs='*', type=Path,
+                        help='.sublime-color-scheme files (default: convert every scheme in --themes-dir)')
+    parser.add_argument('--themes-dir', type=Path, default=THEMES_DIR, help='Directory with scheme XML files')
+    parser.add_argument('--only', action='append', help='Process only this scheme stem (repeatable)')
+    parser.add_argument('-o', '--output', type=Path, help='Write compacted color schemes here')
+    parser.add_argument('-j', '--workers', type=int, default=None, help='Worker processes (default: CPU count)')
+    add_logging_arguments(parser)
+
+    args = parser.parse_args()
+    configure_from_args(args)
+
+    if args.files:
+        results = parallel_map(partial(compact_file, out_dir=args.output), args.files, args.workers)
+    else:
+        from theme_batch import discover_jobs
+        jobs = discover_jobs(args.themes_dir, args.only)
+        if not jobs:
+            print("❌ No schemes found!")
+            return 1
+        results = parallel_map(partial(compact_job, out_dir=args.output), jobs, args.workers)
+
+    print(f"{'Theme':<26} {'rules':>11} {'variables':>11} {'bytes':>17}")
+    failed = 0
+    for result in results:
+        if 'error' in result:
+            failed += 1
+            print(f"{result['theme']:<26} ❌ {result['error']}")
+            continue
+        print(f"{result['theme']:<26} {result['rules_before']:>4} -> {result['rules_after']:<4} "
+              f"{result['variables_before']:>4} -> {result['variables_after']:<4} "
+              f"{result['bytes_before']:>7} -> {result['bytes_after']:<7}")
+        log.info('rules_compacted', **result)
+
+    ok = [r for r in results if 'error' not in r]
+    before = sum(r['rules_before'] for r in ok)
+    after = sum(r['rules_after'] for r in ok)
+    print(f"\n🧹 {len(ok)} themes: {before} -> {after} rules")
+    if args.output:
+        print(f"✅ Written to {args.output}")
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
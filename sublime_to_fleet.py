@@ -18,11 +18,25 @@ import re
 from typing import Dict, List, Optional, Any
 from pathlib import Path
 
+from theme_common import load_json, write_json
+from theme_emitters import ThemeEmitter, ThemeJob, register_emitter
+from theme_log import add_logging_arguments, configure_from_args, get_logger
+from theme_palette import DEFAULT_DELTA_E, compact_fleet
+
+log = get_logger('fleet')
+
 
 class SublimeToFleetConverter:
     """Converts Sublime Text themes to Fleet theme format."""
     
-    def __init__(self):
+    def __init__(self, palette_threshold: Optional[float] = None, inherit_attributes: bool = False):
+        # ΔE for palette extraction; None keeps the fixed variable -> palette name mapping only
+        self.palette_threshold = palette_threshold
+        # Leave out textAttributes equal to their dotted parent ("keyword.control" -> "keyword")
+        self.inherit_attributes = inherit_attributes
+        # Colors of the last conversion that had no palette entry: palette name -> color
+        self.promoted: Dict[str, str] = {}
+
         # Map Sublime TextMate scopes to Fleet semantic identifiers
         self.scope_to_fleet_mapping = {
             # Comments
@@ -242,12 +256,52 @@ class SublimeToFleetConverter:
                 color = self.resolve_color_var(variables[var_name], variables)
                 if color and color.startswith('#'):
                     palette[palette_name] = self.normalize_color(color)
+
+        # With palette extraction, variables outside the fixed mapping join the palette too
+        if self.palette_threshold is not None:
+            for var_name, value in variables.items():
+                if var_name in var_to_palette:
+                    continue
+                color = self.resolve_color_var(value, variables)
+                palette_name = self.palette_name_for_variable(var_name)
+                if color and color.startswith('#') and palette_name not in palette:
+                    palette[palette_name] = self.normalize_color(color)
         
         # Add transparent color
         palette['Transparent'] = '#FFFFFF00'
         
         return palette
     
+    def palette_reference(self, color: str, palette: Dict[str, str]) -> Optional[str]:
+        """Palette name for a color; a color the palette lacks becomes a new entry "Promoted1", "Promoted2", ...
+
+        The generated name never reuses a role name like "Text", so a reference to an
+        off-palette color cannot be mistaken for the palette's own entry of that role.
+
+        Returns None for values that are not hex colors (e.g. an unresolved var()).
+        """
+        if not color or not isinstance(color, str) or not color.startswith('#'):
+            return None
+        color = self.normalize_color(color)
+        for name, palette_color in palette.items():
+            if self.normalize_color(palette_color) == color:
+                return name
+        number = 1
+        while f'Promoted{number}' in palette:
+            number += 1
+        name = f'Promoted{number}'
+        palette[name] = color
+        self.promoted[name] = color
+        log.warning('palette_color_promoted', name=name, color=color)
+        return name
+
+    def palette_name_for_variable(self, var_name: str) -> str:
+        """'yaml_value_color' -> 'YamlValue', '--bluish' -> 'Bluish'."""
+        words = var_name.strip('-').split('_')
+        if len(words) > 1 and words[-1] == 'color':
+            words = words[:-1]
+        return ''.join(word[:1].upper() + word[1:] for word in words if word)
+
     def create_colors_from_globals(self, globals_dict: Dict[str, str], 
                                    variables: Dict[str, str], 
                                    palette: Dict[str, str],
@@ -270,15 +324,9 @@ class SublimeToFleetConverter:
                     return name
             return fallback if fallback in palette else list(palette.keys())[0]
 
-        # Find exact palette match for a color value
+        # Find exact palette match for a color value, adding it to the palette when missing
         def find_palette_name(color: str, fallback: str = 'Text') -> str:
-            if not color:
-                return fallback
-            color = self.normalize_color(color)
-            for name, palette_color in palette.items():
-                if self.normalize_color(palette_color) == color:
-                    return name
-            return fallback
+            return self.palette_reference(color, palette) or fallback
 
         # Define common colors early
         bg = get_palette_color(['Base', 'Text'])
@@ -539,16 +587,10 @@ class SublimeToFleetConverter:
                     return name
             return fallback if fallback in palette else list(palette.keys())[0]
 
-        # Find palette name for a color value
+        # Find palette name for a color value; a color the palette lacks is added to it
         def find_palette_name(color: str, fallback: str = 'Text') -> str:
-            if not color:
-                return fallback
-            color = self.normalize_color(self.resolve_color_var(color, variables))
-            for name, palette_color in palette.items():
-                if self.normalize_color(palette_color) == color:
-                    return name
-            # If not found, don't return the hex - return fallback
-            return get_palette_color([fallback], 'Text')
+            return (self.palette_reference(self.resolve_color_var(color, variables), palette)
+                    or get_palette_color([fallback], 'Text'))
 
         # Add all common text attributes directly (based on Fleet.json structure)
         # No need to process rules - just define what we need
@@ -764,8 +806,37 @@ class SublimeToFleetConverter:
 
         return text_attributes
 
+    def intern_text_attributes(self, text_attributes: Dict[str, Dict]) -> Dict[str, Dict]:
+        """With inherit_attributes, drop the attributes equal to their parent; otherwise return them as is.
+
+        Fleet looks a missing "a.b.c" up as "a.b", then "a", so a child identical to its
+        nearest defined ancestor adds nothing. Identical attributes are interned to one
+        object only to compare them by identity; the written JSON repeats every entry
+        either way, so only leaving entries out makes the file smaller.
+        """
+        if not self.inherit_attributes:
+            return text_attributes
+
+        interned: Dict[str, Dict] = {}
+        result = {}
+        for key, attributes in text_attributes.items():
+            signature = json.dumps(attributes, sort_keys=True)
+            result[key] = interned.setdefault(signature, attributes)
+
+        inherited = {}
+        for key, attributes in result.items():
+            parts = key.split('.')
+            parent = next((result['.'.join(parts[:i])] for i in range(len(parts) - 1, 0, -1)
+                           if '.'.join(parts[:i]) in result), None)
+            if parent is not attributes:
+                inherited[key] = attributes
+        log.debug('text_attributes_interned', before=len(text_attributes), distinct=len(interned),
+                  after=len(inherited))
+        return inherited
+
     def convert(self, sublime_theme: Dict) -> Dict:
         """Convert a Sublime theme to Fleet format."""
+        self.promoted = {}
         # Extract components
         name = sublime_theme.get('name', 'Converted Theme')
         variables = sublime_theme.get('variables', {})
@@ -787,30 +858,50 @@ class SublimeToFleetConverter:
                 'theme.version': 1
             },
             'colors': self.create_colors_from_globals(globals_dict, variables, palette, theme_kind),
-            'textAttributes': self.create_text_attributes(rules, variables, palette, globals_dict),
+            'textAttributes': self.intern_text_attributes(
+                self.create_text_attributes(rules, variables, palette, globals_dict)),
             'palette': palette
         }
+        if self.promoted:
+            log.warning('palette_colors_promoted', theme=name, colors=self.promoted)
+
+        if self.palette_threshold is not None:
+            fleet_theme = compact_fleet(fleet_theme, self.palette_threshold)
         
         return fleet_theme
     
-    def convert_file(self, input_path: str, output_path: str):
+    def convert_file(self, input_path: str, output_path: str) -> Dict:
         """Convert a Sublime theme file to Fleet format."""
         # Read input file
-        with open(input_path, 'r', encoding='utf-8') as f:
-            sublime_theme = json.load(f)
+        sublime_theme = load_json(input_path)
         
         # Convert
         fleet_theme = self.convert(sublime_theme)
         
         # Write output file
-        with open(output_path, 'w', encoding='utf-8') as f:
-            json.dump(fleet_theme, f, indent=2, ensure_ascii=False)
+        write_json(output_path, fleet_theme, indent=2)
         
-        print(f"✓ Converted: {input_path} -> {output_path}")
-        print(f"  Theme: {fleet_theme['meta']['theme.name']}")
-        print(f"  Kind: {fleet_theme['meta']['theme.kind']}")
-        print(f"  Palette colors: {len(fleet_theme['palette'])}")
-        print(f"  Text attributes: {len(fleet_theme['textAttributes'])}")
+        log.info('converted', input=input_path, output=output_path,
+                 theme=fleet_theme['meta']['theme.name'], kind=fleet_theme['meta']['theme.kind'],
+                 palette=len(fleet_theme['palette']), text_attributes=len(fleet_theme['textAttributes']))
+        return fleet_theme
+
+
+@register_emitter
+class FleetEmitter(ThemeEmitter):
+    """Sublime color scheme (output of the sublime emitter) -> Fleet theme."""
+
+    name = 'fleet'
+    description = 'Fleet theme (.json), converted from the Sublime output'
+    source = 'sublime'
+    suffix = '_fleet.json'
+    indent = 2
+
+    def __init__(self):
+        self.converter = SublimeToFleetConverter()
+
+    def emit(self, sublime_theme: Dict, job: ThemeJob) -> Dict:
+        return self.converter.convert(sublime_theme)
 
 
 def main():
@@ -827,8 +918,15 @@ Examples:
     
     parser.add_argument('input', help='Input Sublime theme file (.sublime-color-scheme or .json)')
     parser.add_argument('output', help='Output Fleet theme file (.json)')
+    parser.add_argument('--palette-delta-e', type=float, nargs='?', const=DEFAULT_DELTA_E,
+                        help=f'Extract a palette from all variables, merging colors within this ΔE '
+                             f'(default when given: {DEFAULT_DELTA_E})')
+    parser.add_argument('--inherit-attributes', action='store_true',
+                        help='Leave out textAttributes identical to their dotted parent')
+    add_logging_arguments(parser)
     
     args = parser.parse_args()
+    configure_from_args(args)
     
     # Validate input file exists
     if not Path(args.input).exists():
@@ -837,13 +935,19 @@ Examples:
     
     # Convert
     try:
-        converter = SublimeToFleetConverter()
-        converter.convert_file(args.input, args.output)
+        converter = SublimeToFleetConverter(args.palette_delta_e, args.inherit_attributes)
+        fleet_theme = converter.convert_file(args.input, args.output)
+        print(f"✓ Converted: {args.input} -> {args.output}")
+        print(f"  Theme: {fleet_theme['meta']['theme.name']}")
+        print(f"  Kind: {fleet_theme['meta']['theme.kind']}")
+        print(f"  Palette colors: {len(fleet_theme['palette'])}")
+        print(f"  Text attributes: {len(fleet_theme['textAttributes'])}")
+        for palette_name, color in converter.promoted.items():
+            print(f"  ⚠️  {color} is not a palette color, added as {palette_name}")
         return 0
     except Exception as e:
+        log.error('conversion_failed', input=args.input, error=str(e), exc_info=True)
         print(f"Error during conversion: {e}")
-        import traceback
-        traceback.print_exc()
         return 1
 
 
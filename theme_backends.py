@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+"""
+JSON and XML backends for the theme scripts.
+
+Parsing and serializing go through json_loads / json_dumps / parse_xml, which use orjson
+and lxml when they are installed and the standard library otherwise. The fast paths are
+only taken where they produce the same result byte for byte:
+
+    json_dumps   orjson for indent=2 and for compact output; indent=4 (Sublime) and the
+                 default ", " separators have no orjson option and stay on json
+    json_loads   orjson; input it rejects (NaN, integers beyond 64 bits) is parsed by json
+    parse_xml    lxml with comments and processing instructions dropped, like ElementTree
+                 does; input lxml rejects is parsed by ElementTree
+
+DARK_THEMES_BACKEND=stdlib turns the fast paths off. Running this script parses and
+converts every theme with both backends and reports any difference.
+
+Usage:
+    python3 theme_backends.py
+    python3 theme_backends.py --only gruvbox -v
+"""
+
+import argparse
+import json
+import os
+import sys
+import xml.etree.ElementTree as ET
+from pathlib import Path
+from typing import Any, List, Optional, Union
+
+from theme_log import add_logging_arguments, configure_from_args
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    from lxml import etree as lxml_etree
+except ImportError:
+    lxml_etree = None
+
+USE_FAST_BACKENDS = os.environ.get('DARK_THEMES_BACKEND', '').lower() != 'stdlib'
+
+if lxml_etree is not None:
+    _LXML_PARSER = lxml_etree.XMLParser(remove_comments=True, remove_pis=True, resolve_entities=False)
+
+
+def backend_names() -> str:
+    json_name = 'orjson' if orjson is not None and USE_FAST_BACKENDS else 'json'
+    xml_name = 'lxml' if lxml_etree is not None and USE_FAST_BACKENDS else 'ElementTree'
+    return f'{json_name}, {xml_name}'
+
+
+def json_dumps(data: Any, indent: Optional[int] = None, sort_keys: bool = False, compact: bool = False,
+               fast: bool = True) -> str:
+    """json.dumps(ensure_ascii=False) with the given layout; `compact` means no whitespace at all."""
+    if fast and orjson is not None and USE_FAST_BACKENDS and (indent == 2 or (compact and indent is None)):
+        option = orjson.OPT_INDENT_2 if indent == 2 else 0
+        if sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        try:
+            return orjson.dumps(data, option=option).decode('utf-8')
+        except TypeError:
+            # Non-string keys, big integers, types orjson does not know
+            pass
+    separators = (',', ':') if compact else None
+    return json.dumps(data, indent=indent, sort_keys=sort_keys, separators=separators, ensure_ascii=False)
+
+
+def json_loads(data: Union[str, bytes], fast: bool = True) -> Any:
+    """json.loads; raises json.JSONDecodeError for invalid input."""
+    if fast and orjson is not None and USE_FAST_BACKENDS:
+        try:
+            return orjson.loads(data)
+        except orjson.JSONDecodeError:
+            pass
+    return json.loads(data)
+
+
+def parse_xml(data: Union[str, bytes], fast: bool = True) -> ET.Element:
+    """Root element of an XML document; raises ET.ParseError for invalid input.
+
+    The lxml element supports the find()/findall()/get()/iter() subset the scripts use.
+    """
+    if fast and lxml_etree is not None and USE_FAST_BACKENDS:
+        try:
+            return lxml_etree.fromstring(data.encode('utf-8') if isinstance(data, str) else data, _LXML_PARSER)
+        except lxml_etree.XMLSyntaxError:
+            pass
+    return ET.fromstring(data)
+
+
+def compare_backends(paths: List[Path]) -> List[str]:
+    """Parse and convert every path with both backends; one message per difference."""
+    from theme_common import IntelliJScheme
+
+    problems = []
+    for path in paths:
+        data = path.read_bytes()
+        if path.suffix == '.xml':
+            try:
+                schemes = [IntelliJScheme.from_root(parse_xml(data, fast)) for fast in (True, False)]
+            except ET.ParseError as e:
+                problems.append(f'{path.name}: {e}')
+                continue
+            if schemes[0].digest() != schemes[1].digest() or schemes[0].name != schemes[1].name:
+                problems.append(f'{path.name}: parsed differently')
+            outputs = _converted_outputs(path)
+        else:
+            try:
+                documents = [json_loads(data, fast) for fast in (True, False)]
+            except json.JSONDecodeError as e:
+                problems.append(f'{path.name}: {e}')
+                continue
+            if documents[0] != documents[1]:
+                problems.append(f'{path.name}: parsed differently')
+            outputs = [documents[1]]
+
+        for output in outputs:
+            for indent, compact in ((2, False), (4, False), (None, True)):
+                for sort_keys in (False, True):
+                    if (json_dumps(output, indent, sort_keys, compact, fast=True) !=
+                            json_dumps(output, indent, sort_keys, compact, fast=False)):
+                        problems.append(f'{path.name}: serialized differently '
+                                        f'(indent={indent}, sort_keys={sort_keys}, compact={compact})')
+    return problems
+
+
+def _converted_outputs(path: Path) -> List[Any]:
+    from theme_emitters import ThemeJob, emit_all, load_emitters
+
+    try:
+        return list(emit_all(ThemeJob(path.stem, path), list(load_emitters())).values())
+    except Exception:
+        # Schemes a converter cannot handle are reported by the batch runner, not here
+        return []
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Check that the orjson/lxml backends give the same results as json/ElementTree',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument('--themes-dir', type=Path, help='Directory with scheme XML and theme.json files')
+    parser.add_argument('--only', action='append', help='Check only this file stem (repeatable)')
+    add_logging_arguments(parser)
+
+    args = parser.parse_args()
+    configure_from_args(args)
+
+    from theme_common import THEMES_DIR
+
+    themes_dir = args.themes_dir or THEMES_DIR
+    paths = sorted(themes_dir.glob('*.xml')) + sorted(themes_dir.glob('*.json'))
+    if args.only:
+        paths = [path for path in paths if path.name.split('.')[0] in args.only]
+
+    print(f"🔧 Backends: {backend_names()}")
+    if orjson is None and lxml_etree is None:
+        print("⚠️  Neither orjson nor lxml is installed, nothing to compare")
+    problems = compare_backends(paths)
+    for problem in problems:
+        print(f"❌ {problem}")
+    if problems:
+        return 1
+    print(f"✅ {len(paths)} files parse and serialize identically with both backends")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,365 @@
+#!/usr/bin/env python3
+"""
+Batch converter: runs registered emitters over every theme in the repository.
+
+Each scheme is parsed once and handed to all requested targets; themes are spread
+over a process pool. A manifest in the output directory remembers the fingerprint of
+every theme's inputs (and of their parsed content), so unchanged themes are skipped on
+the next run, including schemes that were only reformatted.
+
+Every finished theme is also appended to a journal in the output directory, so an
+interrupted run continues with --resume instead of starting over. Workers are
+supervised (theme_runner.resilient_map): a theme that runs past --timeout or beyond
+--max-memory fails on its own, and failed themes are retried once in a fresh worker.
+
+Usage:
+    python3 theme_batch.py -t zed -t sublime -t fleet -o build/converted
+    python3 theme_batch.py -t zed --only gruvbox --only noctis -o build/zed --profile
+    python3 theme_batch.py -t zed -t sublime -t fleet -o build/converted --resume --timeout 30
+    python3 theme_batch.py --list-targets
+"""
+
+import argparse
+import ast
+import hashlib
+import json
+import sys
+import time
+from functools import partial
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional
+
+from theme_common import THEMES_DIR, canonical_digest, dump_json, load_json, write_text
+from theme_emitters import SCHEME_SOURCE, ThemeJob, get_emitter, load_emitters, preload_emitters, resolve_targets
+from theme_log import add_logging_arguments, configure_from_args, configure_logging, get_logger
+from theme_progress import Progress, add_progress_arguments
+from theme_runner import Journal, resilient_map
+
+log = get_logger('batch')
+
+MANIFEST_NAME = '.emit-manifest.json'
+JOURNAL_NAME = '.emit-journal.jsonl'
+
+DEFAULT_TIMEOUT = 120.0
+
+
+def discover_jobs(themes_dir: Path = THEMES_DIR, only: Optional[Iterable[str]] = None) -> List[ThemeJob]:
+    """Pair every scheme XML with the theme.json that references it (if any)."""
+    themes_dir = Path(themes_dir)
+
+    # editorScheme is "/themes/<file>.xml"; fall back to a theme.json with the same stem
+    theme_json_for_scheme: Dict[str, Path] = {}
+    for theme_json_path in sorted(themes_dir.glob('*.theme.json')):
+        try:
+            editor_scheme = load_json(theme_json_path).get('editorScheme', '')
+        except ValueError:
+            continue
+        scheme_stem = Path(editor_scheme).stem if editor_scheme else theme_json_path.name[:-len('.theme.json')]
+        theme_json_for_scheme.setdefault(scheme_stem, theme_json_path)
+
+    wanted = set(only) if only else None
+    jobs = []
+    for scheme_path in sorted(themes_dir.glob('*.xml')):
+        stem = scheme_path.stem
+        if wanted is not None and stem not in wanted:
+            continue
+        jobs.append(ThemeJob(stem, scheme_path, theme_json_for_scheme.get(stem)))
+    return jobs
+
+
+def local_imports(path: Path) -> List[Path]:
+    """This repository's modules that `path` imports (at any depth), itself included."""
+    found: List[Path] = []
+    pending = [Path(path)]
+    while pending:
+        path = pending.pop()
+        if path in found or not path.exists():
+            continue
+        found.append(path)
+        for node in ast.walk(ast.parse(path.read_bytes(), str(path))):
+            if isinstance(node, ast.Import):
+                names = [alias.name for alias in node.names]
+            elif isinstance(node, ast.ImportFrom) and not node.level and node.module:
+                names = [node.module]
+            else:
+                continue
+            pending.extend(path.with_name(f"{name.split('.')[0]}.py") for name in names)
+    return found
+
+
+def emitter_fingerprint(targets: Iterable[str]) -> str:
+    """Hash the source of the emitters involved and of every local module they import.
+
+    Imports inside functions count too, so a change to theme_inheritance, sublime_rules,
+    theme_palette, ... invalidates the manifest like a change to the emitter itself.
+    """
+    digest = hashlib.sha1()
+    modules = set()
+    for name in resolve_targets(targets):
+        digest.update(name.encode())
+        modules.update(local_imports(Path(sys.modules[type(get_emitter(name)).__module__].__file__)))
+    for path in sorted(modules):
+        digest.update(path.name.encode())
+        digest.update(path.read_bytes())
+    return digest.hexdigest()
+
+
+def job_fingerprint(job: ThemeJob, code_fingerprint: str) -> str:
+    """Hash a job's input files and parent theme files together with the emitter code fingerprint."""
+    digest = hashlib.sha1(code_fingerprint.encode())
+    for path in job.input_paths() + job.parent_paths():
+        digest.update(path.name.encode())
+        digest.update(path.read_bytes())
+    return digest.hexdigest()
+
+
+def semantic_fingerprint(job: ThemeJob, code_fingerprint: str) -> str:
+    """Hash the parsed inputs, so layout-only edits of a scheme do not trigger reconversion."""
+    return canonical_digest([code_fingerprint, job.scheme.digest(), job.theme_json,
+                             [load_json(path) for path in job.parent_paths()]])
+
+
+def _reuse_outputs(result: Dict[str, Any], previous: Dict[str, Any], targets: List[str], out_dir: Path) -> bool:
+    outputs = previous.get('outputs', {})
+    if not all(name in outputs and (out_dir / outputs[name]).exists() for name in targets):
+        return False
+    result['status'] = 'cached'
+    result['outputs'] = {name: outputs[name] for name in targets}
+    return True
+
+
+def load_manifest(out_dir: Path) -> Dict[str, Dict[str, Any]]:
+    try:
+        return json.loads((out_dir / MANIFEST_NAME).read_text(encoding='utf-8'))
+    except (OSError, ValueError):
+        return {}
+
+
+def convert_job(job: ThemeJob, targets: List[str], out_dir: Path,
+                code_fingerprint: str, previous: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """Convert one theme to every requested target. Runs inside a worker process."""
+    result: Dict[str, Any] = {
+        'theme': job.stem,
+        'status': 'ok',
+        'outputs': {},
+        'errors': {},
+        'timings': {},
+    }
+    started = time.perf_counter()
+
+    fingerprint = job_fingerprint(job, code_fingerprint)
+    result['fingerprint'] = fingerprint
+    previous = previous or {}
+    if previous.get('fingerprint') == fingerprint and _reuse_outputs(result, previous, targets, out_dir):
+        result['semantic'] = previous.get('semantic')
+        result['timings']['total'] = time.perf_counter() - started
+        return result
+
+    try:
+        stage_start = time.perf_counter()
+        semantic = semantic_fingerprint(job, code_fingerprint)
+        result['timings']['parse'] = time.perf_counter() - stage_start
+    except ValueError as e:
+        result['status'] = 'failed'
+        result['errors']['parse'] = str(e)
+        result['timings']['total'] = time.perf_counter() - started
+        return result
+
+    # Reformatted or reordered input with the same content: outputs are still valid
+    result['semantic'] = semantic
+    if previous.get('semantic') == semantic and _reuse_outputs(result, previous, targets, out_dir):
+        result['timings']['total'] = time.perf_counter() - started
+        return result
+
+    produced: Dict[str, Dict[str, Any]] = {}
+    for name in resolve_targets(targets):
+        emitter = get_emitter(name)
+        if emitter.source != SCHEME_SOURCE and emitter.source not in produced:
+            result['errors'][name] = f"skipped, source '{emitter.source}' failed"
+            continue
+
+        stage_start = time.perf_counter()
+        try:
+            source = job.scheme if emitter.source == SCHEME_SOURCE else produced[emitter.source]
+            produced[name] = emitter.emit(source, job)
+        except Exception as e:
+            result['errors'][name] = f"{type(e).__name__}: {e}"
+            continue
+        finally:
+            result['timings'][name] = time.perf_counter() - stage_start
+
+        if name in targets:
+            stage_start = time.perf_counter()
+            output_name = emitter.output_name(job)
+            write_text(out_dir / output_name, dump_json(produced[name], emitter.indent))
+            result['outputs'][name] = output_name
+            result['timings']['write'] = result['timings'].get('write', 0.0) + time.perf_counter() - stage_start
+
+    if result['errors']:
+        result['status'] = 'failed' if not result['outputs'] else 'partial'
+    result['timings']['total'] = time.perf_counter() - started
+    return result
+
+
+def run_batch(jobs: List[ThemeJob], targets: List[str], out_dir: Path,
+              workers: Optional[int] = None, force: bool = False,
+              log_config: tuple = (0, False), resume: bool = False,
+              timeout: Optional[float] = DEFAULT_TIMEOUT, memory_mb: Optional[int] = None,
+              progress: Optional[Progress] = None) -> List[Dict[str, Any]]:
+    """Convert `jobs` to `targets` into `out_dir` on supervised worker processes.
+
+    `log_config` is the (verbosity, json_lines) pair workers configure logging with. With
+    `resume`, themes the journal of an interrupted run lists as done are not converted again.
+    `progress` reports on the themes that are converted.
+    """
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    load_emitters()
+    for name in targets:
+        get_emitter(name)
+
+    code_fingerprint = emitter_fingerprint(targets)
+    manifest = {} if force else load_manifest(out_dir)
+
+    journal = Journal(out_dir / JOURNAL_NAME)
+    journaled = journal.load() if resume else {}
+    done = {}
+    for job in jobs:
+        record = journaled.get(job.stem)
+        if (record and record['status'] in ('ok', 'cached')
+                and record.get('fingerprint') == job_fingerprint(job, code_fingerprint)):
+            done[job.stem] = record
+    journal.open(resume)
+
+    worker = partial(_convert_entry, targets=list(targets), out_dir=out_dir, code_fingerprint=code_fingerprint)
+    entries = [(job, manifest.get(job.stem)) for job in jobs if job.stem not in done]
+    if progress is not None:
+        progress.begin([job.stem for job, _ in entries])
+    try:
+        converted = iter(resilient_map(worker, entries, _failed_entry, workers, timeout, memory_mb,
+                                       retry=lambda result: result['status'] in ('failed', 'partial'),
+                                       initializer=configure_logging, initargs=log_config,
+                                       on_result=lambda index, result: journal.append(result), progress=progress,
+                                       preload=partial(preload_emitters, list(targets))))
+    finally:
+        journal.close()
+        if progress is not None:
+            progress.close()
+    results = [{**done[job.stem], 'status': 'resumed'} if job.stem in done else next(converted) for job in jobs]
+
+    for result in results:
+        total_ms = round(result['timings'].get('total', 0.0) * 1000, 2)
+        if result['errors']:
+            log.error('theme_failed', theme=result['theme'], status=result['status'], errors=result['errors'], ms=total_ms)
+        else:
+            log.info('theme_done', theme=result['theme'], status=result['status'],
+                     outputs=sorted(result['outputs'].values()), ms=total_ms)
+        if result['status'] in ('ok', 'cached', 'resumed'):
+            manifest[result['theme']] = {'fingerprint': result['fingerprint'], 'semantic': result['semantic'],
+                                         'outputs': result['outputs']}
+        else:
+            manifest.pop(result['theme'], None)
+    write_text(out_dir / MANIFEST_NAME, json.dumps(manifest, indent=1, sort_keys=True))
+    journal.remove()
+
+    return results
+
+
+def _convert_entry(entry: tuple, **kwargs) -> Dict[str, Any]:
+    job, previous = entry
+    return convert_job(job, previous=previous, **kwargs)
+
+
+def _failed_entry(entry: tuple, error: str) -> Dict[str, Any]:
+    job, _ = entry
+    return {'theme': job.stem, 'status': 'failed', 'outputs': {}, 'errors': {'worker': error}, 'timings': {}}
+
+
+def print_profile(results: List[Dict[str, Any]], top: int = 5) -> None:
+    """Print per-stage totals and the slowest themes."""
+    stage_totals: Dict[str, float] = {}
+    for result in results:
+        for stage, seconds in result['timings'].items():
+            stage_totals[stage] = stage_totals.get(stage, 0.0) + seconds
+
+    print("\n⏱  Time per stage (summed over workers):")
+    for stage, seconds in sorted(stage_totals.items(), key=lambda item: -item[1]):
+        print(f"  {stage:<10} {seconds * 1000:9.1f} ms")
+
+    print(f"\n🐢 Slowest themes:")
+    slowest = sorted(results, key=lambda r: -r['timings'].get('total', 0.0))[:top]
+    for result in slowest:
+        print(f"  {result['theme']:<28} {result['timings'].get('total', 0.0) * 1000:8.1f} ms")
+
+
+def main():
+    load_emitters()
+
+    parser = argparse.ArgumentParser(
+        description='Convert every theme in the repository with the registered emitters',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument('-t', '--target', action='append', dest='targets',
+                        help='Target to emit (repeatable, default: all registered targets)')
+    parser.add_argument('-o', '--output', type=Path, default=Path('build/converted'),
+                        help='Output directory (default: build/converted)')
+    parser.add_argument('--themes-dir', type=Path, default=THEMES_DIR, help='Directory with scheme XML files')
+    parser.add_argument('--only', action='append', help='Convert only this scheme stem (repeatable)')
+    parser.add_argument('-j', '--workers', type=int, default=None, help='Worker processes (default: CPU count)')
+    parser.add_argument('--force', action='store_true', help='Ignore the manifest and reconvert everything')
+    parser.add_argument('--resume', action='store_true',
+                        help='Continue an interrupted run, skipping themes its journal lists as done')
+    parser.add_argument('--timeout', type=float, default=DEFAULT_TIMEOUT,
+                        help=f'Seconds one theme may take before its worker is killed (default: {DEFAULT_TIMEOUT:g}, 0 = none)')
+    parser.add_argument('--max-memory', type=int, metavar='MB', help='Address space limit per worker process')
+    parser.add_argument('--profile', action='store_true', help='Print per-stage timings')
+    add_progress_arguments(parser)
+    parser.add_argument('--list-targets', action='store_true', help='List registered targets and exit')
+    add_logging_arguments(parser)
+
+    args = parser.parse_args()
+    configure_from_args(args)
+
+    if args.list_targets:
+        for name in sorted(load_emitters()):
+            emitter = get_emitter(name)
+            source = '' if emitter.source == SCHEME_SOURCE else f" (from {emitter.source})"
+            print(f"{name:<10} {emitter.description}{source}")
+        return 0
+
+    targets = args.targets or sorted(load_emitters())
+    try:
+        for name in targets:
+            get_emitter(name)
+    except KeyError as e:
+        print(f"❌ {e.args[0]}")
+        return 1
+
+    jobs = discover_jobs(args.themes_dir, args.only)
+    if not jobs:
+        print("❌ No schemes found!")
+        return 1
+
+    started = time.perf_counter()
+    results = run_batch(jobs, targets, args.output, args.workers, args.force, (args.verbose, args.log_json),
+                        args.resume, args.timeout or None, args.max_memory,
+                        Progress(args.progress, args.progress_interval))
+    elapsed = time.perf_counter() - started
+
+    failed = [r for r in results if r['status'] in ('failed', 'partial')]
+    cached = sum(1 for r in results if r['status'] == 'cached')
+    resumed = sum(1 for r in results if r['status'] == 'resumed')
+    print(f"✅ {len(results) - len(failed)}/{len(results)} themes converted to {', '.join(targets)} "
+          f"in {elapsed:.2f}s ({cached} unchanged{f', {resumed} from the journal' if resumed else ''})")
+    for result in failed:
+        for stage, error in result['errors'].items():
+            print(f"❌ {result['theme']} [{stage}]: {error}")
+
+    if args.profile:
+        print_profile(results)
+
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    exit(main())
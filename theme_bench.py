@@ -0,0 +1,311 @@
+#!/usr/bin/env python3
+"""
+Synthetic large inputs and a scaling benchmark for the converters.
+
+The real schemes stop at about 140 KB, which hides costs that grow faster than the
+input. This generates valid inputs of any size, derived from a real scheme so that every
+converter accepts them:
+
+    scheme XML      the template's options plus N attributes, each chained through
+                    baseAttributes to the previous ones (up to --chain deep), and N/4 colors
+    theme.json      N ui keys spread over nested component sections, N/8 named colors
+    Sublime scheme  N rules over a scope vocabulary and N/4 color variables
+
+and times each stage (parsing, Zed/Sublime/Fleet conversion, palette extraction, rule
+compaction, attribute resolution) at doubling sizes. The exponent of a least-squares fit
+of log(time) over log(size) is reported per stage; stages above --threshold (default 1.25)
+are flagged as superlinear.
+
+Usage:
+    python3 theme_bench.py                                  # 1k .. 16k
+    python3 theme_bench.py --sizes 1000 10000 100000 --stage parse --stage zed
+    python3 theme_bench.py --write build/synthetic --sizes 50000
+"""
+
+import argparse
+import math
+import random
+import sys
+import time
+import xml.etree.ElementTree as ET
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from theme_common import THEMES_DIR, dump_json, load_json, parse_scheme_data, write_text
+from theme_log import add_logging_arguments, configure_from_args, get_logger
+
+log = get_logger('bench')
+
+DEFAULT_TEMPLATE = 'gruvbox'
+DEFAULT_SIZES = [1000, 2000, 4000, 8000, 16000]
+DEFAULT_THRESHOLD = 1.25
+# Seconds; a stage slower than this at one size is skipped at the larger ones
+DEFAULT_BUDGET = 10.0
+
+SCOPE_ROOTS = ('keyword', 'storage', 'string', 'constant', 'entity.name', 'variable', 'support', 'meta',
+               'comment', 'punctuation', 'markup', 'source.python', 'source.js', 'text.html')
+
+
+def _color(rng: random.Random) -> str:
+    return f'{rng.randrange(0x1000000):06x}'
+
+
+def synthetic_scheme(template: ET.Element, size: int, chain: int = 8, seed: int = 0) -> str:
+    """Scheme XML: the template plus `size` attributes in baseAttributes chains and size/4 colors."""
+    rng = random.Random(seed)
+    root = ET.fromstring(ET.tostring(template))
+    colors = root.find('colors')
+    if colors is None:
+        colors = ET.SubElement(root, 'colors')
+    for index in range(size // 4):
+        ET.SubElement(colors, 'option', {'name': f'SYNTHETIC_COLOR_{index}', 'value': _color(rng)})
+
+    attributes = root.find('attributes')
+    if attributes is None:
+        attributes = ET.SubElement(root, 'attributes')
+    names = [option.get('name') for option in attributes.findall('option')]
+    for index in range(size):
+        name = f'SYNTHETIC_{index}'
+        option = ET.SubElement(attributes, 'option', {'name': name})
+        if index % chain:
+            # Most attributes only inherit: the chain depth is what resolve_attribute walks
+            option.set('baseAttributes', f'SYNTHETIC_{index - 1}')
+        elif names and rng.random() < 0.5:
+            # Chain heads either inherit from a real attribute or define their own values
+            option.set('baseAttributes', rng.choice(names))
+        else:
+            value = ET.SubElement(option, 'value')
+            ET.SubElement(value, 'option', {'name': 'FOREGROUND', 'value': _color(rng)})
+            if rng.random() < 0.3:
+                ET.SubElement(value, 'option', {'name': 'FONT_TYPE', 'value': str(rng.randrange(1, 4))})
+    return ET.tostring(root, encoding='unicode')
+
+
+def synthetic_theme_json(template: Dict[str, Any], size: int, seed: int = 0) -> Dict[str, Any]:
+    """theme.json: the template plus `size` ui keys and size/8 named colors."""
+    rng = random.Random(seed)
+    theme = dict(template)
+    named = {f'synthetic{index}': f'#{_color(rng)}' for index in range(size // 8)}
+    theme['colors'] = {**template.get('colors', {}), **named}
+    ui = dict(template.get('ui', {}))
+    for index in range(size):
+        component = ui.setdefault(f'Synthetic{index % 64}', {})
+        # Every fourth value names a color instead of spelling it out
+        component[f'key{index}'] = rng.choice(list(named)) if named and index % 4 == 0 else f'#{_color(rng)}'
+    theme['ui'] = ui
+    return theme
+
+
+def synthetic_sublime(size: int, seed: int = 0) -> Dict[str, Any]:
+    """Sublime color scheme with `size` rules and size/4 variables."""
+    rng = random.Random(seed)
+    variables = {'textcolor': f'#{_color(rng)}', 'background': f'#{_color(rng)}',
+                 'selection_background': f'#{_color(rng)}', 'line_highlight_color': f'#{_color(rng)}'}
+    variables.update({f'synthetic_{index}': f'#{_color(rng)}' for index in range(size // 4)})
+    names = list(variables)
+    rules = []
+    for index in range(size):
+        scopes = [f'{rng.choice(SCOPE_ROOTS)}.synthetic{rng.randrange(size)}' for _ in range(rng.randrange(1, 4))]
+        rule = {'name': f'rule {index}', 'scope': ', '.join(scopes), 'foreground': f'var({rng.choice(names)})'}
+        if rng.random() < 0.2:
+            rule['background'] = f'#{_color(rng)}'
+        rules.append(rule)
+    return {
+        'name': f'Synthetic {size}',
+        'variables': variables,
+        'globals': {'background': 'var(background)', 'foreground': 'var(textcolor)',
+                    'selection': 'var(selection_background)', 'line_highlight': 'var(line_highlight_color)'},
+        'rules': rules,
+    }
+
+
+class Inputs:
+    """Synthetic inputs of one size, generated once and shared by the stages."""
+
+    def __init__(self, template_xml: ET.Element, template_json: Dict[str, Any], size: int, chain: int):
+        self.size = size
+        self.scheme_xml = synthetic_scheme(template_xml, size, chain)
+        self.theme_json = synthetic_theme_json(template_json, size)
+        self.sublime = synthetic_sublime(size)
+        self.scheme = parse_scheme_data(self.scheme_xml)
+
+
+def _stage_zed(inputs: Inputs) -> None:
+    from intellij_to_zed import IntelliJToZedConverter
+    IntelliJToZedConverter().convert_scheme(inputs.scheme, 'Synthetic', 'bench', inputs.theme_json)
+
+
+def _stage_sublime(inputs: Inputs) -> None:
+    from intellij_to_sublime_json import IntelliJToSublimeJSONConverter
+    converter = IntelliJToSublimeJSONConverter()
+    converter.create_sublime_json_theme(*converter.extract_scheme(inputs.scheme))
+
+
+def _stage_fleet(inputs: Inputs) -> None:
+    from sublime_to_fleet import SublimeToFleetConverter
+    SublimeToFleetConverter(palette_threshold=0).convert(inputs.sublime)
+
+
+def _stage_palette(inputs: Inputs) -> None:
+    from theme_palette import compact_sublime
+    compact_sublime(inputs.sublime)
+
+
+def _stage_rules(inputs: Inputs) -> None:
+    from sublime_rules import compact_rules
+    compact_rules(inputs.sublime)
+
+
+def _stage_resolve(inputs: Inputs) -> None:
+    for name in inputs.scheme.attributes:
+        inputs.scheme.resolve_attribute(name)
+
+
+STAGES: Dict[str, Callable[[Inputs], None]] = {
+    'parse': lambda inputs: parse_scheme_data(inputs.scheme_xml),
+    'resolve': _stage_resolve,
+    'zed': _stage_zed,
+    'sublime': _stage_sublime,
+    'fleet': _stage_fleet,
+    'palette': _stage_palette,
+    'rules': _stage_rules,
+}
+
+
+def time_stage(stage: Callable[[Inputs], None], inputs: Inputs, repeat: int) -> float:
+    """Best wall time of `repeat` runs, in seconds."""
+    best = math.inf
+    for _ in range(repeat):
+        start = time.perf_counter()
+        stage(inputs)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def scaling_exponent(sizes: List[int], seconds: List[float]) -> Optional[float]:
+    """Slope of the least-squares line through (log size, log time); 1.0 is linear."""
+    points = [(math.log(size), math.log(max(value, 1e-9))) for size, value in zip(sizes, seconds)]
+    if len(points) < 2:
+        return None
+    mean_x = sum(x for x, _ in points) / len(points)
+    mean_y = sum(y for _, y in points) / len(points)
+    variance = sum((x - mean_x) ** 2 for x, _ in points)
+    if not variance:
+        return None
+    return sum((x - mean_x) * (y - mean_y) for x, y in points) / variance
+
+
+def _templates(themes_dir: Path, template: str) -> Tuple[ET.Element, Dict[str, Any]]:
+    template_xml = ET.parse(themes_dir / f'{template}.xml').getroot()
+    template_json_path = themes_dir / f'{template}.theme.json'
+    return template_xml, load_json(template_json_path) if template_json_path.exists() else {}
+
+
+def run_benchmark(sizes: List[int], stages: List[str], template: str = DEFAULT_TEMPLATE,
+                  themes_dir: Path = THEMES_DIR, chain: int = 8, repeat: int = 3, budget: float = DEFAULT_BUDGET,
+                  on_timing: Optional[Callable[[str, int, float], None]] = None) -> Dict[str, Dict[str, Any]]:
+    """stage -> {'sizes': [...], 'seconds': [...], 'exponent': float}.
+
+    A stage that took longer than `budget` seconds is not run at the larger sizes.
+    """
+    template_xml, template_json = _templates(themes_dir, template)
+    results: Dict[str, Dict[str, Any]] = {stage: {'sizes': [], 'seconds': []} for stage in stages}
+    for index, size in enumerate(sizes):
+        inputs = Inputs(template_xml, template_json, size, chain)
+        for stage in stages:
+            result = results[stage]
+            if result['seconds'] and result['seconds'][-1] > budget:
+                continue
+            if index == 0:
+                # Imports and first-call setup are not part of the scaling curve
+                STAGES[stage](inputs)
+            seconds = time_stage(STAGES[stage], inputs, repeat)
+            result['sizes'].append(size)
+            result['seconds'].append(seconds)
+            log.info('stage_timed', stage=stage, size=size, seconds=round(seconds, 6))
+            if on_timing is not None:
+                on_timing(stage, size, seconds)
+    for result in results.values():
+        result['exponent'] = scaling_exponent(result['sizes'], result['seconds'])
+    return results
+
+
+def write_inputs(out_dir: Path, sizes: List[int], template: str, themes_dir: Path, chain: int) -> List[Path]:
+    template_xml, template_json = _templates(themes_dir, template)
+    written = []
+    for size in sizes:
+        stem = f'synthetic{size}'
+        theme_json = synthetic_theme_json(template_json, size)
+        theme_json.update(name=f'Synthetic {size}', editorScheme=f'/themes/{stem}.xml')
+        files = {
+            f'{stem}.xml': synthetic_scheme(template_xml, size, chain),
+            f'{stem}.theme.json': dump_json(theme_json, 2),
+            f'{stem}.sublime-color-scheme': dump_json(synthetic_sublime(size), 4),
+        }
+        for name, text in files.items():
+            write_text(out_dir / name, text)
+            written.append(out_dir / name)
+    return written
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Generate large synthetic themes and check how the converters scale with input size',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES,
+                        help=f'Attributes / rules per input (default: {" ".join(map(str, DEFAULT_SIZES))})')
+    parser.add_argument('--stage', action='append', choices=sorted(STAGES),
+                        help='Benchmark only this stage (repeatable, default: all)')
+    parser.add_argument('--template', default=DEFAULT_TEMPLATE, help='Scheme stem the synthetic inputs extend')
+    parser.add_argument('--themes-dir', type=Path, default=THEMES_DIR, help='Directory with scheme XML files')
+    parser.add_argument('--chain', type=int, default=8, help='baseAttributes chain length (default: 8)')
+    parser.add_argument('--repeat', type=int, default=3, help='Runs per measurement, the best counts (default: 3)')
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                        help=f'Flag stages whose fitted exponent exceeds this (default: {DEFAULT_THRESHOLD})')
+    parser.add_argument('--budget', type=float, default=DEFAULT_BUDGET,
+                        help=f'Stop growing a stage once one run takes longer than this (default: {DEFAULT_BUDGET}s)')
+    parser.add_argument('--write', type=Path, metavar='DIR', help='Only write the synthetic inputs to DIR')
+    parser.add_argument('--json', type=Path, help='Write the timings as JSON')
+    add_logging_arguments(parser)
+
+    args = parser.parse_args()
+    configure_from_args(args)
+
+    sizes = sorted(set(args.sizes))
+    if args.write:
+        written = write_inputs(args.write, sizes, args.template, args.themes_dir, args.chain)
+        print(f"✅ Wrote {len(written)} synthetic inputs -> {args.write}")
+        return 0
+
+    def show(stage: str, size: int, seconds: float):
+        print(f"  ⏱️  {stage:<8} {size:>7}  {seconds * 1000:9.1f} ms", flush=True)
+
+    stages = args.stage or list(STAGES)
+    results = run_benchmark(sizes, stages, args.template, args.themes_dir, args.chain, args.repeat, args.budget,
+                            on_timing=show)
+
+    print(f"\n{'Stage':<10}" + ''.join(f'{size:>10}' for size in sizes) + f"{'exponent':>10}")
+    superlinear = []
+    for stage, result in results.items():
+        exponent = result['exponent']
+        flag = ''
+        if exponent is not None and exponent > args.threshold:
+            superlinear.append(stage)
+            flag = '  ⚠️  superlinear'
+        timings = dict(zip(result['sizes'], result['seconds']))
+        print(f"{stage:<10}" + ''.join(f'{timings[size] * 1000:>8.1f}ms' if size in timings else f"{'-':>10}"
+                                       for size in sizes) +
+              (f'{exponent:>10.2f}' if exponent is not None else f"{'-':>10}") + flag)
+
+    if args.json:
+        write_text(args.json, dump_json({'sizes': sizes, 'stages': results}, 2))
+    if superlinear:
+        print(f"\n⚠️  Superlinear: {', '.join(superlinear)}")
+        return 1
+    print(f"\n✅ All stages scale linearly (exponent <= {args.threshold})")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
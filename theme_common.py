@@ -0,0 +1,453 @@
+#!/usr/bin/env python3
+"""
+Shared helpers for the theme conversion scripts.
+
+Holds the pieces every converter used to carry its own copy of: IntelliJ scheme
+parsing, theme.json loading, color math and JSON output writing.
+
+Parsed inputs are cached per process and keyed by the file's size and modification
+time, so a batch run that feeds the same scheme to several targets parses it once.
+"""
+
+import gc
+import hashlib
+import json
+import multiprocessing
+import os
+import re
+import xml.etree.ElementTree as ET
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple, Union
+
+from theme_backends import json_dumps, json_loads, parse_xml
+
+PathLike = Union[str, Path]
+
+THEMES_DIR = Path(__file__).parent / 'src' / 'main' / 'resources' / 'themes'
+EXTRACTED_THEMES_DIR = Path(__file__).parent / 'extracted-themes'
+
+
+class IntelliJScheme:
+    """Parsed IntelliJ editor scheme (.icls/.xml) with raw option values."""
+
+    def __init__(self, name: Optional[str], parent_scheme: Optional[str],
+                 colors: Dict[str, str], attributes: Dict[str, Dict[str, str]]):
+        self.name = name
+        self.parent_scheme = parent_scheme
+        # <colors> section: option name -> raw value (e.g. "F6EEDB")
+        self.colors = colors
+        # <attributes> section: attribute name -> {"baseAttributes"?, "FOREGROUND", "FONT_TYPE", ...}
+        self.attributes = attributes
+
+    @classmethod
+    def from_root(cls, root: ET.Element) -> 'IntelliJScheme':
+        """Build a scheme from an already parsed <scheme> element."""
+        colors = {}
+        colors_section = root.find('colors')
+        if colors_section is not None:
+            for option in colors_section.findall('option'):
+                name = option.get('name')
+                value = option.get('value')
+                if name and value:
+                    colors[name] = value
+
+        attributes = {}
+        attributes_section = root.find('attributes')
+        if attributes_section is not None:
+            for option in attributes_section.findall('option'):
+                name = option.get('name')
+                if not name:
+                    continue
+
+                attr_dict = {}
+                base_attrs = option.get('baseAttributes')
+                if base_attrs:
+                    attr_dict['baseAttributes'] = base_attrs
+
+                value_section = option.find('value')
+                if value_section is not None:
+                    for value_option in value_section.findall('option'):
+                        attr_name = value_option.get('name')
+                        attr_value = value_option.get('value')
+                        if attr_name and attr_value:
+                            attr_dict[attr_name] = attr_value
+
+                if attr_dict:
+                    attributes[name] = attr_dict
+
+        return cls(root.get('name'), root.get('parent_scheme'), colors, attributes)
+
+    def resolve_attribute(self, name: str) -> Dict[str, str]:
+        """Return the effective values of an attribute, following baseAttributes.
+
+        Like IntelliJ, an attribute that only names a baseAttributes inherits the base's
+        values; one that defines its own values does not inherit anything.
+        """
+        seen = set()
+        attr = self.attributes.get(name)
+        while attr is not None and name not in seen:
+            seen.add(name)
+            own = {key: value for key, value in attr.items() if key != 'baseAttributes'}
+            if own or 'baseAttributes' not in attr:
+                return own
+            name = attr['baseAttributes']
+            attr = self.attributes.get(name)
+        return {}
+
+    def subtree_digests(self) -> Dict[str, str]:
+        """Content hashes of the header, <colors> and <attributes>, independent of XML layout."""
+        return {
+            'header': canonical_digest([self.name, self.parent_scheme]),
+            'colors': canonical_digest(self.colors),
+            'attributes': canonical_digest(self.attributes),
+        }
+
+    def digest(self) -> str:
+        """Content hash of the whole scheme; equal digests convert to equal outputs."""
+        return canonical_digest(self.subtree_digests())
+
+
+# Per-process cache: resolved path -> ((size, mtime_ns), parsed value)
+_file_cache: Dict[Tuple[str, str], Tuple[Tuple[int, int], Any]] = {}
+
+
+def file_signature(path: PathLike) -> Tuple[int, int]:
+    """Return (size, mtime_ns) used to key cached parses of a file."""
+    stat = os.stat(path)
+    return stat.st_size, stat.st_mtime_ns
+
+
+def cached_load(kind: str, path: PathLike, loader: Callable[[Path], Any], depends: Iterable[PathLike] = ()) -> Any:
+    """Load a file through `loader`, reusing the previous result while the file is unchanged.
+
+    `depends` lists other files the result is built from (e.g. parent themes); a change to
+    any of them also invalidates it.
+    """
+    path = Path(path)
+    key = (kind, str(path.resolve()))
+    signature = file_signature(path)
+    if depends:
+        signature = (signature,) + tuple(file_signature(dependency) for dependency in depends)
+    cached = _file_cache.get(key)
+    if cached is not None and cached[0] == signature:
+        return cached[1]
+    value = loader(path)
+    _file_cache[key] = (signature, value)
+    return value
+
+
+def clear_cache() -> None:
+    """Drop every cached parse."""
+    _file_cache.clear()
+
+
+def canonical_digest(data: Any) -> str:
+    """sha1 of the canonical JSON form of `data` (sorted keys, no whitespace)."""
+    text = json_dumps(data, sort_keys=True, compact=True)
+    return hashlib.sha1(text.encode('utf-8')).hexdigest()
+
+
+def parse_scheme_data(data: Union[str, bytes]) -> IntelliJScheme:
+    """Parse scheme XML that is already in memory (git revision, archive entry)."""
+    try:
+        return IntelliJScheme.from_root(parse_xml(data))
+    except ET.ParseError as e:
+        raise ValueError(f"Error parsing IntelliJ theme XML: {e}")
+
+
+def parse_json_data(data: Union[str, bytes]) -> Dict[str, Any]:
+    """Parse JSON that is already in memory (git revision, archive entry)."""
+    try:
+        return json_loads(data)
+    except json.JSONDecodeError as e:
+        raise ValueError(f"Error parsing JSON: {e}")
+
+
+def _parse_scheme(path: Path) -> IntelliJScheme:
+    try:
+        return IntelliJScheme.from_root(parse_xml(path.read_bytes()))
+    except ET.ParseError as e:
+        raise ValueError(f"Error parsing IntelliJ theme XML: {e}")
+    except OSError as e:
+        raise ValueError(f"Error loading IntelliJ theme: {e}")
+
+
+def _parse_json(path: Path) -> Dict[str, Any]:
+    try:
+        with open(path, 'rb') as f:
+            return json_loads(f.read())
+    except json.JSONDecodeError as e:
+        raise ValueError(f"Error parsing JSON file {path}: {e}")
+    except OSError as e:
+        raise ValueError(f"Error loading JSON file {path}: {e}")
+
+
+# <option name="KEY" value="VALUE" />, wherever it appears in a scheme file
+_OPTION_VALUE_RE = re.compile(r'<option\s+name="([^"]+)"\s+value="([^"]+)"')
+
+
+def _scan_option_values(path: Path) -> Dict[str, str]:
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            content = f.read()
+    except OSError as e:
+        raise ValueError(f"Error loading IntelliJ theme: {e}")
+    values: Dict[str, str] = {}
+    for name, value in _OPTION_VALUE_RE.findall(content):
+        values.setdefault(name, value)
+    return values
+
+
+def load_scheme(path: PathLike) -> IntelliJScheme:
+    """Load an IntelliJ scheme file. The result is shared, treat it as read-only."""
+    return cached_load('scheme', path, _parse_scheme)
+
+
+def load_option_values(path: PathLike) -> Dict[str, str]:
+    """Every <option name=... value=...> of a scheme file, first occurrence wins.
+
+    One read and one regex scan per file change, without building the XML tree; enough
+    for scripts that only need a few <colors> options. Treat the result as read-only.
+    """
+    return cached_load('option-values', path, _scan_option_values)
+
+
+def load_json(path: PathLike) -> Dict[str, Any]:
+    """Load a JSON file (theme.json, sublime-color-scheme). The result is shared, treat it as read-only."""
+    return cached_load('json', path, _parse_json)
+
+
+# --- Color math -------------------------------------------------------------
+
+def hex_to_rgb(hex_color: str) -> Tuple[int, int, int]:
+    """Convert '#RRGGBB' / 'RRGGBB' (alpha ignored) to an (r, g, b) tuple."""
+    hex_color = hex_color.lstrip('#')
+    return int(hex_color[0:2], 16), int(hex_color[2:4], 16), int(hex_color[4:6], 16)
+
+
+def parse_hex_rgba(value: Optional[str]) -> Optional[Tuple[int, int, int, int]]:
+    """Parse 'RGB', 'RRGGBB' or 'RRGGBBAA' (with or without '#') into (r, g, b, a); None if invalid."""
+    if not value:
+        return None
+    value = value.strip().lstrip('#')
+    if len(value) == 3:
+        value = ''.join(c * 2 for c in value)
+    if len(value) not in (6, 8):
+        return None
+    try:
+        packed = int(value, 16)
+    except ValueError:
+        return None
+    if len(value) == 6:
+        return packed >> 16, (packed >> 8) & 0xFF, packed & 0xFF, 255
+    return packed >> 24, (packed >> 16) & 0xFF, (packed >> 8) & 0xFF, packed & 0xFF
+
+
+def parse_scheme_rgba(value: Optional[str]) -> Optional[Tuple[int, int, int, int]]:
+    """Parse a color value of a scheme XML file into (r, g, b, a); None if invalid.
+
+    Unlike CSS, IntelliJ writes the number without leading zeros: '32c4f' is #032C4F and
+    'fff' is #000FFF. Use parse_hex_rgba for theme.json and Sublime values.
+    """
+    if not value:
+        return None
+    value = value.strip().lstrip('#')
+    if 0 < len(value) < 6:
+        value = value.zfill(6)
+    return parse_hex_rgba(value)
+
+
+def srgb_to_linear(channel: float) -> float:
+    """Linearize one sRGB channel in the 0..1 range (WCAG 2.x formula)."""
+    return channel / 12.92 if channel <= 0.03928 else ((channel + 0.055) / 1.055) ** 2.4
+
+
+# Linearized value of every 8-bit channel, so luminance is three lookups and a dot product
+LINEAR_CHANNEL = tuple(srgb_to_linear(c / 255) for c in range(256))
+
+
+def luminance_rgb(r: int, g: int, b: int) -> float:
+    """WCAG relative luminance of 8-bit channels."""
+    return 0.2126 * LINEAR_CHANNEL[r] + 0.7152 * LINEAR_CHANNEL[g] + 0.0722 * LINEAR_CHANNEL[b]
+
+
+def relative_luminance(hex_color: str) -> float:
+    """WCAG relative luminance of a hex color (0.0 = black, 1.0 = white)."""
+    return luminance_rgb(*hex_to_rgb(hex_color))
+
+
+def contrast_ratio(luminance_a: float, luminance_b: float) -> float:
+    """WCAG contrast ratio between two relative luminances (1.0 .. 21.0)."""
+    lighter, darker = max(luminance_a, luminance_b), min(luminance_a, luminance_b)
+    return (lighter + 0.05) / (darker + 0.05)
+
+
+def composite(fg: Tuple[int, int, int, int], bg: Tuple[int, int, int, int]) -> Tuple[int, int, int, int]:
+    """Alpha-blend `fg` over an opaque `bg`."""
+    alpha = fg[3] / 255
+    return (round(fg[0] * alpha + bg[0] * (1 - alpha)),
+            round(fg[1] * alpha + bg[1] * (1 - alpha)),
+            round(fg[2] * alpha + bg[2] * (1 - alpha)),
+            255)
+
+
+# D65 reference white for XYZ -> CIELAB
+_LAB_WHITE = (0.95047, 1.0, 1.08883)
+
+
+def _lab_f(t: float) -> float:
+    return t ** (1 / 3) if t > 216 / 24389 else (24389 / 27 * t + 16) / 116
+
+
+def rgb_to_lab(r: int, g: int, b: int) -> Tuple[float, float, float]:
+    """Convert 8-bit sRGB channels to CIELAB (D65)."""
+    lr, lg, lb = LINEAR_CHANNEL[r], LINEAR_CHANNEL[g], LINEAR_CHANNEL[b]
+    x = (0.4124 * lr + 0.3576 * lg + 0.1805 * lb) / _LAB_WHITE[0]
+    y = (0.2126 * lr + 0.7152 * lg + 0.0722 * lb) / _LAB_WHITE[1]
+    z = (0.0193 * lr + 0.1192 * lg + 0.9505 * lb) / _LAB_WHITE[2]
+    fx, fy, fz = _lab_f(x), _lab_f(y), _lab_f(z)
+    return 116 * fy - 16, 500 * (fx - fy), 200 * (fy - fz)
+
+
+def delta_e(lab_a: Tuple[float, float, float], lab_b: Tuple[float, float, float]) -> float:
+    """CIE76 color difference; about 2.3 is a just noticeable difference."""
+    return ((lab_a[0] - lab_b[0]) ** 2 + (lab_a[1] - lab_b[1]) ** 2 + (lab_a[2] - lab_b[2]) ** 2) ** 0.5
+
+
+def adjust_brightness(hex_color: str, factor: float) -> str:
+    """Adjust brightness of a color by a factor (0.0 = black, 1.0 = original, >1.0 = brighter)."""
+    try:
+        r, g, b = hex_to_rgb(hex_color)
+        r = max(0, min(255, int(r * factor)))
+        g = max(0, min(255, int(g * factor)))
+        b = max(0, min(255, int(b * factor)))
+        return f'#{r:02X}{g:02X}{b:02X}'
+    except (ValueError, TypeError):
+        return f"#{hex_color.lstrip('#')}"
+
+
+def adjust_saturation(hex_color: str, factor: float) -> str:
+    """Adjust saturation of a color (0.0 = grayscale, 1.0 = original, >1.0 = more saturated)."""
+    try:
+        hex_color = hex_color.lstrip('#')
+        r, g, b = (c / 255.0 for c in hex_to_rgb(hex_color))
+
+        max_val = max(r, g, b)
+        min_val = min(r, g, b)
+        if max_val == min_val:  # Grayscale
+            return f'#{hex_color}'
+
+        luminance = (max_val + min_val) / 2
+        r = max(0, min(1, luminance + (r - luminance) * factor))
+        g = max(0, min(1, luminance + (g - luminance) * factor))
+        b = max(0, min(1, luminance + (b - luminance) * factor))
+
+        return f'#{int(r * 255):02X}{int(g * 255):02X}{int(b * 255):02X}'
+    except (ValueError, TypeError):
+        return f"#{hex_color.lstrip('#')}"
+
+
+def add_alpha(hex_color: str, alpha: float) -> str:
+    """Add alpha channel to a hex color (alpha: 0.0-1.0)."""
+    if not hex_color.startswith('#'):
+        hex_color = f'#{hex_color}'
+    alpha = max(0.0, min(1.0, alpha))
+    return f'{hex_color}{int(alpha * 255):02X}'
+
+
+# --- Output -----------------------------------------------------------------
+
+def dump_json(data: Any, indent: Optional[int] = 2) -> str:
+    """Serialize output the way every converter writes it."""
+    return json_dumps(data, indent=indent)
+
+
+def write_text(path: PathLike, text: str) -> bool:
+    """Write `text` to `path`, leaving the file untouched if it already has that content.
+
+    Returns True when the file was (re)written.
+    """
+    path = Path(path)
+    try:
+        if path.read_text(encoding='utf-8') == text:
+            return False
+    except (OSError, UnicodeDecodeError):
+        pass
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(f'.{path.name}.tmp')
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        f.write(text)
+    os.replace(tmp_path, path)
+    return True
+
+
+def write_bytes(path: PathLike, data: bytes) -> bool:
+    """Binary counterpart of write_text: atomic, skipped when the content is unchanged."""
+    path = Path(path)
+    try:
+        if path.read_bytes() == data:
+            return False
+    except OSError:
+        pass
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(f'.{path.name}.tmp')
+    with open(tmp_path, 'wb') as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+    return True
+
+
+def write_json(path: PathLike, data: Any, indent: Optional[int] = 2) -> bool:
+    """Write converter output as JSON. Returns True when the file changed."""
+    return write_text(path, dump_json(data, indent))
+
+
+# --- Scheduling -------------------------------------------------------------
+
+# Workers are forked where the platform allows it, so whatever the parent loaded before
+# starting them (converters, mapping tables, parsed base themes) is shared copy-on-write
+WORKER_CONTEXT = multiprocessing.get_context('fork' if 'fork' in multiprocessing.get_all_start_methods() else None)
+FORKED_WORKERS = WORKER_CONTEXT.get_start_method() == 'fork'
+
+
+def share_with_workers(preload: Optional[Callable[[], Any]]) -> None:
+    """Run `preload` in the parent before workers are forked, then freeze it for the GC.
+
+    gc.freeze() keeps the children's collector from writing to those objects, which would
+    copy every page they are on into each worker.
+    """
+    if preload is None or not FORKED_WORKERS:
+        return
+    preload()
+    gc.freeze()
+
+
+def init_worker(preload: Optional[Callable[[], Any]], initializer: Optional[Callable], initargs: tuple) -> None:
+    """Pool initializer: `initializer(*initargs)`, plus `preload` where workers are not forked."""
+    if initializer is not None:
+        initializer(*initargs)
+    # Spawned workers start empty and build the state themselves
+    if preload is not None and not FORKED_WORKERS:
+        preload()
+
+
+def parallel_map(func: Callable[[Any], Any], items: Iterable[Any], workers: Optional[int] = None,
+                 initializer: Optional[Callable] = None, initargs: tuple = (),
+                 preload: Optional[Callable[[], Any]] = None) -> List[Any]:
+    """Map `func` over `items` on a process pool, preserving order.
+
+    Runs inline when workers == 1 or there is at most one item. `func` must be a
+    module-level function (or functools.partial of one) so it can be pickled.
+    `preload` builds state the workers share (see share_with_workers).
+    """
+    items = list(items)
+    if workers == 1 or len(items) <= 1:
+        return [func(item) for item in items]
+
+    workers = min(workers or os.cpu_count() or 1, len(items))
+    chunksize = max(1, len(items) // (workers * 4))
+    share_with_workers(preload)
+    with ProcessPoolExecutor(max_workers=workers, mp_context=WORKER_CONTEXT, initializer=init_worker,
+                             initargs=(preload, initializer, initargs)) as pool:
+        return list(pool.map(func, items, chunksize=chunksize))
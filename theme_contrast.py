@@ -0,0 +1,211 @@
+#!/usr/bin/env python3
+"""
+Contrast / accessibility audit for the editor schemes.
+
+For every scheme, collects the foreground/background pairs the editor actually
+renders and computes their WCAG 2.x contrast ratio:
+
+    syntax     every attribute's foreground on its own background, or on TEXT's
+               background (CONSOLE_* attributes on CONSOLE_BACKGROUND_KEY)
+    selection  TEXT (or SELECTION_FOREGROUND) and DEFAULT_* syntax colors on SELECTION_BACKGROUND
+    caret_row  TEXT and DEFAULT_* syntax colors on CARET_ROW_COLOR
+    gutter     line numbers on the gutter background
+
+Luminance is computed once per distinct color of a theme (channel lookup table from
+theme_common), then all ratios of the theme in one pass. Themes run in parallel.
+
+Usage:
+    python3 theme_contrast.py                         # text report for all schemes
+    python3 theme_contrast.py --only gruvbox --show 20
+    python3 theme_contrast.py --json contrast.json --fail-under 3.0
+"""
+
+import argparse
+import json
+import sys
+from functools import partial
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from theme_batch import discover_jobs
+from theme_common import (THEMES_DIR, IntelliJScheme, composite, contrast_ratio, load_scheme,
+                          luminance_rgb, parallel_map, parse_scheme_rgba)
+from theme_emitters import ThemeJob
+from theme_log import add_logging_arguments, configure_from_args, get_logger
+
+log = get_logger('contrast')
+
+# WCAG 2.x thresholds for normal-size text
+AA_LARGE = 3.0
+AA = 4.5
+AAA = 7.0
+
+RGBA = Tuple[int, int, int, int]
+
+
+def wcag_level(ratio: float) -> str:
+    if ratio >= AAA:
+        return 'AAA'
+    if ratio >= AA:
+        return 'AA'
+    if ratio >= AA_LARGE:
+        return 'AA-large'
+    return 'fail'
+
+
+def collect_pairs(scheme: IntelliJScheme) -> List[Tuple[str, str, RGBA, RGBA]]:
+    """Return (category, label, foreground, background) for every rendered pair.
+
+    Raises ValueError if the scheme has no parseable TEXT foreground and background.
+    """
+    text = scheme.resolve_attribute('TEXT')
+    text_bg = parse_scheme_rgba(text.get('BACKGROUND')) or parse_scheme_rgba(scheme.colors.get('BACKGROUND'))
+    text_fg = parse_scheme_rgba(text.get('FOREGROUND')) or parse_scheme_rgba(scheme.colors.get('FOREGROUND'))
+    if text_bg is None or text_fg is None:
+        raise ValueError(f"TEXT has no parseable FOREGROUND/BACKGROUND "
+                         f"({text.get('FOREGROUND')!r}, {text.get('BACKGROUND')!r})")
+    text_bg = composite(text_bg, (255, 255, 255, 255))
+    console_bg = parse_scheme_rgba(scheme.colors.get('CONSOLE_BACKGROUND_KEY'))
+
+    def opaque(color: Optional[RGBA], under: RGBA) -> Optional[RGBA]:
+        return composite(color, under) if color is not None else None
+
+    pairs = []
+    syntax_colors = [('TEXT', text_fg)]
+    for name in scheme.attributes:
+        attr = scheme.resolve_attribute(name)
+        fg = parse_scheme_rgba(attr.get('FOREGROUND'))
+        if fg is None:
+            continue
+        under = opaque(console_bg, text_bg) if name.startswith('CONSOLE_') and console_bg else text_bg
+        bg = opaque(parse_scheme_rgba(attr.get('BACKGROUND')), under) or under
+        pairs.append(('syntax', name, composite(fg, bg), bg))
+        if name.startswith('DEFAULT_') and name != 'TEXT':
+            syntax_colors.append((name, fg))
+
+    selection_bg = opaque(parse_scheme_rgba(scheme.colors.get('SELECTION_BACKGROUND')), text_bg)
+    if selection_bg is not None:
+        selection_fg = parse_scheme_rgba(scheme.colors.get('SELECTION_FOREGROUND'))
+        if selection_fg is not None:
+            pairs.append(('selection', 'SELECTION_FOREGROUND', composite(selection_fg, selection_bg), selection_bg))
+        else:
+            for name, fg in syntax_colors:
+                pairs.append(('selection', name, composite(fg, selection_bg), selection_bg))
+
+    caret_row_bg = opaque(parse_scheme_rgba(scheme.colors.get('CARET_ROW_COLOR')), text_bg)
+    if caret_row_bg is not None:
+        for name, fg in syntax_colors:
+            pairs.append(('caret_row', name, composite(fg, caret_row_bg), caret_row_bg))
+
+    gutter_bg = opaque(parse_scheme_rgba(scheme.colors.get('GUTTER_BACKGROUND')), text_bg) or text_bg
+    for name in ('LINE_NUMBERS_COLOR', 'LINE_NUMBER_ON_CARET_ROW_COLOR'):
+        fg = parse_scheme_rgba(scheme.colors.get(name))
+        if fg is not None:
+            pairs.append(('gutter', name, composite(fg, gutter_bg), gutter_bg))
+
+    return pairs
+
+
+def analyze_job(job: ThemeJob, threshold: float = AA) -> Dict[str, Any]:
+    """Compute the contrast report of one scheme. Runs inside a worker process."""
+    try:
+        scheme = load_scheme(job.scheme_path)
+        pairs = collect_pairs(scheme)
+    except ValueError as e:
+        return {'theme': job.stem, 'error': str(e)}
+
+    # Luminance once per distinct color, then every ratio in a single pass
+    luminance = {color: luminance_rgb(*color[:3]) for color in {c for pair in pairs for c in pair[2:]}}
+    ratios = [contrast_ratio(luminance[fg], luminance[bg]) for _, _, fg, bg in pairs]
+
+    counts = {'fail': 0, 'AA-large': 0, 'AA': 0, 'AAA': 0}
+    below = []
+    for (category, label, fg, bg), ratio in zip(pairs, ratios):
+        counts[wcag_level(ratio)] += 1
+        if ratio < threshold:
+            below.append({
+                'category': category,
+                'attribute': label,
+                'foreground': '#%02X%02X%02X' % fg[:3],
+                'background': '#%02X%02X%02X' % bg[:3],
+                'ratio': round(ratio, 2),
+            })
+    below.sort(key=lambda entry: entry['ratio'])
+
+    theme_json = job.theme_json or {}
+    return {
+        'theme': job.stem,
+        'name': scheme.name,
+        'dark': theme_json.get('dark'),
+        'pairs': len(pairs),
+        # Unrounded, so --fail-under 4.5 fails a 4.496 pair; rounded only when printed
+        'min_ratio': min(ratios) if ratios else None,
+        'levels': counts,
+        'below_threshold': below,
+    }
+
+
+def analyze_corpus(jobs: List[ThemeJob], threshold: float = AA, workers: Optional[int] = None) -> List[Dict[str, Any]]:
+    return parallel_map(partial(analyze_job, threshold=threshold), jobs, workers)
+
+
+def print_report(reports: List[Dict[str, Any]], threshold: float, show: int) -> None:
+    ordered = sorted(reports, key=lambda r: (r.get('min_ratio') is None, r.get('min_ratio') or 0))
+    print(f"{'Theme':<26} {'pairs':>5} {'min':>6} {'fail':>5} {'AA-lg':>5} {'AA':>5} {'AAA':>5}  < {threshold}")
+    for report in ordered:
+        if 'error' in report:
+            print(f"{report['theme']:<26} ❌ {report['error']}")
+            continue
+        levels = report['levels']
+        min_ratio = f"{report['min_ratio']:.2f}" if report['min_ratio'] is not None else '-'
+        print(f"{report['theme']:<26} {report['pairs']:>5} {min_ratio:>6} {levels['fail']:>5} "
+              f"{levels['AA-large']:>5} {levels['AA']:>5} {levels['AAA']:>5}  {len(report['below_threshold']):>3}")
+        for entry in report['below_threshold'][:show]:
+            print(f"    {entry['ratio']:>5}  {entry['category']:<9} {entry['attribute']:<40} "
+                  f"{entry['foreground']} on {entry['background']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='WCAG contrast audit of every editor scheme',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument('--themes-dir', type=Path, default=THEMES_DIR, help='Directory with scheme XML files')
+    parser.add_argument('--only', action='append', help='Audit only this scheme stem (repeatable)')
+    parser.add_argument('--threshold', type=float, default=AA,
+                        help=f'Report pairs below this ratio (default: {AA}, WCAG AA)')
+    parser.add_argument('--show', type=int, default=5, help='Pairs listed per theme in the text report')
+    parser.add_argument('--json', type=Path, help='Write the full report as JSON to this file')
+    parser.add_argument('--fail-under', type=float,
+                        help='Exit with status 1 if any pair is below this ratio')
+    parser.add_argument('-j', '--workers', type=int, default=None, help='Worker processes (default: CPU count)')
+    add_logging_arguments(parser)
+
+    args = parser.parse_args()
+    configure_from_args(args)
+
+    jobs = discover_jobs(args.themes_dir, args.only)
+    if not jobs:
+        print("❌ No schemes found!")
+        return 1
+
+    reports = analyze_corpus(jobs, args.threshold, args.workers)
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(reports, f, indent=2, ensure_ascii=False)
+        log.info('report_written', file=str(args.json), themes=len(reports))
+    print_report(reports, args.threshold, args.show)
+
+    if args.fail_under is not None:
+        # A scheme that could not be audited fails too, rather than passing unchecked
+        failing = [r['theme'] for r in reports
+                   if 'error' in r or (r.get('min_ratio') is not None and r['min_ratio'] < args.fail_under)]
+        if failing:
+            print(f"\n❌ {len(failing)} themes have pairs below {args.fail_under}: {', '.join(failing)}")
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,331 @@
+#!/usr/bin/env python3
+"""
+Columnar matrix of every theme's colors, for questions across the whole corpus.
+
+Rows are themes (one per scheme XML, with the theme.json that references it), columns
+are keys, values are colors packed as 0xRRGGBBAA:
+
+    colors.<OPTION>          scheme <colors> options
+    attr.<ATTRIBUTE>.<FIELD> attribute colors, baseAttributes resolved
+    ui.<Flat.key>            colors the theme.json declares in `ui`, named colors resolved
+
+Stored in the output directory (default build/corpus/):
+
+    index.json    rows (stem, name, dark, input signatures) and column keys
+    colors.npy    uint32 [themes x keys]
+    missing.npy   bool   [themes x keys], True where the theme does not define the key
+
+The .npy files are NumPy format 1.0 written with the standard library (array module),
+so `numpy.load(path, mmap_mode='r')` opens them directly, and CorpusMatrix.open maps
+them without copying. A rebuild only re-reads themes whose files changed.
+
+Usage:
+    python3 theme_corpus.py                                           # build / update
+    python3 theme_corpus.py --missing ui.ToolWindow.Button.hoverBackground --light
+    python3 theme_corpus.py --hue attr.DEFAULT_KEYWORD.FOREGROUND
+    python3 theme_corpus.py --values colors.CARET_ROW_COLOR
+"""
+
+import argparse
+import ast
+import colorsys
+import json
+import mmap
+import struct
+import sys
+from array import array
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from theme_common import (THEMES_DIR, PathLike, file_signature, parallel_map, parse_hex_rgba, parse_scheme_rgba,
+                          write_bytes, write_text)
+from theme_emitters import ThemeJob
+from theme_inheritance import ThemeResolver, flatten_ui
+from theme_log import add_logging_arguments, configure_from_args, get_logger
+
+log = get_logger('corpus')
+
+CORPUS_VERSION = 1
+DEFAULT_OUT_DIR = Path(__file__).parent / 'build' / 'corpus'
+
+# Attribute fields holding colors (FONT_TYPE, EFFECT_TYPE are enums)
+ATTRIBUTE_COLOR_FIELDS = ('FOREGROUND', 'BACKGROUND', 'EFFECT_COLOR', 'ERROR_STRIPE_COLOR')
+
+_NPY_MAGIC = b'\x93NUMPY\x01\x00'
+
+
+def pack_rgba(rgba: Tuple[int, int, int, int]) -> int:
+    r, g, b, a = rgba
+    return (r << 24) | (g << 16) | (b << 8) | a
+
+
+def unpack_rgba(value: int) -> Tuple[int, int, int, int]:
+    return (value >> 24) & 0xFF, (value >> 16) & 0xFF, (value >> 8) & 0xFF, value & 0xFF
+
+
+def format_packed(value: Optional[int]) -> str:
+    return '-' if value is None else f'#{value:08X}'
+
+
+# --- .npy files ---------------------------------------------------------------
+
+def encode_npy(descr: str, shape: Tuple[int, ...], data: bytes) -> bytes:
+    """NumPy format 1.0: magic, header dict padded to 64 bytes, raw little-endian data."""
+    header = f"{{'descr': '{descr}', 'fortran_order': False, 'shape': {shape!r}, }}"
+    padding = 64 - (len(_NPY_MAGIC) + 2 + len(header) + 1) % 64
+    header = header + ' ' * (padding % 64) + '\n'
+    return _NPY_MAGIC + struct.pack('<H', len(header)) + header.encode('latin1') + data
+
+
+def map_npy(path: PathLike) -> Tuple[Dict[str, Any], memoryview]:
+    """Memory-map a .npy file written by encode_npy; returns its header and a byte view of the data."""
+    with open(path, 'rb') as f:
+        mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    if mapped[:6] != _NPY_MAGIC[:6]:
+        raise ValueError(f"{path}: not a .npy file")
+    header_len = struct.unpack('<H', mapped[8:10])[0]
+    header = ast.literal_eval(mapped[10:10 + header_len].decode('latin1'))
+    return header, memoryview(mapped)[10 + header_len:]
+
+
+def _little_endian(values: array) -> bytes:
+    if sys.byteorder != 'little':
+        values = array(values.typecode, values)
+        values.byteswap()
+    return values.tobytes()
+
+
+# --- Matrix -------------------------------------------------------------------
+
+class CorpusMatrix:
+    """Themes x keys matrix of packed RGBA colors with a missing mask."""
+
+    def __init__(self, rows: List[Dict[str, Any]], keys: List[str], colors: Sequence[int], missing: Sequence[int]):
+        # rows: {"stem", "name", "dark", "signature"}
+        self.rows = rows
+        self.keys = keys
+        # Row-major, len(rows) * len(keys); array('I') / bytearray, or memoryviews of mapped files
+        self.colors = colors
+        self.missing = missing
+        self.row_index = {row['stem']: i for i, row in enumerate(rows)}
+        self.column_index = {key: i for i, key in enumerate(keys)}
+
+    @classmethod
+    def from_rows(cls, rows: List[Dict[str, Any]], values: List[Dict[str, int]]) -> 'CorpusMatrix':
+        keys = sorted({key for row_values in values for key in row_values})
+        column_index = {key: i for i, key in enumerate(keys)}
+        width = len(keys)
+        colors = array('I', bytes(4 * width * len(rows)))
+        missing = bytearray(b'\x01' * (width * len(rows)))
+        for r, row_values in enumerate(values):
+            base = r * width
+            for key, value in row_values.items():
+                colors[base + column_index[key]] = value
+                missing[base + column_index[key]] = 0
+        return cls(rows, keys, colors, missing)
+
+    @classmethod
+    def open(cls, directory: PathLike) -> Optional['CorpusMatrix']:
+        """Map a saved matrix, or None if there is none (or it is from another version)."""
+        directory = Path(directory)
+        try:
+            index = json.loads((directory / 'index.json').read_text(encoding='utf-8'))
+            if index.get('version') != CORPUS_VERSION:
+                return None
+            colors_header, colors = map_npy(directory / 'colors.npy')
+            _, missing = map_npy(directory / 'missing.npy')
+        except (OSError, ValueError, SyntaxError):
+            return None
+        shape = (len(index['rows']), len(index['keys']))
+        if tuple(colors_header['shape']) != shape or len(missing) != shape[0] * shape[1]:
+            return None
+        if sys.byteorder == 'little':
+            colors = colors.cast('I')
+        else:
+            colors = array('I', colors.tobytes())
+            colors.byteswap()
+        return cls(index['rows'], index['keys'], colors, missing)
+
+    def save(self, directory: PathLike) -> None:
+        directory = Path(directory)
+        shape = (len(self.rows), len(self.keys))
+        write_bytes(directory / 'colors.npy', encode_npy('<u4', shape, _little_endian(array('I', self.colors))))
+        write_bytes(directory / 'missing.npy', encode_npy('|b1', shape, bytes(self.missing)))
+        write_text(directory / 'index.json', json.dumps({
+            'version': CORPUS_VERSION,
+            'rows': self.rows,
+            'keys': self.keys,
+        }, indent=1))
+
+    def row_values(self, stem: str) -> Dict[str, int]:
+        """Defined keys of one theme."""
+        width = len(self.keys)
+        base = self.row_index[stem] * width
+        colors = self.colors[base:base + width]
+        missing = self.missing[base:base + width]
+        return {key: colors[i] for i, key in enumerate(self.keys) if not missing[i]}
+
+    def column(self, key: str) -> List[Optional[int]]:
+        """One key across all themes (None where missing), read as a strided slice."""
+        c = self.column_index.get(key)
+        if c is None:
+            return [None] * len(self.rows)
+        width = len(self.keys)
+        colors = self.colors[c::width]
+        missing = self.missing[c::width]
+        return [None if missing[r] else colors[r] for r in range(len(self.rows))]
+
+    def themes_missing(self, key: str, dark: Optional[bool] = None) -> List[str]:
+        return [row['stem'] for row, value in zip(self.rows, self.column(key))
+                if value is None and (dark is None or row['dark'] == dark)]
+
+
+# --- Building -----------------------------------------------------------------
+
+def job_signature(job: ThemeJob) -> List[Any]:
+    return [list(file_signature(path)) for path in job.input_paths()]
+
+
+def theme_values(job: ThemeJob) -> Dict[str, int]:
+    """Packed colors of one theme, keyed by column. Runs inside a worker process."""
+    scheme = job.scheme
+    values: Dict[str, int] = {}
+    for option, value in scheme.colors.items():
+        rgba = parse_scheme_rgba(value)
+        if rgba is not None:
+            values[f'colors.{option}'] = pack_rgba(rgba)
+    for name in scheme.attributes:
+        resolved = scheme.resolve_attribute(name)
+        for field in ATTRIBUTE_COLOR_FIELDS:
+            rgba = parse_scheme_rgba(resolved.get(field))
+            if rgba is not None:
+                values[f'attr.{name}.{field}'] = pack_rgba(rgba)
+
+    theme_json = job.theme_json
+    if theme_json:
+        resolved_theme = ThemeResolver().resolve(theme_json)
+        for key, value in flatten_ui(theme_json.get('ui') or {}).items():
+            value = resolved_theme.color(value)
+            if isinstance(value, str) and value.startswith('#'):
+                rgba = parse_hex_rgba(value)
+                if rgba is not None:
+                    values[f'ui.{key}'] = pack_rgba(rgba)
+    return values
+
+
+def _row_job(job: ThemeJob) -> Tuple[Dict[str, Any], Dict[str, int]]:
+    theme_json = job.theme_json or {}
+    row = {
+        'stem': job.stem,
+        'name': theme_json.get('name') or job.scheme.name,
+        'dark': bool(theme_json.get('dark', False)),
+        'signature': job_signature(job),
+    }
+    try:
+        return row, theme_values(job)
+    except ValueError as e:
+        log.warning('theme_unreadable', theme=job.stem, error=str(e))
+        return row, {}
+
+
+def build_corpus(themes_dir: PathLike = THEMES_DIR, out_dir: Optional[PathLike] = DEFAULT_OUT_DIR,
+                 workers: Optional[int] = None) -> Tuple[CorpusMatrix, int]:
+    """Build or update the matrix; returns it and the number of themes that were (re)read."""
+    from theme_batch import discover_jobs
+
+    jobs = discover_jobs(Path(themes_dir))
+    previous = CorpusMatrix.open(out_dir) if out_dir is not None else None
+
+    rows: List[Optional[Dict[str, Any]]] = [None] * len(jobs)
+    values: List[Optional[Dict[str, int]]] = [None] * len(jobs)
+    stale = []
+    for i, job in enumerate(jobs):
+        if previous is not None and job.stem in previous.row_index:
+            old_row = previous.rows[previous.row_index[job.stem]]
+            if old_row['signature'] == job_signature(job):
+                rows[i], values[i] = old_row, previous.row_values(job.stem)
+                continue
+        stale.append(i)
+
+    for i, (row, row_values) in zip(stale, parallel_map(_row_job, [jobs[i] for i in stale], workers)):
+        rows[i], values[i] = row, row_values
+
+    matrix = CorpusMatrix.from_rows(rows, values)
+    if out_dir is not None and (stale or previous is None or len(previous.rows) != len(rows)):
+        matrix.save(out_dir)
+    log.info('corpus_built', themes=len(rows), keys=len(matrix.keys), reread=len(stale))
+    return matrix, len(stale)
+
+
+# --- Queries ------------------------------------------------------------------
+
+def hue_histogram(values: Sequence[Optional[int]], buckets: int = 12) -> List[int]:
+    """Count colors per hue bucket; greys (saturation < 0.1) are left out."""
+    counts = [0] * buckets
+    for value in values:
+        if value is None:
+            continue
+        r, g, b, _ = unpack_rgba(value)
+        h, _, s = colorsys.rgb_to_hls(r / 255, g / 255, b / 255)
+        if s >= 0.1:
+            counts[int(h * buckets) % buckets] += 1
+    return counts
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Build a themes x keys color matrix and query it',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument('--themes-dir', type=Path, default=THEMES_DIR, help='Directory with scheme XML files')
+    parser.add_argument('-o', '--output', type=Path, default=DEFAULT_OUT_DIR, help='Matrix directory')
+    parser.add_argument('--missing', metavar='KEY', help='List themes that do not define KEY')
+    parser.add_argument('--hue', metavar='KEY', help='Hue distribution of KEY across themes')
+    parser.add_argument('--values', metavar='KEY', help='Print KEY for every theme')
+    kind = parser.add_mutually_exclusive_group()
+    kind.add_argument('--dark', action='store_true', help='Only dark themes')
+    kind.add_argument('--light', action='store_true', help='Only light themes')
+    parser.add_argument('-j', '--workers', type=int, default=None, help='Worker processes (default: CPU count)')
+    add_logging_arguments(parser)
+
+    args = parser.parse_args()
+    configure_from_args(args)
+
+    matrix, reread = build_corpus(args.themes_dir, args.output, args.workers)
+    if not matrix.rows:
+        print("❌ No schemes found!")
+        return 1
+    dark = True if args.dark else False if args.light else None
+
+    if args.missing:
+        if args.missing not in matrix.column_index:
+            print(f"⚠️  No theme defines {args.missing}")
+        missing = matrix.themes_missing(args.missing, dark)
+        print(f"🔍 {len(missing)} themes without {args.missing}:")
+        for stem in missing:
+            print(f"  {stem}")
+        return 0
+
+    if args.hue or args.values:
+        key = args.hue or args.values
+        selected = [(row, value) for row, value in zip(matrix.rows, matrix.column(key))
+                    if dark is None or row['dark'] == dark]
+        if args.values:
+            for row, value in selected:
+                print(f"{row['stem']:<32} {format_packed(value)}")
+            return 0
+        counts = hue_histogram([value for _, value in selected])
+        print(f"🎨 Hue of {key} ({sum(counts)} saturated of {len(selected)} themes)")
+        for bucket, count in enumerate(counts):
+            print(f"  {bucket * 30:>3}°-{bucket * 30 + 29:>3}° {'█' * count} {count}")
+        return 0
+
+    filled = sum(1 for m in matrix.missing if not m)
+    total = len(matrix.rows) * len(matrix.keys)
+    print(f"✅ {len(matrix.rows)} themes x {len(matrix.keys)} keys, {filled}/{total} defined "
+          f"({reread} themes re-read) -> {args.output}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,253 @@
+#!/usr/bin/env python3
+"""
+Semantic diff between two versions of a theme.
+
+Compares what a scheme means rather than how its files are laid out:
+
+    scheme   <colors> options and resolved attributes (attribute -> effective values)
+    targets  converted outputs flattened to keys, e.g. Zed style.syntax.keyword.color,
+             Sublime rules[scope].foreground, Fleet textAttributes.comment.foreground
+
+Both levels are dictionary comparisons, linear in the number of keys. The scheme's
+subtree hashes decide what to look at: identical <colors>/<attributes> hashes skip that
+section, and targets are only reconverted when the scheme or theme.json content changed.
+
+Usage:
+    python3 theme_diff.py old/gruvbox.xml src/main/resources/themes/gruvbox.xml
+    python3 theme_diff.py --rev HEAD~3                     # every scheme changed since a revision
+    python3 theme_diff.py --rev main -t zed -t sublime --json diff.json
+"""
+
+import argparse
+import json
+import subprocess
+import sys
+from functools import partial
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from theme_common import (THEMES_DIR, IntelliJScheme, canonical_digest, load_json, load_scheme, parallel_map,
+                          parse_json_data, parse_scheme_data)
+from theme_emitters import SnapshotJob, ThemeJob, emit_all, load_emitters, preload_emitters
+from theme_log import add_logging_arguments, configure_from_args, get_logger
+
+log = get_logger('diff')
+
+REPO_DIR = Path(__file__).parent
+
+
+def diff_mappings(old: Dict[str, Any], new: Dict[str, Any]) -> Dict[str, List]:
+    """Added, removed and changed keys between two flat mappings."""
+    return {
+        'added': [[key, new[key]] for key in new if key not in old],
+        'removed': [[key, old[key]] for key in old if key not in new],
+        'changed': [[key, old[key], new[key]] for key in old if key in new and old[key] != new[key]],
+    }
+
+
+def is_empty(diff: Dict[str, List]) -> bool:
+    return not (diff['added'] or diff['removed'] or diff['changed'])
+
+
+def normalize_value(value: str) -> str:
+    # Color values differ in case between editors and hand edits ("F6EEDB" / "f6eedb")
+    return value.upper() if all(c in '0123456789abcdefABCDEF' for c in value) else value
+
+
+def resolved_attributes(scheme: IntelliJScheme) -> Dict[str, str]:
+    """Flatten every attribute to 'ATTR.KEY' -> effective value (baseAttributes followed)."""
+    flat = {}
+    for name in scheme.attributes:
+        for key, value in scheme.resolve_attribute(name).items():
+            flat[f'{name}.{key}'] = normalize_value(value)
+    return flat
+
+
+def diff_schemes(old: Optional[IntelliJScheme], new: Optional[IntelliJScheme]) -> Dict[str, Dict[str, List]]:
+    """Scheme-level diff; sections whose subtree hash did not change are skipped."""
+    empty = IntelliJScheme(None, None, {}, {})
+    old, new = old or empty, new or empty
+    old_digests, new_digests = old.subtree_digests(), new.subtree_digests()
+
+    result = {}
+    if old_digests['header'] != new_digests['header']:
+        result['header'] = diff_mappings({'name': old.name, 'parent_scheme': old.parent_scheme},
+                                         {'name': new.name, 'parent_scheme': new.parent_scheme})
+    if old_digests['colors'] != new_digests['colors']:
+        result['colors'] = diff_mappings({k: normalize_value(v) for k, v in old.colors.items()},
+                                         {k: normalize_value(v) for k, v in new.colors.items()})
+    if old_digests['attributes'] != new_digests['attributes']:
+        # A changed base changes every attribute inheriting from it, so compare resolved values
+        result['attributes'] = diff_mappings(resolved_attributes(old), resolved_attributes(new))
+    return {section: diff for section, diff in result.items() if not is_empty(diff)}
+
+
+def flatten_output(node: Any, prefix: str = '') -> Dict[str, Any]:
+    """Flatten converted output to dotted keys; rule lists are keyed by scope or name."""
+    flat: Dict[str, Any] = {}
+    if isinstance(node, dict):
+        for key, value in node.items():
+            flat.update(flatten_output(value, f'{prefix}.{key}' if prefix else str(key)))
+    elif isinstance(node, list) and node and all(isinstance(item, dict) for item in node):
+        for index, item in enumerate(node):
+            label = item.get('scope') or item.get('name') or index
+            flat.update(flatten_output(item, f'{prefix}[{label}]'))
+    else:
+        flat[prefix] = node
+    return flat
+
+
+def diff_targets(old_job: ThemeJob, new_job: ThemeJob, targets: List[str]) -> Dict[str, Dict[str, List]]:
+    """Convert both versions to each target and diff the flattened outputs."""
+    old_outputs = emit_all(old_job, targets) if old_job.scheme is not None else {}
+    new_outputs = emit_all(new_job, targets) if new_job.scheme is not None else {}
+    result = {}
+    for name in targets:
+        diff = diff_mappings(flatten_output(old_outputs.get(name, {})), flatten_output(new_outputs.get(name, {})))
+        if not is_empty(diff):
+            result[name] = diff
+    return result
+
+
+def content_digest(job: ThemeJob) -> Optional[str]:
+    if job.scheme is None:
+        return None
+    return canonical_digest([job.scheme.digest(), job.theme_json])
+
+
+def diff_jobs(pair: Tuple[ThemeJob, ThemeJob], targets: List[str]) -> Dict[str, Any]:
+    """Semantic diff of one theme. Runs inside a worker process."""
+    old_job, new_job = pair
+    report: Dict[str, Any] = {'theme': new_job.stem, 'scheme': {}, 'targets': {}}
+    try:
+        if content_digest(old_job) == content_digest(new_job):
+            return report
+        report['scheme'] = diff_schemes(old_job.scheme, new_job.scheme)
+        if targets:
+            report['targets'] = diff_targets(old_job, new_job, targets)
+    except Exception as e:
+        report['error'] = f'{type(e).__name__}: {e}'
+    return report
+
+
+# --- Inputs -----------------------------------------------------------------
+
+def git_show(rev: str, path: Path) -> Optional[bytes]:
+    """Content of `path` at `rev`, or None if it did not exist there."""
+    relative = Path(path).resolve().relative_to(REPO_DIR.resolve()).as_posix()
+    completed = subprocess.run(['git', 'show', f'{rev}:{relative}'], cwd=REPO_DIR, capture_output=True)
+    return completed.stdout if completed.returncode == 0 else None
+
+
+def changed_schemes(rev: str, themes_dir: Path) -> List[str]:
+    """Stems of schemes and theme.json files changed between `rev` and the working tree."""
+    completed = subprocess.run(['git', 'diff', '--name-only', rev, '--', str(themes_dir)],
+                               cwd=REPO_DIR, capture_output=True, text=True, check=True)
+    stems = []
+    for line in completed.stdout.splitlines():
+        path = REPO_DIR / line
+        stem = path.stem
+        if path.name.endswith('.theme.json'):
+            # theme.json changes belong to the scheme named by its editorScheme
+            stem = path.name[:-len('.theme.json')]
+            if path.exists():
+                stem = Path(load_json(path).get('editorScheme') or stem).stem
+        if stem not in stems:
+            stems.append(stem)
+    return stems
+
+
+def revision_job(rev: str, job: ThemeJob) -> SnapshotJob:
+    scheme_data = git_show(rev, job.scheme_path)
+    theme_json_data = git_show(rev, job.theme_json_path) if job.theme_json_path else None
+    return SnapshotJob(job.stem,
+                       parse_scheme_data(scheme_data) if scheme_data is not None else None,
+                       parse_json_data(theme_json_data) if theme_json_data is not None else None)
+
+
+def print_diff(diff: Dict[str, List], indent: str = '    ', limit: int = 0) -> None:
+    lines = [f"{indent}+ {key} = {value}" for key, value in diff['added']]
+    lines += [f"{indent}- {key} = {value}" for key, value in diff['removed']]
+    lines += [f"{indent}~ {key}: {old} -> {new}" for key, old, new in diff['changed']]
+    for line in lines[:limit or None]:
+        print(line)
+    if limit and len(lines) > limit:
+        print(f"{indent}... {len(lines) - limit} more")
+
+
+def print_report(reports: List[Dict[str, Any]], limit: int) -> None:
+    for report in reports:
+        if 'error' in report:
+            print(f"❌ {report['theme']}: {report['error']}")
+            continue
+        if not report['scheme'] and not report['targets']:
+            print(f"✓ {report['theme']}: no semantic change")
+            continue
+        print(f"🔀 {report['theme']}")
+        for section, diff in report['scheme'].items():
+            print(f"  scheme {section}:")
+            print_diff(diff, limit=limit)
+        for target, diff in report['targets'].items():
+            print(f"  {target}:")
+            print_diff(diff, limit=limit)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Semantic diff between two versions of IntelliJ schemes and their converted outputs',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument('old', nargs='?', type=Path, help='Old scheme XML')
+    parser.add_argument('new', nargs='?', type=Path, help='New scheme XML')
+    parser.add_argument('--rev', help='Compare every scheme changed since this git revision')
+    parser.add_argument('--themes-dir', type=Path, default=THEMES_DIR, help='Directory with scheme XML files')
+    parser.add_argument('--only', action='append', help='Compare only this scheme stem (repeatable, with --rev)')
+    parser.add_argument('-t', '--target', action='append', dest='targets',
+                        help='Also diff this converted target (repeatable, default: all registered targets)')
+    parser.add_argument('--scheme-only', action='store_true', help='Skip the converted targets')
+    parser.add_argument('--limit', type=int, default=20, help='Lines shown per section (0 = all)')
+    parser.add_argument('--json', type=Path, help='Write the full diff as JSON to this file')
+    parser.add_argument('-j', '--workers', type=int, default=None, help='Worker processes (default: CPU count)')
+    add_logging_arguments(parser)
+
+    args = parser.parse_args()
+    configure_from_args(args)
+
+    targets = [] if args.scheme_only else (args.targets or sorted(load_emitters()))
+
+    if args.rev:
+        from theme_batch import discover_jobs
+        stems = changed_schemes(args.rev, args.themes_dir)
+        if args.only:
+            stems = [stem for stem in stems if stem in args.only]
+        jobs = discover_jobs(args.themes_dir, stems) if stems else []
+        pairs = [(revision_job(args.rev, job), job) for job in jobs]
+    elif args.old and args.new:
+        old = SnapshotJob(args.new.stem, load_scheme(args.old))
+        new = SnapshotJob(args.new.stem, load_scheme(args.new))
+        pairs = [(old, new)]
+    else:
+        parser.error('give OLD and NEW scheme files, or --rev')
+
+    if not pairs:
+        print("✓ No scheme changes")
+        return 0
+
+    reports = parallel_map(partial(diff_jobs, targets=targets), pairs, args.workers,
+                           preload=partial(preload_emitters, targets))
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(reports, f, indent=2, ensure_ascii=False)
+    for report in reports:
+        log.info('theme_diffed', theme=report['theme'], scheme=sorted(report['scheme']),
+                 targets=sorted(report['targets']), error=report.get('error'))
+    print_report(reports, args.limit)
+
+    changed = sum(1 for r in reports if r['scheme'] or r['targets'])
+    print(f"\n📊 {changed}/{len(reports)} themes changed semantically")
+    return 1 if any('error' in r for r in reports) else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,194 @@
+#!/usr/bin/env python3
+"""
+Registry of conversion targets ("emitters").
+
+An emitter only declares what it produces: its name, which input it reads (the
+IntelliJ scheme or another emitter's output), the output file suffix and how it maps
+that input to the target format. Parsing, caching, color math, scheduling and
+writing live in theme_common.py and theme_batch.py, so every target registered here
+gets the batch runner for free.
+
+Built-in emitters come from the converter scripts in this directory. Additional
+targets can be shipped as separate packages that expose an entry point in the
+"dark_themes.emitters" group pointing at a ThemeEmitter subclass.
+"""
+
+import importlib
+import sys
+from importlib.metadata import entry_points
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Type
+
+from theme_common import IntelliJScheme, load_json, load_scheme
+from theme_inheritance import ThemeResolver
+from theme_log import get_logger
+
+log = get_logger('emitters')
+
+ENTRY_POINT_GROUP = 'dark_themes.emitters'
+
+# Modules whose import registers the built-in emitters
+BUILTIN_EMITTER_MODULES = (
+    'intellij_to_zed',
+    'intellij_to_sublime_json',
+    'sublime_to_fleet',
+)
+
+SCHEME_SOURCE = 'scheme'
+
+
+class ThemeJob:
+    """One theme to convert: an editor scheme plus its optional theme.json."""
+
+    def __init__(self, stem: str, scheme_path: Path, theme_json_path: Optional[Path] = None):
+        self.stem = stem
+        self.scheme_path = Path(scheme_path)
+        self.theme_json_path = Path(theme_json_path) if theme_json_path else None
+
+    @property
+    def scheme(self) -> IntelliJScheme:
+        return load_scheme(self.scheme_path)
+
+    @property
+    def theme_json(self) -> Optional[Dict[str, Any]]:
+        if self.theme_json_path is None or not self.theme_json_path.exists():
+            return None
+        return load_json(self.theme_json_path)
+
+    def input_paths(self) -> List[Path]:
+        paths = [self.scheme_path]
+        if self.theme_json_path is not None and self.theme_json_path.exists():
+            paths.append(self.theme_json_path)
+        return paths
+
+    def parent_paths(self) -> List[Path]:
+        """Parent theme.json files the theme.json resolves against (the Zed output reads them)."""
+        theme_json = self.theme_json
+        return ThemeResolver().parent_paths(theme_json) if theme_json else []
+
+    def __repr__(self) -> str:
+        return f'ThemeJob({self.stem!r})'
+
+
+class SnapshotJob(ThemeJob):
+    """A theme version held in memory (read from a git revision, or handed to a worker)."""
+
+    def __init__(self, stem: str, scheme: Optional[IntelliJScheme], theme_json: Optional[Dict[str, Any]] = None):
+        super().__init__(stem, Path(f'{stem}.xml'))
+        self._scheme = scheme
+        self._theme_json = theme_json
+
+    @property
+    def scheme(self) -> Optional[IntelliJScheme]:
+        return self._scheme
+
+    @property
+    def theme_json(self) -> Optional[Dict[str, Any]]:
+        return self._theme_json
+
+
+class ThemeEmitter:
+    """Base class for a conversion target."""
+
+    # Registry key, used on the command line (--target zed)
+    name = ''
+    description = ''
+    # SCHEME_SOURCE, or the name of the emitter whose output this one converts
+    source = SCHEME_SOURCE
+    # Output file name is f'{job.stem}{suffix}'
+    suffix = '.json'
+    indent = 2
+
+    def emit(self, source: Any, job: ThemeJob) -> Dict[str, Any]:
+        """Convert `source` (an IntelliJScheme or the source emitter's output) for `job`."""
+        raise NotImplementedError
+
+    def output_name(self, job: ThemeJob) -> str:
+        return f'{job.stem}{self.suffix}'
+
+
+EMITTERS: Dict[str, Type[ThemeEmitter]] = {}
+_instances: Dict[str, ThemeEmitter] = {}
+_loaded = False
+
+
+def register_emitter(cls: Type[ThemeEmitter]) -> Type[ThemeEmitter]:
+    """Class decorator adding an emitter to the registry."""
+    if not cls.name:
+        raise ValueError(f"Emitter {cls.__name__} has no name")
+    EMITTERS[cls.name] = cls
+    _instances.pop(cls.name, None)
+    return cls
+
+
+def load_emitters() -> Dict[str, Type[ThemeEmitter]]:
+    """Import the built-in emitters and any registered through entry points."""
+    global _loaded
+    if _loaded:
+        return EMITTERS
+    _loaded = True
+
+    script_dir = str(Path(__file__).parent)
+    if script_dir not in sys.path:
+        sys.path.insert(0, script_dir)
+    for module_name in BUILTIN_EMITTER_MODULES:
+        importlib.import_module(module_name)
+
+    for entry_point in entry_points(group=ENTRY_POINT_GROUP):
+        try:
+            register_emitter(entry_point.load())
+        except Exception as e:
+            log.warning('emitter_load_failed', entry_point=entry_point.name, error=str(e))
+
+    return EMITTERS
+
+
+def get_emitter(name: str) -> ThemeEmitter:
+    """Return the shared instance of a registered emitter."""
+    load_emitters()
+    if name not in EMITTERS:
+        raise KeyError(f"Unknown target '{name}' (available: {', '.join(sorted(EMITTERS))})")
+    if name not in _instances:
+        _instances[name] = EMITTERS[name]()
+    return _instances[name]
+
+
+def resolve_targets(names: Iterable[str]) -> List[str]:
+    """Order targets so every emitter runs after the emitter it reads from."""
+    ordered: List[str] = []
+
+    def visit(name: str, chain: tuple):
+        if name in ordered:
+            return
+        if name in chain:
+            raise ValueError(f"Emitter source cycle: {' -> '.join(chain + (name,))}")
+        emitter = get_emitter(name)
+        if emitter.source != SCHEME_SOURCE:
+            visit(emitter.source, chain + (name,))
+        ordered.append(name)
+
+    for name in names:
+        visit(name, ())
+    return ordered
+
+
+def preload_emitters(targets: Iterable[str]) -> None:
+    """Build the emitters for `targets` (and their sources) and the parsed base themes.
+
+    Meant as the `preload` of parallel_map / resilient_map: run once in the parent, the
+    converters' mapping tables and indexes and the flattened extracted-themes/ parents
+    are inherited by every forked worker instead of being rebuilt in each.
+    """
+    for name in resolve_targets(targets):
+        get_emitter(name)
+    ThemeResolver().preload()
+
+
+def emit_all(job: ThemeJob, targets: Iterable[str]) -> Dict[str, Dict[str, Any]]:
+    """Run the requested emitters (and the ones they depend on) for one job, in memory."""
+    outputs: Dict[str, Dict[str, Any]] = {}
+    for name in resolve_targets(targets):
+        emitter = get_emitter(name)
+        source = job.scheme if emitter.source == SCHEME_SOURCE else outputs[emitter.source]
+        outputs[name] = emitter.emit(source, job)
+    return outputs
@@ -0,0 +1,269 @@
+#!/usr/bin/env python3
+"""
+Shared parent schemes for theme families.
+
+Variants of a family (noctis, noctisSereno, noctisBordo, ...; gruvbox, gruvboxMaterial,
+gruvboxConcoctis) repeat most of their XML. For each family this finds the options that
+every variant defines identically, writes them once as a base scheme, and writes each
+variant as a delta that names the base as its parent_scheme:
+
+    <out>/<family>/<family>_base.xml     shared <colors> and <attributes>, the variants' parent
+    <out>/<family>/<variant>.xml         the variant without the shared options
+
+A family is a scheme whose file stem prefixes other stems (case-insensitive) together
+with those schemes; variants with a different parent_scheme are left out. Each delta is
+merged back over its base and must resolve exactly like the original variant, and a
+family is only written when base plus deltas are smaller than the variants. --rebuild
+does that merge for a families directory, producing flat schemes again after the base
+was edited.
+
+Usage:
+    python3 theme_family.py -o build/families
+    python3 theme_family.py --family noctis=noctis,noctisSereno,noctisBordo -o build/families
+    python3 theme_family.py --rebuild build/families -o build/schemes
+"""
+
+import argparse
+import copy
+import sys
+import xml.etree.ElementTree as ET
+from functools import partial
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from theme_common import THEMES_DIR, parallel_map, parse_scheme_data, write_text
+from theme_log import add_logging_arguments, configure_from_args, get_logger
+from theme_minify import effective_scheme, option_definition
+
+log = get_logger('family')
+
+DEFAULT_OUT_DIR = Path(__file__).parent / 'build' / 'families'
+
+SECTIONS = ('colors', 'attributes')
+
+BASE_SUFFIX = '_base'
+
+
+def detect_families(stems: List[str]) -> Dict[str, List[str]]:
+    """Family name -> member stems: a stem no other stem prefixes, with every stem it prefixes."""
+    roots = [stem for stem in stems
+             if not any(other != stem and stem.lower().startswith(other.lower()) for other in stems)]
+    families = {}
+    for root in sorted(roots):
+        members = [stem for stem in sorted(stems) if stem.lower().startswith(root.lower())]
+        if len(members) > 1:
+            families[root] = members
+    return families
+
+
+def _options(root: ET.Element, section_name: str) -> Dict[str, ET.Element]:
+    section = root.find(section_name)
+    return {} if section is None else {option.get('name'): option for option in section.findall('option')}
+
+
+def shared_options(roots: List[ET.Element]) -> Dict[str, List[ET.Element]]:
+    """Options defined identically by every variant, per section, in the first variant's order."""
+    shared = {}
+    for section_name in SECTIONS:
+        per_variant = [_options(root, section_name) for root in roots]
+        first = per_variant[0]
+        shared[section_name] = [
+            option for name, option in first.items()
+            if all(name in other and option_definition(other[name]) == option_definition(option)
+                   for other in per_variant[1:])
+        ]
+    return shared
+
+
+def base_scheme(name: str, parent_scheme: Optional[str], shared: Dict[str, List[ET.Element]]) -> ET.Element:
+    root = ET.Element('scheme', {'name': name, 'version': '142'})
+    if parent_scheme:
+        root.set('parent_scheme', parent_scheme)
+    for section_name in SECTIONS:
+        section = ET.SubElement(root, section_name)
+        for option in shared[section_name]:
+            section.append(copy.deepcopy(option))
+    return root
+
+
+def delta_scheme(root: ET.Element, base_name: str, shared: Dict[str, List[ET.Element]]) -> ET.Element:
+    """A variant without the shared options, inheriting them from the base."""
+    delta = copy.deepcopy(root)
+    delta.set('parent_scheme', base_name)
+    for section_name in SECTIONS:
+        section = delta.find(section_name)
+        if section is None:
+            continue
+        names = {option.get('name') for option in shared[section_name]}
+        for option in section.findall('option'):
+            if option.get('name') in names:
+                section.remove(option)
+    return delta
+
+
+def merge_scheme(base: ET.Element, delta: ET.Element) -> ET.Element:
+    """Flatten a delta over its base: the base's options first, the delta's override them."""
+    merged = copy.deepcopy(delta)
+    if base.get('parent_scheme'):
+        merged.set('parent_scheme', base.get('parent_scheme'))
+    elif 'parent_scheme' in merged.attrib:
+        del merged.attrib['parent_scheme']
+    for section_name in SECTIONS:
+        own = _options(delta, section_name)
+        inherited = [copy.deepcopy(option) for name, option in _options(base, section_name).items()
+                     if name not in own]
+        if not inherited:
+            continue
+        section = merged.find(section_name)
+        if section is None:
+            section = ET.SubElement(merged, section_name)
+        for index, option in enumerate(inherited):
+            section.insert(index, option)
+    return merged
+
+
+def to_xml(root: ET.Element) -> str:
+    root = copy.deepcopy(root)
+    for node in root.iter():
+        if node.text is not None and not node.text.strip():
+            node.text = None
+        node.tail = None
+    ET.indent(root, space='    ')
+    return ET.tostring(root, encoding='unicode') + '\n'
+
+
+def extract_family(family: str, paths: List[Path], out_dir: Path) -> Dict[str, Any]:
+    """Write the base and deltas of one family after verifying them. Runs inside a worker process."""
+    report: Dict[str, Any] = {'family': family, 'variants': [p.stem for p in paths]}
+    try:
+        roots = [ET.parse(path).getroot() for path in paths]
+    except ET.ParseError as e:
+        report['error'] = str(e)
+        return report
+
+    base_name = f'{family}{BASE_SUFFIX}'
+    shared = shared_options(roots)
+    base = base_scheme(base_name, roots[0].get('parent_scheme'), shared)
+    deltas = [delta_scheme(root, base_name, shared) for root in roots]
+
+    base_ir = parse_scheme_data(to_xml(base))
+    for path, root, delta in zip(paths, roots, deltas):
+        original = effective_scheme(parse_scheme_data(ET.tostring(root)), None)
+        # The base's own fallback goes to the original parent, exactly like the variant's did
+        rebuilt = effective_scheme(parse_scheme_data(to_xml(delta)), base_ir)
+        if original != rebuilt:
+            report['error'] = f'{path.stem} does not resolve identically over the shared base'
+            return report
+
+    files = {f'{base_name}.xml': to_xml(base)}
+    files.update({f'{path.stem}.xml': to_xml(delta) for path, delta in zip(paths, deltas)})
+    report.update(
+        shared={section: len(options) for section, options in shared.items()},
+        # Same layout on both sides, so the sizes compare content only
+        before=sum(len(to_xml(root).encode('utf-8')) for root in roots),
+        after=sum(len(text.encode('utf-8')) for text in files.values()),
+    )
+    report['written'] = report['after'] < report['before']
+    if report['written']:
+        for name, text in files.items():
+            write_text(out_dir / family / name, text)
+    return report
+
+
+def _extract_job(job: Tuple[str, List[Path]], out_dir: Path) -> Dict[str, Any]:
+    family, paths = job
+    return extract_family(family, paths, out_dir)
+
+
+def rebuild_families(families_dir: Path, out_dir: Path) -> List[str]:
+    """Flatten every delta in `families_dir` over its family base into `out_dir`."""
+    written = []
+    for base_path in sorted(families_dir.glob(f'*/*{BASE_SUFFIX}.xml')):
+        base = ET.parse(base_path).getroot()
+        for delta_path in sorted(base_path.parent.glob('*.xml')):
+            if delta_path == base_path:
+                continue
+            merged = merge_scheme(base, ET.parse(delta_path).getroot())
+            write_text(out_dir / delta_path.name, to_xml(merged))
+            written.append(delta_path.stem)
+    return written
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Extract shared base schemes for theme families and write per-variant deltas',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument('--themes-dir', type=Path, default=THEMES_DIR, help='Directory with scheme XML files')
+    parser.add_argument('--family', action='append', metavar='NAME=STEM,STEM',
+                        help='Explicit family (repeatable, default: detected from file names)')
+    parser.add_argument('-o', '--output', type=Path, default=DEFAULT_OUT_DIR, help='Output directory')
+    parser.add_argument('--rebuild', type=Path, metavar='FAMILIES_DIR',
+                        help='Merge the deltas in FAMILIES_DIR over their bases into flat schemes')
+    parser.add_argument('-j', '--workers', type=int, default=None, help='Worker processes (default: CPU count)')
+    add_logging_arguments(parser)
+
+    args = parser.parse_args()
+    configure_from_args(args)
+
+    if args.rebuild:
+        written = rebuild_families(args.rebuild, args.output)
+        print(f"✅ Rebuilt {len(written)} schemes -> {args.output}")
+        return 0
+
+    paths = {path.stem: path for path in sorted(args.themes_dir.glob('*.xml'))}
+    if args.family:
+        families = {}
+        for spec in args.family:
+            name, _, members = spec.partition('=')
+            families[name] = [stem for stem in members.split(',') if stem]
+    else:
+        families = detect_families(list(paths))
+
+    # Variants have to share the parent scheme the base will fall back to
+    jobs = []
+    for family, stems in sorted(families.items()):
+        unknown = [stem for stem in stems if stem not in paths]
+        if unknown:
+            print(f"❌ {family}: no scheme for {', '.join(unknown)}")
+            return 1
+        by_parent: Dict[str, List[Path]] = {}
+        for stem in stems:
+            by_parent.setdefault(ET.parse(paths[stem]).getroot().get('parent_scheme') or '', []).append(paths[stem])
+        for group in by_parent.values():
+            if len(group) > 1:
+                # A light/dark split gets one base per parent, named after its shortest stem
+                stems_in_group = [path.stem for path in group]
+                name = family if family in stems_in_group else min(stems_in_group, key=len)
+                jobs.append((name, group))
+            else:
+                log.info('variant_skipped', family=family, variant=group[0].stem, reason='different parent_scheme')
+
+    if not jobs:
+        print("❌ No families found!")
+        return 1
+
+    reports = parallel_map(partial(_extract_job, out_dir=args.output), jobs, args.workers)
+
+    failed = 0
+    for report in reports:
+        log.info('family_extracted', **report)
+        if 'error' in report:
+            failed += 1
+            print(f"❌ {report['family']}: {report['error']}")
+            continue
+        note = '' if report['written'] else ' (not smaller, skipped)'
+        print(f"👪 {report['family']:<14} {len(report['variants'])} variants, "
+              f"{report['shared']['colors']} colors + {report['shared']['attributes']} attributes shared, "
+              f"{report['before'] / 1024:.0f} KB -> {report['after'] / 1024:.0f} KB{note}")
+
+    ok = [r for r in reports if r.get('written')]
+    if ok:
+        before = sum(r['before'] for r in ok)
+        after = sum(r['after'] for r in ok)
+        print(f"\n✅ {len(ok)} families: {before / 1024:.0f} KB -> {after / 1024:.0f} KB -> {args.output}")
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,238 @@
+#!/usr/bin/env python3
+"""
+Golden-output regression check for the converters.
+
+golden/ holds the Zed, Sublime and Fleet output of every scheme in the themes directory
+together with a manifest of canonical-JSON content hashes:
+
+    golden/manifest.json          theme -> target -> sha1 of the canonical output (or the error)
+    golden/<target>/<stem>.json   the output itself, read only to explain a mismatch
+
+The check converts every theme in one parallel pass and compares hashes only; for a
+theme whose hash differs, the worker that converted it also diffs the flattened output
+against the golden file (added/removed/changed keys, like theme_diff.py). After an
+intended output change, --update records the new outputs.
+
+The emitters call the converters' building blocks directly, so the check also runs the
+standalone CLIs (intellij_to_zed.py, intellij_to_sublime_json.py, sublime_to_fleet.py)
+as subprocesses on the first --cli themes and compares what they write with the same
+hashes.
+
+Usage:
+    python3 theme_golden.py                 # check
+    python3 theme_golden.py --update
+    python3 theme_golden.py --only gruvbox --show 20
+"""
+
+import argparse
+import subprocess
+import sys
+import tempfile
+from functools import partial
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from theme_common import THEMES_DIR, canonical_digest, dump_json, load_json, parallel_map, write_text
+from theme_diff import diff_mappings, flatten_output, is_empty, print_diff
+from theme_emitters import SCHEME_SOURCE, ThemeJob, get_emitter, load_emitters, preload_emitters, resolve_targets
+from theme_log import add_logging_arguments, configure_from_args, get_logger
+
+log = get_logger('golden')
+
+GOLDEN_DIR = Path(__file__).parent / 'golden'
+MANIFEST_NAME = 'manifest.json'
+
+DEFAULT_TARGETS = ['zed', 'sublime', 'fleet']
+
+SCRIPTS_DIR = Path(__file__).parent
+# Themes run through the standalone CLIs by default
+DEFAULT_CLI_THEMES = 1
+
+
+def convert_outputs(job: ThemeJob, targets: List[str]) -> Dict[str, Dict[str, Any]]:
+    """target -> {'output': ...} or {'error': ...}; a failed source fails its dependents."""
+    produced: Dict[str, Any] = {}
+    results: Dict[str, Dict[str, Any]] = {}
+    for name in resolve_targets(targets):
+        emitter = get_emitter(name)
+        try:
+            if emitter.source == SCHEME_SOURCE:
+                source = job.scheme
+            elif emitter.source in produced:
+                source = produced[emitter.source]
+            else:
+                raise ValueError(f"source '{emitter.source}' failed")
+            produced[name] = emitter.emit(source, job)
+            results[name] = {'output': produced[name]}
+        except Exception as e:
+            results[name] = {'error': f'{type(e).__name__}: {e}'}
+    return {name: results[name] for name in targets}
+
+
+def entry_for(result: Dict[str, Any]) -> str:
+    """Manifest value: the output's content hash, or the error it failed with."""
+    return canonical_digest(result['output']) if 'output' in result else f"error: {result['error']}"
+
+
+def check_job(job: ThemeJob, targets: List[str], expected: Dict[str, str], golden_dir: Path) -> Dict[str, Any]:
+    """Convert one theme and compare with its golden hashes. Runs inside a worker process."""
+    report: Dict[str, Any] = {'theme': job.stem, 'mismatches': {}}
+    for name, result in convert_outputs(job, targets).items():
+        actual = entry_for(result)
+        if expected.get(name) == actual:
+            continue
+        mismatch: Dict[str, Any] = {'expected': expected.get(name), 'actual': actual}
+        golden_path = golden_dir / name / f'{job.stem}.json'
+        if 'output' in result and golden_path.exists():
+            diff = diff_mappings(flatten_output(load_json(golden_path)), flatten_output(result['output']))
+            if not is_empty(diff):
+                mismatch['diff'] = diff
+        report['mismatches'][name] = mismatch
+    return report
+
+
+def _check_entry(entry: Tuple[ThemeJob, Dict[str, str]], targets: List[str], golden_dir: Path) -> Dict[str, Any]:
+    job, expected = entry
+    return check_job(job, targets, expected, golden_dir)
+
+
+def update_job(job: ThemeJob, targets: List[str], golden_dir: Path) -> Dict[str, Any]:
+    """Convert one theme and record its outputs as golden. Runs inside a worker process."""
+    entries = {}
+    for name, result in convert_outputs(job, targets).items():
+        entries[name] = entry_for(result)
+        path = golden_dir / name / f'{job.stem}.json'
+        if 'output' in result:
+            write_text(path, dump_json(result['output'], 2))
+        elif path.exists():
+            path.unlink()
+    return {'theme': job.stem, 'entries': entries}
+
+
+def cli_commands(job: ThemeJob, work_dir: Path) -> List[Tuple[str, List[str], Path]]:
+    """(target, argv, output path) per converter CLI, in dependency order (fleet reads sublime's output)."""
+    zed_out = work_dir / f'{job.stem}_zed.json'
+    sublime_out = work_dir / f'{job.stem}.sublime-color-scheme'
+    fleet_out = work_dir / f'{job.stem}_fleet.json'
+    zed = [str(SCRIPTS_DIR / 'intellij_to_zed.py'), str(job.scheme_path), '-o', str(zed_out)]
+    if job.theme_json_path is not None and job.theme_json_path.exists():
+        zed += ['-t', str(job.theme_json_path)]
+    return [
+        ('zed', zed, zed_out),
+        ('sublime', [str(SCRIPTS_DIR / 'intellij_to_sublime_json.py'), str(job.scheme_path), str(sublime_out)],
+         sublime_out),
+        ('fleet', [str(SCRIPTS_DIR / 'sublime_to_fleet.py'), str(sublime_out), str(fleet_out)], fleet_out),
+    ]
+
+
+def check_cli(job: ThemeJob, targets: List[str], expected: Dict[str, str]) -> Dict[str, Dict[str, Any]]:
+    """Run the converter CLIs on one theme; target -> mismatch for outputs that differ from the golden hashes."""
+    mismatches: Dict[str, Dict[str, Any]] = {}
+    with tempfile.TemporaryDirectory(prefix='golden-cli-') as work_dir:
+        for name, argv, output in cli_commands(job, Path(work_dir)):
+            if name not in targets or expected.get(name, '').startswith('error:'):
+                continue
+            process = subprocess.run([sys.executable] + argv, capture_output=True, text=True)
+            if process.returncode != 0 or not output.exists():
+                error = (process.stderr or process.stdout).strip().splitlines()
+                mismatches[name] = {'expected': expected.get(name),
+                                    'actual': f"exit {process.returncode}: {error[-1] if error else ''}"}
+                continue
+            actual = canonical_digest(load_json(output))
+            if actual != expected.get(name):
+                mismatches[name] = {'expected': expected.get(name), 'actual': actual}
+    return mismatches
+
+
+def load_manifest(golden_dir: Path) -> Optional[Dict[str, Any]]:
+    path = golden_dir / MANIFEST_NAME
+    return load_json(path) if path.exists() else None
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Compare converter outputs with the golden corpus (or --update it)',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument('--themes-dir', type=Path, default=THEMES_DIR, help='Directory with scheme XML files')
+    parser.add_argument('--golden-dir', type=Path, default=GOLDEN_DIR, help='Golden corpus directory')
+    parser.add_argument('--only', action='append', help='Process only this scheme stem (repeatable)')
+    parser.add_argument('-t', '--target', action='append', dest='targets',
+                        help=f'Target to record or check (repeatable, default: {" ".join(DEFAULT_TARGETS)})')
+    parser.add_argument('--update', action='store_true', help='Record the current outputs as golden')
+    parser.add_argument('--cli', type=int, default=DEFAULT_CLI_THEMES,
+                        help=f'Also run the converter CLIs on this many themes (default: {DEFAULT_CLI_THEMES})')
+    parser.add_argument('--show', type=int, default=10, help='Diff lines shown per mismatch (0 = all)')
+    parser.add_argument('-j', '--workers', type=int, default=None, help='Worker processes (default: CPU count)')
+    add_logging_arguments(parser)
+
+    args = parser.parse_args()
+    configure_from_args(args)
+
+    from theme_batch import discover_jobs
+    load_emitters()
+    jobs = discover_jobs(args.themes_dir, args.only)
+    if not jobs:
+        print("❌ No schemes found!")
+        return 1
+
+    manifest = load_manifest(args.golden_dir)
+    targets = args.targets or (manifest or {}).get('targets') or DEFAULT_TARGETS
+
+    preload = partial(preload_emitters, targets)
+    if args.update:
+        results = parallel_map(partial(update_job, targets=targets, golden_dir=args.golden_dir), jobs, args.workers,
+                               preload=preload)
+        themes = dict((manifest or {}).get('themes', {})) if args.only else {}
+        themes.update({result['theme']: result['entries'] for result in results})
+        write_text(args.golden_dir / MANIFEST_NAME,
+                   dump_json({'targets': targets, 'themes': dict(sorted(themes.items()))}, 2))
+        print(f"✅ Recorded {len(results)} themes x {len(targets)} targets -> {args.golden_dir}")
+        return 0
+
+    if manifest is None:
+        print(f"❌ No golden corpus in {args.golden_dir}, create it with --update")
+        return 1
+
+    golden = manifest['themes']
+    missing = [job.stem for job in jobs if job.stem not in golden]
+    jobs = [job for job in jobs if job.stem in golden]
+    results = parallel_map(partial(_check_entry, targets=targets, golden_dir=args.golden_dir),
+                           [(job, golden[job.stem]) for job in jobs], args.workers, preload=preload)
+
+    failed = 0
+    for result in results:
+        if not result['mismatches']:
+            continue
+        failed += 1
+        print(f"❌ {result['theme']}")
+        for target, mismatch in result['mismatches'].items():
+            log.info('golden_mismatch', theme=result['theme'], target=target,
+                     expected=mismatch['expected'], actual=mismatch['actual'])
+            print(f"  {target}: {mismatch['expected']} -> {mismatch['actual']}")
+            if 'diff' in mismatch:
+                print_diff(mismatch['diff'], limit=args.show)
+    cli_failed = 0
+    for job in jobs[:max(args.cli, 0)]:
+        for target, mismatch in check_cli(job, targets, golden[job.stem]).items():
+            cli_failed += 1
+            log.info('golden_cli_mismatch', theme=job.stem, target=target, **mismatch)
+            print(f"❌ {job.stem} [{target} CLI]: {mismatch['expected']} -> {mismatch['actual']}")
+    for stem in missing:
+        print(f"⚠️  {stem}: not in the golden corpus")
+    stale = [] if args.only else sorted(set(golden) - {job.stem for job in discover_jobs(args.themes_dir)})
+    for stem in stale:
+        print(f"⚠️  {stem}: in the golden corpus but no longer a scheme")
+
+    if failed or cli_failed:
+        if failed:
+            print(f"\n❌ {failed}/{len(results)} themes differ from the golden outputs")
+        if cli_failed:
+            print(f"\n❌ {cli_failed} converter CLI outputs differ from the golden outputs")
+        return 1
+    print(f"\n✅ {len(results)} themes x {len(targets)} targets match the golden outputs")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
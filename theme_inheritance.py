@@ -0,0 +1,246 @@
+#!/usr/bin/env python3
+"""
+Effective values of a .theme.json, with parentTheme inheritance and named colors.
+
+IntelliJ merges a theme over its parentTheme chain (e.g. test.theme.json ->
+ExperimentalLightWithLightHeader -> ExperimentalLight -> IntelliJ -> Darcula), flattens
+the nested `ui` section to dotted keys ("ToolWindow.HeaderTab.hoverBackground"), applies
+"*" entries to every key with that property, and lets values name a color from the
+merged `colors` section ("hover", "Gray1", ...).
+
+ThemeResolver does the same for the scripts: parents are loaded from extracted-themes/
+(or from IntelliJ jars, see intellij_jar.py), flattened once per process and cached,
+and named colors are resolved with memoization, so any key is a dictionary lookup.
+
+Usage:
+    python3 theme_inheritance.py src/main/resources/themes/test.theme.json ToolWindow.Button.hoverBackground
+    python3 theme_inheritance.py src/main/resources/themes/test.theme.json --dump
+"""
+
+import argparse
+import sys
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from theme_common import EXTRACTED_THEMES_DIR, PathLike, cached_load, file_signature, load_json
+from theme_log import add_logging_arguments, configure_from_args, get_logger
+
+log = get_logger('inheritance')
+
+# parentTheme ids of the bundled themes -> theme.json file name
+BASE_THEME_FILES = {
+    'Darcula': 'darcula.theme.json',
+    'IntelliJ': 'intellijlaf.theme.json',
+    'JetBrainsLightTheme': 'Light.theme.json',
+    'ExperimentalDark': 'expUI_dark.theme.json',
+    'ExperimentalLight': 'expUI_light.theme.json',
+    'ExperimentalLightWithLightHeader': 'expUI_light_with_light_header.theme.json',
+    'ManyIslandsDark': 'ManyIslandsDark.theme.json',
+    'ManyIslandsLight': 'ManyIslandsLight.theme.json',
+}
+
+# Implicit parent of themes that do not declare one
+DEFAULT_DARK_PARENT = 'Darcula'
+DEFAULT_LIGHT_PARENT = 'IntelliJ'
+
+
+def flatten_ui(ui: Dict[str, Any], prefix: str = '') -> Dict[str, Any]:
+    """{"ToolWindow": {"Button": {"hoverBackground": x}}} -> {"ToolWindow.Button.hoverBackground": x}."""
+    flat = {}
+    for key, value in ui.items():
+        full_key = f'{prefix}.{key}' if prefix else key
+        if isinstance(value, dict):
+            flat.update(flatten_ui(value, full_key))
+        else:
+            flat[full_key] = value
+    return flat
+
+
+class ResolvedTheme:
+    """A theme merged over its parents: flat `ui` keys and named `colors`."""
+
+    def __init__(self, name: Optional[str], chain: List[str], ui: Dict[str, Any], colors: Dict[str, Any]):
+        self.name = name
+        # Theme names from this theme up to the root parent
+        self.chain = chain
+        self.ui = ui
+        self.colors = colors
+        self._resolved_colors: Dict[str, Any] = {}
+
+    def merged_with(self, theme: Dict[str, Any]) -> 'ResolvedTheme':
+        """A child theme's values applied over this (parent) theme."""
+        ui = dict(self.ui)
+        ui.update(flatten_ui(theme.get('ui') or {}))
+        colors = dict(self.colors)
+        colors.update(theme.get('colors') or {})
+        return ResolvedTheme(theme.get('name'), [theme.get('name')] + self.chain, ui, colors)
+
+    def color(self, value: Any) -> Any:
+        """Follow named color references ("hover" -> "Gray12" -> "#EBECF0")."""
+        if not isinstance(value, str) or value not in self.colors:
+            return value
+        if value in self._resolved_colors:
+            return self._resolved_colors[value]
+        seen = {value}
+        current = self.colors[value]
+        while isinstance(current, str) and current in self.colors and current not in seen:
+            seen.add(current)
+            current = self.colors[current]
+        self._resolved_colors[value] = current
+        return current
+
+    def raw(self, key: str, default: Any = None) -> Any:
+        """Value of a flattened ui key as written, falling back to "*.<property>"."""
+        if key in self.ui:
+            return self.ui[key]
+        return self.ui.get(f"*.{key.rsplit('.', 1)[-1]}", default)
+
+    def get(self, key: str, default: Any = None) -> Any:
+        """Effective value of a flattened ui key, named colors resolved."""
+        value = self.raw(key)
+        return default if value is None else self.color(value)
+
+    def __contains__(self, key: str) -> bool:
+        return self.raw(key) is not None
+
+
+class ThemeResolver:
+    """Loads parent themes and resolves themes against them."""
+
+    def __init__(self, base_dirs: Iterable[PathLike] = (EXTRACTED_THEMES_DIR,), jar_indexes: Iterable[Any] = ()):
+        self.base_dirs = [Path(d) for d in base_dirs]
+        # intellij_jar.JarThemeIndex instances, searched after the directories
+        self.jar_indexes = list(jar_indexes)
+        # parentTheme id -> (signatures of its chain files, flattened theme)
+        self._bases: Dict[str, Tuple[tuple, ResolvedTheme]] = {}
+        self._found: Dict[str, Optional[Path]] = {}
+
+    def find_base(self, theme_id: str) -> Optional[Path]:
+        if theme_id in self._found:
+            return self._found[theme_id]
+        file_name = BASE_THEME_FILES.get(theme_id, f'{theme_id}.theme.json')
+        found = None
+        for base_dir in self.base_dirs:
+            direct = base_dir / file_name
+            if direct.exists():
+                found = direct
+                break
+            found = next(iter(sorted(base_dir.rglob(file_name))), None)
+            if found is not None:
+                break
+        self._found[theme_id] = found
+        return found
+
+    def chain_paths(self, theme_id: Optional[str]) -> List[Path]:
+        """Files of a parentTheme id and its own parents found in the base directories, nearest first.
+
+        Parents read from jars are not included; the chain stops at the first parent that is
+        not a file.
+        """
+        paths: List[Path] = []
+        while theme_id:
+            path = self.find_base(theme_id)
+            if path is None or path in paths:
+                break
+            paths.append(path)
+            theme_id = load_json(path).get('parentTheme')
+        return paths
+
+    def parent_paths(self, theme: Dict[str, Any]) -> List[Path]:
+        """Files of a theme's parentTheme chain, nearest parent first (see chain_paths)."""
+        return self.chain_paths(theme.get('parentTheme') or
+                                (DEFAULT_DARK_PARENT if theme.get('dark') else DEFAULT_LIGHT_PARENT))
+
+    def load_base(self, theme_id: str) -> Optional[Dict[str, Any]]:
+        """The raw theme.json of a parentTheme id, or None if it is not available."""
+        path = self.find_base(theme_id)
+        if path is not None:
+            return load_json(path)
+        file_name = BASE_THEME_FILES.get(theme_id, f'{theme_id}.theme.json')
+        for index in self.jar_indexes:
+            for entry in index.theme_json_entries():
+                if entry.rsplit('/', 1)[-1] == file_name:
+                    return index.load_theme_json(entry)
+        return None
+
+    def resolve_base(self, theme_id: Optional[str], chain: tuple = ()) -> ResolvedTheme:
+        """Flattened parent theme, cached per resolver (and per file through theme_common).
+
+        Both caches are keyed by the size and mtime of every file in the parent chain, so
+        an edited grandparent is picked up like an edited parent.
+        """
+        if not theme_id:
+            return ResolvedTheme(None, [], {}, {})
+        if theme_id in chain:
+            log.warning('parent_cycle', chain=' -> '.join(chain + (theme_id,)))
+            return ResolvedTheme(None, [], {}, {})
+        paths = self.chain_paths(theme_id)
+        signature = tuple(file_signature(path) for path in paths)
+        if theme_id in self._bases and self._bases[theme_id][0] == signature:
+            return self._bases[theme_id][1]
+
+        path = paths[0] if paths else None
+        if path is not None:
+            resolved = cached_load('resolved-theme', path,
+                                   lambda p: self._resolve_raw(load_json(p), chain + (theme_id,)), depends=paths[1:])
+        else:
+            theme = self.load_base(theme_id)
+            if theme is None:
+                log.warning('parent_theme_missing', parent=theme_id, searched=[str(d) for d in self.base_dirs])
+                resolved = ResolvedTheme(None, [], {}, {})
+            else:
+                resolved = self._resolve_raw(theme, chain + (theme_id,))
+        self._bases[theme_id] = (signature, resolved)
+        return resolved
+
+    def _resolve_raw(self, theme: Dict[str, Any], chain: tuple) -> ResolvedTheme:
+        return self.resolve_base(theme.get('parentTheme'), chain).merged_with(theme)
+
+    def resolve(self, theme: Dict[str, Any]) -> ResolvedTheme:
+        """A theme.json (already loaded) merged over its parentTheme chain.
+
+        Without parentTheme, IntelliJ builds the theme on Darcula (dark) or IntelliJ (light).
+        """
+        parent = theme.get('parentTheme') or (DEFAULT_DARK_PARENT if theme.get('dark') else DEFAULT_LIGHT_PARENT)
+        return self.resolve_base(parent).merged_with(theme)
+
+    def resolve_file(self, path: PathLike) -> ResolvedTheme:
+        return self.resolve(load_json(path))
+
+    def preload(self) -> int:
+        """Resolve every bundled parent theme that is available; returns how many were found."""
+        return sum(1 for theme_id in BASE_THEME_FILES
+                   if self.find_base(theme_id) is not None and self.resolve_base(theme_id).chain)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Print effective .theme.json values, with parentTheme inheritance and named colors resolved',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument('theme', type=Path, help='.theme.json file')
+    parser.add_argument('keys', nargs='*', help='Flattened ui keys, e.g. ToolWindow.Button.hoverBackground')
+    parser.add_argument('--dump', action='store_true', help='Print every effective ui key')
+    parser.add_argument('--base-dir', type=Path, action='append',
+                        help=f'Directory with parent themes (default: {EXTRACTED_THEMES_DIR.name}/)')
+    add_logging_arguments(parser)
+
+    args = parser.parse_args()
+    configure_from_args(args)
+
+    resolver = ThemeResolver(args.base_dir or (EXTRACTED_THEMES_DIR,))
+    try:
+        resolved = resolver.resolve_file(args.theme)
+    except ValueError as e:
+        print(f"❌ {e}")
+        return 1
+
+    print(f"🎨 {' -> '.join(name or '?' for name in resolved.chain)}")
+    keys = sorted(resolved.ui) if args.dump else args.keys
+    for key in keys:
+        print(f"{key} = {resolved.get(key)}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
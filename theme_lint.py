@@ -0,0 +1,313 @@
+#!/usr/bin/env python3
+"""
+Consistency linter for all themes.
+
+Checks declarative rules against every .theme.json and its editor scheme:
+
+    required    keys a theme must define, e.g. the ToolWindow hover colors of light themes
+    not_null    named colors / ui values that are null
+    luminance   a color's relative luminance must fall in a range for dark / light themes
+
+plus two structural checks: the editorScheme of every theme.json exists, and every
+active themeProvider in plugin.xml points at an existing file, with no duplicates.
+
+Keys use the notation of theme_corpus.py: "ui.ToolWindow.Button.hoverBackground"
+(declared in theme.json), "named.hover" (theme.json `colors`), "colors.CARET_ROW_COLOR"
+(scheme <colors>) and "attr.TEXT.BACKGROUND" (scheme attribute, baseAttributes resolved).
+
+Findings are cached per theme by the hash of its theme.json and scheme bytes (and of the
+rules and this file), so a warm run only hashes files; changed themes are linted in parallel.
+
+Usage:
+    python3 theme_lint.py
+    python3 theme_lint.py --rules my_rules.json --json build/lint.json
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import sys
+from functools import partial
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from plugin_xml import PLUGIN_XML, read_theme_providers, theme_index, validate_providers
+from theme_common import (THEMES_DIR, IntelliJScheme, PathLike, canonical_digest, load_json, load_scheme,
+                          luminance_rgb, parallel_map, parse_hex_rgba, parse_scheme_rgba, write_text)
+from theme_inheritance import flatten_ui
+from theme_log import add_logging_arguments, configure_from_args, get_logger
+
+log = get_logger('lint')
+
+CACHE_VERSION = 1
+CACHE_FILE = Path(os.environ.get('XDG_CACHE_HOME') or Path.home() / '.cache') / 'dark-themes' / 'lint.json'
+
+DEFAULT_RULES: List[Dict[str, Any]] = [
+    {
+        'id': 'toolwindow-hover',
+        'rule': 'required',
+        'when': {'dark': False},
+        'keys': ['ui.ToolWindow.HeaderTab.hoverBackground', 'ui.ToolWindow.HeaderTab.hoverInactiveBackground',
+                 'ui.ToolWindow.Button.hoverBackground'],
+        'severity': 'warning',
+        'hint': 'python3 theme_patch.py patches/toolwindow_hover.json',
+    },
+    {
+        'id': 'islands-layout',
+        'rule': 'required',
+        'when': {'dark': True},
+        'keys': ['named.background', 'named.selectionBackground', 'ui.Islands', 'ui.Island.arc',
+                 'ui.MainWindow.background', 'ui.EditorTabs.underlinedTabBackground'],
+        'severity': 'warning',
+        'hint': 'python3 update_all_dark_themes.py',
+    },
+    {
+        'id': 'null-colors',
+        'rule': 'not_null',
+        'severity': 'error',
+    },
+    {
+        'id': 'editor-background',
+        'rule': 'luminance',
+        'key': 'attr.TEXT.BACKGROUND',
+        'dark': [0.0, 0.2],
+        'light': [0.5, 1.0],
+        'severity': 'error',
+    },
+    {
+        'id': 'editor-foreground',
+        'rule': 'luminance',
+        'key': 'attr.TEXT.FOREGROUND',
+        'dark': [0.3, 1.0],
+        'light': [0.0, 0.3],
+        'severity': 'error',
+    },
+]
+
+RULE_KINDS = ('required', 'not_null', 'luminance')
+
+
+class LintContext:
+    """One theme.json with its scheme, and lookups in the rule key notation."""
+
+    def __init__(self, theme_json: Dict[str, Any], scheme: Optional[IntelliJScheme]):
+        self.theme_json = theme_json
+        self.scheme = scheme
+        self.dark = bool(theme_json.get('dark', False))
+        self.ui = flatten_ui(theme_json.get('ui') or {})
+        self.named = theme_json.get('colors') or {}
+
+    def has(self, key: str) -> bool:
+        section, _, name = key.partition('.')
+        if section == 'ui':
+            return name in self.ui
+        if section == 'named':
+            return name in self.named
+        return self.get(key) is not None
+
+    def get(self, key: str) -> Any:
+        section, _, name = key.partition('.')
+        if section == 'ui':
+            value = self.ui.get(name)
+            return self.named.get(value, value) if isinstance(value, str) else value
+        if section == 'named':
+            return self.named.get(name)
+        if self.scheme is None:
+            return None
+        if section == 'colors':
+            return self.scheme.colors.get(name)
+        if section == 'attr':
+            attribute, _, field = name.rpartition('.')
+            return self.scheme.resolve_attribute(attribute).get(field)
+        raise ValueError(f"unknown key section in {key!r}")
+
+    def rgba(self, key: str) -> Optional[Tuple[int, int, int, int]]:
+        """Color of a key; scheme values are read the IntelliJ way, theme.json values as CSS hex."""
+        value = self.get(key)
+        if key.partition('.')[0] in ('colors', 'attr'):
+            return parse_scheme_rgba(value)
+        return parse_hex_rgba(value)
+
+
+def finding(theme: str, rule: Dict[str, Any], message: str) -> Dict[str, Any]:
+    result = {'theme': theme, 'rule': rule['id'], 'severity': rule.get('severity', 'error'), 'message': message}
+    if rule.get('hint'):
+        result['hint'] = rule['hint']
+    return result
+
+
+def check_rule(theme: str, rule: Dict[str, Any], context: LintContext) -> List[Dict[str, Any]]:
+    when = rule.get('when') or {}
+    if 'dark' in when and when['dark'] != context.dark:
+        return []
+
+    kind = rule['rule']
+    if kind == 'required':
+        missing = [key for key in rule['keys'] if not context.has(key)]
+        return [finding(theme, rule, f"missing {', '.join(missing)}")] if missing else []
+
+    if kind == 'not_null':
+        nulls = [f'named.{k}' for k, v in context.named.items() if v is None]
+        nulls += [f'ui.{k}' for k, v in context.ui.items() if v is None]
+        return [finding(theme, rule, f"null value for {', '.join(nulls)}")] if nulls else []
+
+    if kind == 'luminance':
+        rgba = context.rgba(rule['key'])
+        if rgba is None:
+            return []
+        low, high = rule['dark' if context.dark else 'light']
+        luminance = luminance_rgb(*rgba[:3])
+        if not low <= luminance <= high:
+            kind_name = 'dark' if context.dark else 'light'
+            return [finding(theme, rule, f"{rule['key']} luminance {luminance:.2f} outside "
+                                         f"{low}-{high} for a {kind_name} theme")]
+        return []
+
+    raise ValueError(f"unknown rule kind {kind!r} in {rule['id']}")
+
+
+def editor_scheme_path(theme_json_path: Path, theme_json: Dict[str, Any]) -> Optional[Path]:
+    """The file editorScheme names ("/themes/x.xml" is relative to the themes directory's parent)."""
+    editor_scheme = theme_json.get('editorScheme')
+    if not editor_scheme or not editor_scheme.endswith('.xml'):
+        return None
+    return theme_json_path.parent.parent / editor_scheme.lstrip('/')
+
+
+def lint_theme(theme_json_path: Path, rules: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Findings for one theme.json. Runs inside a worker process."""
+    theme = theme_json_path.name
+    try:
+        theme_json = load_json(theme_json_path)
+    except ValueError as e:
+        return [{'theme': theme, 'rule': 'parse', 'severity': 'error', 'message': str(e)}]
+
+    findings = []
+    scheme = None
+    scheme_path = editor_scheme_path(theme_json_path, theme_json)
+    if scheme_path is None:
+        # A bare name ("Light") selects a bundled scheme, which is fine
+        if not theme_json.get('editorScheme'):
+            findings.append({'theme': theme, 'rule': 'editor-scheme', 'severity': 'error',
+                             'message': 'no editorScheme'})
+    elif not scheme_path.exists():
+        findings.append({'theme': theme, 'rule': 'editor-scheme', 'severity': 'error',
+                         'message': f"editorScheme {theme_json['editorScheme']} does not exist"})
+    else:
+        try:
+            scheme = load_scheme(scheme_path)
+        except ValueError as e:
+            findings.append({'theme': theme, 'rule': 'editor-scheme', 'severity': 'error', 'message': str(e)})
+
+    context = LintContext(theme_json, scheme)
+    for rule in rules:
+        findings += check_rule(theme, rule, context)
+    return findings
+
+
+def lint_providers(plugin_xml: Path, themes_dir: Path) -> List[Dict[str, Any]]:
+    """Missing files and duplicates in plugin.xml (orphaned themes are plugin_xml.py's warning)."""
+    problems = validate_providers(read_theme_providers(plugin_xml), theme_index(themes_dir), themes_dir)
+    return [{'theme': plugin_xml.name, 'rule': 'theme-provider', 'severity': 'error',
+             'message': f"line {problem['line']}: {problem['message']}"}
+            for problem in problems if problem['severity'] == 'error']
+
+
+def input_hash(theme_json_path: Path) -> str:
+    """Hash of a theme.json and the scheme it names; the key of the findings cache."""
+    digest = hashlib.sha1()
+    data = theme_json_path.read_bytes()
+    digest.update(data)
+    try:
+        scheme_path = editor_scheme_path(theme_json_path, json.loads(data))
+    except ValueError:
+        scheme_path = None
+    if scheme_path is not None and scheme_path.exists():
+        digest.update(scheme_path.read_bytes())
+    return digest.hexdigest()
+
+
+def rules_digest(rules: List[Dict[str, Any]]) -> str:
+    return canonical_digest([rules, hashlib.sha1(Path(__file__).read_bytes()).hexdigest()])
+
+
+def lint_all(themes_dir: PathLike = THEMES_DIR, rules: Optional[List[Dict[str, Any]]] = None,
+             plugin_xml: PathLike = PLUGIN_XML, cache_file: Optional[Path] = CACHE_FILE,
+             workers: Optional[int] = None) -> Tuple[List[Dict[str, Any]], int]:
+    """Lint every theme; returns the findings and the number of themes that were actually checked."""
+    themes_dir = Path(themes_dir)
+    rules = DEFAULT_RULES if rules is None else rules
+    for rule in rules:
+        if rule.get('rule') not in RULE_KINDS:
+            raise ValueError(f"unknown rule kind {rule.get('rule')!r} in {rule.get('id')}")
+
+    digest = rules_digest(rules)
+    cache: Dict[str, Any] = {}
+    if cache_file is not None:
+        try:
+            cached = json.loads(cache_file.read_text(encoding='utf-8'))
+            if cached.get('version') == CACHE_VERSION and cached.get('rules') == digest:
+                cache = cached['themes']
+        except (OSError, ValueError, KeyError):
+            pass
+
+    paths = sorted(themes_dir.glob('*.theme.json'))
+    hashes = {path.name: input_hash(path) for path in paths}
+    stale = [path for path in paths if cache.get(path.name, {}).get('hash') != hashes[path.name]]
+    for path, findings in zip(stale, parallel_map(partial(lint_theme, rules=rules), stale, workers)):
+        cache[path.name] = {'hash': hashes[path.name], 'findings': findings}
+
+    if cache_file is not None and stale:
+        write_text(cache_file, json.dumps({
+            'version': CACHE_VERSION,
+            'rules': digest,
+            'themes': {name: cache[name] for name in hashes},
+        }))
+
+    findings = [item for path in paths for item in cache[path.name]['findings']]
+    findings += lint_providers(Path(plugin_xml), themes_dir)
+    return findings, len(stale)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Check every theme against declarative consistency rules',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument('--themes-dir', type=Path, default=THEMES_DIR, help='Directory with .theme.json files')
+    parser.add_argument('--plugin-xml', type=Path, default=PLUGIN_XML, help='Plugin descriptor to check')
+    parser.add_argument('--rules', type=Path, help='JSON file with a list of rules (default: built-in rules)')
+    parser.add_argument('--json', type=Path, help='Write the findings as JSON to this file')
+    parser.add_argument('--no-cache', action='store_true', help='Lint every theme instead of using the cache')
+    parser.add_argument('-j', '--workers', type=int, default=None, help='Worker processes (default: CPU count)')
+    add_logging_arguments(parser)
+
+    args = parser.parse_args()
+    configure_from_args(args)
+
+    try:
+        rules = load_json(args.rules) if args.rules else None
+        findings, checked = lint_all(args.themes_dir, rules, args.plugin_xml,
+                                     None if args.no_cache else CACHE_FILE, args.workers)
+    except ValueError as e:
+        print(f"❌ {e}")
+        return 1
+
+    if args.json:
+        write_text(args.json, json.dumps(findings, indent=2, ensure_ascii=False))
+
+    for item in findings:
+        icon = '❌' if item['severity'] == 'error' else '⚠️ '
+        print(f"{icon} {item['theme']}: [{item['rule']}] {item['message']}")
+        if item.get('hint'):
+            print(f"     fix: {item['hint']}")
+        log.info('lint_finding', **item)
+
+    errors = sum(1 for item in findings if item['severity'] == 'error')
+    print(f"\n📋 {len(findings)} findings ({errors} errors), {checked} themes checked, rest cached")
+    return 1 if errors else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
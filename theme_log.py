@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+Logging setup shared by the theme scripts.
+
+Library code logs events with structured fields instead of printing:
+
+    log = get_logger('sublime')
+    log.info('converted', theme=theme_name, rules=len(rules))
+
+The default level is WARNING so converters stay quiet under the batch runner.
+`-v` enables INFO, `-vv` DEBUG, and `--log-json` switches to one JSON object per
+line (ts, level, logger, event + fields) for CI logs and downstream tools.
+"""
+
+import argparse
+import json
+import logging
+import sys
+from typing import Any, Dict, Optional, TextIO
+
+ROOT_LOGGER = 'dark_themes'
+
+# LogRecord keywords that must not be turned into structured fields
+_LOGGING_KWARGS = ('exc_info', 'stack_info', 'stacklevel', 'extra')
+
+
+class StructuredLogger(logging.LoggerAdapter):
+    """Logger adapter that turns keyword arguments into structured fields."""
+
+    def process(self, msg, kwargs):
+        fields = {key: kwargs.pop(key) for key in list(kwargs) if key not in _LOGGING_KWARGS}
+        extra = dict(kwargs.get('extra') or {})
+        extra['fields'] = fields
+        kwargs['extra'] = extra
+        return msg, kwargs
+
+
+class JsonLinesFormatter(logging.Formatter):
+    """One JSON object per record."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry: Dict[str, Any] = {
+            'ts': round(record.created, 3),
+            'level': record.levelname.lower(),
+            'logger': record.name,
+            'event': record.getMessage(),
+        }
+        entry.update(getattr(record, 'fields', None) or {})
+        if record.exc_info:
+            entry['exc'] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class TextFormatter(logging.Formatter):
+    """Human readable 'level logger: event key=value ...' lines."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        fields = getattr(record, 'fields', None) or {}
+        text = f"{record.levelname.lower():<7} {record.name}: {record.getMessage()}"
+        if fields:
+            text += ' ' + ' '.join(f'{key}={value}' for key, value in fields.items())
+        if record.exc_info:
+            text += '\n' + self.formatException(record.exc_info)
+        return text
+
+
+def get_logger(name: str) -> StructuredLogger:
+    """Return the structured logger for one script/module."""
+    return StructuredLogger(logging.getLogger(f'{ROOT_LOGGER}.{name}'), {})
+
+
+def configure_logging(verbosity: int = 0, json_lines: bool = False, stream: Optional[TextIO] = None) -> None:
+    """Install the handler for all theme loggers (safe to call more than once)."""
+    level = logging.WARNING
+    if verbosity == 1:
+        level = logging.INFO
+    elif verbosity >= 2:
+        level = logging.DEBUG
+
+    root = logging.getLogger(ROOT_LOGGER)
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+
+    handler = logging.StreamHandler(stream or sys.stderr)
+    handler.setFormatter(JsonLinesFormatter() if json_lines else TextFormatter())
+    root.addHandler(handler)
+    root.setLevel(level)
+    root.propagate = False
+
+
+def add_logging_arguments(parser: argparse.ArgumentParser) -> None:
+    """Add the shared -v/--verbose and --log-json options to a script's parser."""
+    parser.add_argument('-v', '--verbose', action='count', default=0,
+                        help='More log output (-v info, -vv debug)')
+    parser.add_argument('--log-json', action='store_true',
+                        help='Emit log records as JSON lines on stderr')
+
+
+def configure_from_args(args: argparse.Namespace) -> None:
+    configure_logging(args.verbose, args.log_json)
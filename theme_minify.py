@@ -0,0 +1,243 @@
+#!/usr/bin/env python3
+"""
+Build-time minifier for the plugin's theme resources.
+
+Writes a compact copy of src/main/resources/themes into a build directory:
+
+    scheme XML   indentation and comments removed, color values normalized
+                 ("#FFAA00" -> "ffaa00"), duplicate options collapsed (the last one is
+                 the one IntelliJ keeps); with --ide-lib, <colors> options and attributes
+                 defined exactly like in the bundled parent scheme (parent_scheme="Darcula")
+                 are dropped, since IntelliJ falls back to the parent for them
+    theme.json   serialized without whitespace
+
+Every minified scheme is parsed again and its resolved colors and attributes (merged
+over the parent scheme when one is known) are compared with the original's; a scheme
+that does not match is copied unchanged and reported.
+
+Usage:
+    python3 theme_minify.py -o build/minified
+    python3 theme_minify.py -o build/minified --ide-lib "/Applications/IntelliJ IDEA CE.app/Contents/lib"
+"""
+
+import argparse
+import json
+import shutil
+import sys
+import xml.etree.ElementTree as ET
+from functools import partial
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from theme_common import THEMES_DIR, IntelliJScheme, parallel_map, parse_scheme_data, write_text
+from theme_diff import normalize_value
+from theme_log import add_logging_arguments, configure_from_args, get_logger
+
+log = get_logger('minify')
+
+DEFAULT_OUT_DIR = Path(__file__).parent / 'build' / 'minified'
+
+# Attribute <value> options that hold colors
+COLOR_FIELDS = ('FOREGROUND', 'BACKGROUND', 'EFFECT_COLOR', 'ERROR_STRIPE_COLOR')
+
+
+def normalize_color(value: str) -> str:
+    return value.strip().lstrip('#').lower()
+
+
+def option_definition(option: ET.Element) -> str:
+    """Layout-independent form of an option, for comparing it with the parent scheme's."""
+    return ET.tostring(option, encoding='unicode').replace('\n', '').replace(' ', '')
+
+
+def _strip_whitespace(element: ET.Element) -> None:
+    for node in element.iter():
+        if node.text is not None and not node.text.strip():
+            node.text = None
+        node.tail = None
+
+
+def _dedupe_options(section: ET.Element) -> int:
+    """Keep only the last <option> of each name, in the position of that last one."""
+    options = section.findall('option')
+    last = {option.get('name'): option for option in options}
+    removed = 0
+    for option in options:
+        if last[option.get('name')] is not option:
+            section.remove(option)
+            removed += 1
+    return removed
+
+
+def minify_scheme_root(root: ET.Element, parent: Optional[ET.Element] = None) -> Dict[str, int]:
+    """Minify a <scheme> element in place; returns counts of what was removed or rewritten."""
+    stats = {'duplicates': 0, 'normalized': 0, 'inherited': 0}
+
+    parent_options: Dict[str, Dict[str, str]] = {'colors': {}, 'attributes': {}}
+    if parent is not None:
+        for section_name in parent_options:
+            section = parent.find(section_name)
+            if section is not None:
+                for option in section.findall('option'):
+                    parent_options[section_name][option.get('name')] = option_definition(option)
+
+    colors = root.find('colors')
+    if colors is not None:
+        stats['duplicates'] += _dedupe_options(colors)
+        for option in colors.findall('option'):
+            value = option.get('value')
+            if value is not None and normalize_color(value) != value:
+                option.set('value', normalize_color(value))
+                stats['normalized'] += 1
+
+    attributes = root.find('attributes')
+    if attributes is not None:
+        stats['duplicates'] += _dedupe_options(attributes)
+        for option in attributes.findall('option'):
+            for value_option in option.iter('option'):
+                value = value_option.get('value')
+                if value_option.get('name') in COLOR_FIELDS and value and normalize_color(value) != value:
+                    value_option.set('value', normalize_color(value))
+                    stats['normalized'] += 1
+
+    _strip_whitespace(root)
+
+    # Child options are compared normalized; bundled schemes already use lowercase hex
+    for section_name in parent_options:
+        section = root.find(section_name)
+        if section is None or not parent_options[section_name]:
+            continue
+        for option in section.findall('option'):
+            if parent_options[section_name].get(option.get('name')) == option_definition(option):
+                section.remove(option)
+                stats['inherited'] += 1
+    return stats
+
+
+def effective_scheme(scheme: IntelliJScheme, parent: Optional[IntelliJScheme]) -> Dict[str, Any]:
+    """Normalized colors and resolved attributes, with the parent scheme's as fallback."""
+    if parent is not None:
+        scheme = IntelliJScheme(scheme.name, scheme.parent_scheme,
+                                {**parent.colors, **scheme.colors}, {**parent.attributes, **scheme.attributes})
+    return {
+        'colors': {name: normalize_value(normalize_color(value)) for name, value in scheme.colors.items()},
+        'attributes': {name: {key: normalize_value(normalize_color(value)) if key in COLOR_FIELDS else value
+                              for key, value in scheme.resolve_attribute(name).items()}
+                       for name in scheme.attributes},
+    }
+
+
+def minify_scheme_file(path: Path, out_dir: Path, parents: Dict[str, bytes]) -> Dict[str, Any]:
+    """Minify one scheme into `out_dir` and verify it. Runs inside a worker process."""
+    result: Dict[str, Any] = {'file': path.name, 'before': path.stat().st_size}
+    data = path.read_bytes()
+    try:
+        root = ET.fromstring(data)
+        parent_data = parents.get(root.get('parent_scheme') or '')
+        parent_root = ET.fromstring(parent_data) if parent_data else None
+        stats = minify_scheme_root(root, parent_root)
+        minified = ET.tostring(root, encoding='unicode')
+
+        parent_scheme = parse_scheme_data(parent_data) if parent_data else None
+        verified = (effective_scheme(parse_scheme_data(data), parent_scheme) ==
+                    effective_scheme(parse_scheme_data(minified), parent_scheme))
+    except (ET.ParseError, ValueError) as e:
+        result.update(error=str(e))
+        verified, minified, stats = False, None, {}
+
+    target = out_dir / path.name
+    if not verified:
+        log.warning('minify_unverified', file=path.name, error=result.get('error'))
+        target.parent.mkdir(parents=True, exist_ok=True)
+        shutil.copyfile(path, target)
+        result.update(after=result['before'], verified=False)
+        return result
+
+    write_text(target, minified)
+    result.update(stats, after=len(minified.encode('utf-8')), verified=True)
+    return result
+
+
+def minify_theme_json_file(path: Path, out_dir: Path) -> Dict[str, Any]:
+    result: Dict[str, Any] = {'file': path.name, 'before': path.stat().st_size, 'verified': True}
+    try:
+        theme_json = json.loads(path.read_text(encoding='utf-8'))
+    except ValueError as e:
+        result.update(error=str(e), verified=False, after=result['before'])
+        shutil.copyfile(path, out_dir / path.name)
+        return result
+    text = json.dumps(theme_json, separators=(',', ':'), ensure_ascii=False)
+    write_text(out_dir / path.name, text)
+    result['after'] = len(text.encode('utf-8'))
+    return result
+
+
+def _minify_entry(path: Path, out_dir: Path, parents: Dict[str, bytes]) -> Dict[str, Any]:
+    if path.name.endswith('.theme.json'):
+        return minify_theme_json_file(path, out_dir)
+    return minify_scheme_file(path, out_dir, parents)
+
+
+def load_parent_schemes(ide_lib: Optional[Path], names: List[str]) -> Dict[str, bytes]:
+    """Raw XML of the bundled schemes named by parent_scheme, read from the IDE's jars."""
+    if ide_lib is None or not names:
+        return {}
+    from intellij_jar import SCHEME_KIND, find_theme_jars
+    parents = {}
+    indexes = find_theme_jars(ide_lib)
+    for name in names:
+        for index in indexes:
+            # Only schemes: the Darcula theme.json has the same name as the Darcula scheme
+            entry = index.find(name, SCHEME_KIND)
+            if entry is not None:
+                parents[name] = index.read(entry)
+                break
+        else:
+            log.warning('parent_scheme_missing', parent=name, lib=str(ide_lib))
+    return parents
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Write minified, verified copies of the theme resources into a build directory',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument('--themes-dir', type=Path, default=THEMES_DIR, help='Directory with scheme XML files')
+    parser.add_argument('-o', '--output', type=Path, default=DEFAULT_OUT_DIR, help='Output directory')
+    parser.add_argument('--ide-lib', type=Path,
+                        help='IntelliJ lib directory; drop options equal to the bundled parent scheme')
+    parser.add_argument('-j', '--workers', type=int, default=None, help='Worker processes (default: CPU count)')
+    add_logging_arguments(parser)
+
+    args = parser.parse_args()
+    configure_from_args(args)
+
+    paths = sorted(args.themes_dir.glob('*.xml')) + sorted(args.themes_dir.glob('*.theme.json'))
+    if not paths:
+        print("❌ No theme resources found!")
+        return 1
+
+    parent_names = sorted({ET.parse(path).getroot().get('parent_scheme') or '' for path in paths
+                           if path.suffix == '.xml'} - {''}) if args.ide_lib else []
+    parents = load_parent_schemes(args.ide_lib, parent_names)
+
+    args.output.mkdir(parents=True, exist_ok=True)
+    results = parallel_map(partial(_minify_entry, out_dir=args.output, parents=parents), paths, args.workers)
+
+    failed = [r for r in results if not r['verified']]
+    for result in failed:
+        print(f"❌ {result['file']}: not verified, copied unchanged {result.get('error') or ''}")
+    for result in results:
+        log.info('resource_minified', **result)
+
+    before = sum(r['before'] for r in results)
+    after = sum(r['after'] for r in results)
+    inherited = sum(r.get('inherited', 0) for r in results)
+    print(f"✅ {len(results) - len(failed)}/{len(results)} files minified: {before / 1024:.0f} KB -> "
+          f"{after / 1024:.0f} KB ({100 - after * 100 / before:.0f}% smaller"
+          f"{f', {inherited} options inherited from parent schemes' if parents else ''}) -> {args.output}")
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
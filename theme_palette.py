@@ -0,0 +1,275 @@
+#!/usr/bin/env python3
+"""
+Palette extraction for converted themes.
+
+Clusters every color literal of a theme into a compact palette: colors are converted
+to CIELAB once, sorted by how often they are used, and each joins the first palette
+entry within the ΔE threshold (same alpha only) or starts a new entry. The default
+threshold (2.3, a just noticeable difference) merges near duplicates; 0 merges only
+exact duplicates such as "#d4be98" / "#D4BE98".
+
+The outputs are rewritten to reference the palette:
+
+    Sublime   one variable per palette entry, other variables become var() aliases
+              of it and rule/global literals become var() references
+    Fleet     one palette name per entry, references to merged names are rewritten
+
+Usage:
+    python3 theme_palette.py                          # palette size report for all schemes
+    python3 theme_palette.py --delta-e 4 -o build/palette --only gruvbox
+"""
+
+import argparse
+import copy
+import sys
+from collections import Counter
+from functools import partial
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from theme_common import (THEMES_DIR, delta_e, dump_json, parallel_map, parse_hex_rgba, rgb_to_lab,
+                          write_text)
+from theme_emitters import ThemeJob
+from theme_log import add_logging_arguments, configure_from_args, get_logger
+
+log = get_logger('palette')
+
+# CIE76 just noticeable difference
+DEFAULT_DELTA_E = 2.3
+
+# Sublime rule / global keys that hold colors
+SUBLIME_COLOR_KEYS = ('foreground', 'background', 'selection_foreground')
+
+
+def is_color_literal(value: Any) -> bool:
+    return isinstance(value, str) and value.startswith('#') and parse_hex_rgba(value) is not None
+
+
+def extract_palette(colors: Iterable[str], threshold: float = DEFAULT_DELTA_E) -> Dict[str, str]:
+    """Map every color literal in `colors` (one item per use) to its palette representative.
+
+    Representatives keep the spelling of their first occurrence.
+    """
+    uses: Counter = Counter()
+    spelling: Dict[Tuple[int, int, int, int], str] = {}
+    literals: Dict[str, Tuple[int, int, int, int]] = {}
+    for color in colors:
+        rgba = literals.get(color) or parse_hex_rgba(color)
+        if rgba is None:
+            continue
+        literals[color] = rgba
+        spelling.setdefault(rgba, color)
+        uses[rgba] += 1
+
+    # Most used colors become palette entries first; ties keep first-seen order
+    centroids: List[Tuple[Tuple[int, int, int, int], Tuple[float, float, float]]] = []
+    representative: Dict[Tuple[int, int, int, int], Tuple[int, int, int, int]] = {}
+    for rgba, _ in uses.most_common():
+        lab = rgb_to_lab(*rgba[:3])
+        for centroid, centroid_lab in centroids:
+            if centroid[3] == rgba[3] and delta_e(lab, centroid_lab) <= threshold:
+                representative[rgba] = centroid
+                break
+        else:
+            centroids.append((rgba, lab))
+            representative[rgba] = rgba
+
+    return {color: spelling[representative[rgba]] for color, rgba in literals.items()}
+
+
+def compact_sublime(theme: Dict[str, Any], threshold: float = DEFAULT_DELTA_E) -> Dict[str, Any]:
+    """Return a copy of a Sublime color scheme whose colors reference the extracted palette."""
+    theme = copy.deepcopy(theme)
+    variables = theme.get('variables', {})
+    globals_dict = theme.get('globals', {})
+    rules = theme.get('rules', [])
+
+    occurrences = [value for value in variables.values() if is_color_literal(value)]
+    occurrences += [value for value in globals_dict.values() if is_color_literal(value)]
+    occurrences += [rule[key] for rule in rules for key in SUBLIME_COLOR_KEYS if is_color_literal(rule.get(key))]
+    palette = extract_palette(occurrences, threshold)
+
+    # The first variable holding a color of an entry owns it, the others alias the owner
+    owner: Dict[str, str] = {}
+    for name, value in variables.items():
+        if not is_color_literal(value):
+            continue
+        entry = palette[value]
+        if entry in owner:
+            variables[name] = f'var({owner[entry]})'
+        else:
+            owner[entry] = name
+            variables[name] = entry
+
+    # Entries used more than once outside the variables get a variable of their own
+    outside = Counter(palette[value] for value in globals_dict.values() if is_color_literal(value))
+    outside.update(palette[rule[key]] for rule in rules for key in SUBLIME_COLOR_KEYS
+                   if is_color_literal(rule.get(key)))
+    for entry, count in outside.items():
+        if entry not in owner and count > 1:
+            name = f'palette_{len(owner)}'
+            variables[name] = entry
+            owner[entry] = name
+
+    def reference(value: str) -> str:
+        entry = palette[value]
+        return f'var({owner[entry]})' if entry in owner else entry
+
+    # Point var() references at the owner, so aliases nobody else names can be dropped
+    aliases = {name: value for name, value in variables.items()
+               if value.startswith('var(') and value[4:-1] in variables and is_color_literal(variables[value[4:-1]])}
+
+    def rewrite(value: Any) -> Any:
+        if is_color_literal(value):
+            return reference(value)
+        if isinstance(value, str) and value[4:-1] in aliases and value.startswith('var('):
+            return aliases[value[4:-1]]
+        return value
+
+    for key, value in globals_dict.items():
+        globals_dict[key] = rewrite(value)
+    for rule in rules:
+        for key in SUBLIME_COLOR_KEYS:
+            if key in rule:
+                rule[key] = rewrite(rule[key])
+
+    # Aliases may still be named inside popup_css or other free-form strings
+    free_text = ' '.join(value for value in globals_dict.values() if isinstance(value, str))
+    theme['variables'] = {name: value for name, value in variables.items()
+                          if name not in aliases or f'var({name})' in free_text}
+    return theme
+
+
+def compact_fleet(theme: Dict[str, Any], threshold: float = DEFAULT_DELTA_E) -> Dict[str, Any]:
+    """Return a copy of a Fleet theme with near-duplicate palette entries merged."""
+    theme = copy.deepcopy(theme)
+    palette_in = theme.get('palette', {})
+    palette = extract_palette([value for value in palette_in.values() if is_color_literal(value)], threshold)
+
+    owner: Dict[str, str] = {}
+    renamed: Dict[str, str] = {}
+    merged_palette: Dict[str, str] = {}
+    for name, value in palette_in.items():
+        if not is_color_literal(value):
+            merged_palette[name] = value
+            continue
+        entry = palette[value]
+        if entry in owner:
+            renamed[name] = owner[entry]
+        else:
+            owner[entry] = name
+            merged_palette[name] = entry
+
+    def rewrite(node: Any) -> Any:
+        if isinstance(node, dict):
+            return {key: rewrite(value) for key, value in node.items()}
+        if isinstance(node, list):
+            return [rewrite(value) for value in node]
+        if isinstance(node, str):
+            if node in renamed:
+                return renamed[node]
+            if node in palette and palette[node] in owner:
+                return owner[palette[node]]
+        return node
+
+    for section in ('colors', 'textAttributes'):
+        if theme.get(section):
+            theme[section] = rewrite(theme[section])
+    theme['palette'] = merged_palette
+    return theme
+
+
+def count_colors(node: Any) -> int:
+    """Number of distinct color literals anywhere in a JSON document."""
+    found = set()
+
+    def walk(value: Any):
+        if isinstance(value, dict):
+            for item in value.values():
+                walk(item)
+        elif isinstance(value, list):
+            for item in value:
+                walk(item)
+        elif is_color_literal(value):
+            found.add(parse_hex_rgba(value))
+
+    walk(node)
+    return len(found)
+
+
+def compact_job(job: ThemeJob, threshold: float, out_dir: Optional[Path] = None) -> Dict[str, Any]:
+    """Convert one scheme to Sublime and Fleet with palette extraction. Runs inside a worker."""
+    # Imported here: the converters import this module for their --palette-delta-e option
+    from intellij_to_sublime_json import IntelliJToSublimeJSONConverter
+    from sublime_to_fleet import SublimeToFleetConverter
+
+    try:
+        sublime_converter = IntelliJToSublimeJSONConverter()
+        colors, attributes, theme_name = sublime_converter.extract_scheme(job.scheme)
+        sublime = sublime_converter.create_sublime_json_theme(colors, attributes, theme_name)
+        compacted = compact_sublime(sublime, threshold)
+        fleet = SublimeToFleetConverter(palette_threshold=threshold).convert(compacted)
+    except Exception as e:
+        return {'theme': job.stem, 'error': f'{type(e).__name__}: {e}'}
+
+    result = {
+        'theme': job.stem,
+        'colors_before': count_colors(sublime),
+        'colors_after': count_colors(compacted),
+        'bytes_before': len(dump_json(sublime, 4)),
+        'bytes_after': len(dump_json(compacted, 4)),
+        'fleet_palette': len(fleet['palette']),
+    }
+    if out_dir is not None:
+        write_text(out_dir / f'{job.stem}.sublime-color-scheme', dump_json(compacted, 4))
+        write_text(out_dir / f'{job.stem}_fleet.json', dump_json(fleet, 2))
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Extract compact color palettes and rewrite Sublime/Fleet outputs to use them',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument('--themes-dir', type=Path, default=THEMES_DIR, help='Directory with scheme XML files')
+    parser.add_argument('--only', action='append', help='Process only this scheme stem (repeatable)')
+    parser.add_argument('--delta-e', type=float, default=DEFAULT_DELTA_E,
+                        help=f'Merge colors closer than this CIE76 ΔE (default: {DEFAULT_DELTA_E}, 0 = exact duplicates)')
+    parser.add_argument('-o', '--output', type=Path, help='Write compacted Sublime and Fleet themes here')
+    parser.add_argument('-j', '--workers', type=int, default=None, help='Worker processes (default: CPU count)')
+    add_logging_arguments(parser)
+
+    args = parser.parse_args()
+    configure_from_args(args)
+
+    # discover_jobs lives in the batch runner, which imports the emitter registry
+    from theme_batch import discover_jobs
+    jobs = discover_jobs(args.themes_dir, args.only)
+    if not jobs:
+        print("❌ No schemes found!")
+        return 1
+
+    results = parallel_map(partial(compact_job, threshold=args.delta_e, out_dir=args.output), jobs, args.workers)
+
+    print(f"{'Theme':<26} {'colors':>13} {'bytes':>17} {'fleet':>6}")
+    failed = 0
+    for result in results:
+        if 'error' in result:
+            failed += 1
+            print(f"{result['theme']:<26} ❌ {result['error']}")
+            continue
+        print(f"{result['theme']:<26} {result['colors_before']:>5} -> {result['colors_after']:<5} "
+              f"{result['bytes_before']:>7} -> {result['bytes_after']:<7} {result['fleet_palette']:>6}")
+        log.info('palette_extracted', **result)
+
+    ok = [r for r in results if 'error' not in r]
+    before = sum(r['colors_before'] for r in ok)
+    after = sum(r['colors_after'] for r in ok)
+    print(f"\n🎨 {len(ok)} themes: {before} -> {after} distinct colors at ΔE {args.delta_e}")
+    if args.output:
+        print(f"✅ Written to {args.output}")
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,376 @@
+#!/usr/bin/env python3
+"""
+Declarative patches for .theme.json files.
+
+A patch file describes edits instead of code (see patches/ for the ones in use):
+
+    {
+      "description": "Add ToolWindow hover colors",
+      "when": {"dark": false},
+      "variables": {
+        "hover": ["color:hover", "ui:ActionButton.hoverBackground", "#00000012"]
+      },
+      "operations": [
+        {"op": "set_if_missing", "path": "ui/ToolWindow/Button/hoverBackground", "value": "$hover"}
+      ]
+    }
+
+Paths are "/"-separated (keys may contain dots, e.g. "ui/MainWindow.background") or lists.
+Operations, applied in order with key order preserved:
+
+    set             create or replace the value; an existing key keeps its position
+    set_if_missing  only if the key does not exist yet
+    delete          remove the key if present
+    insert_after    (re)place the key right after sibling "after", or at the end
+    order           move "keys" of the object at "path" to its front, in that order
+
+Any operation may carry "if_exists": <path> to run only when that path exists.
+Variables take the first source that yields a value: "scheme:OPTION" (an option of
+the theme's editor scheme, see theme_common.load_option_values), "color:name" (named
+color, parentTheme chain resolved), "ui:Flat.key" (effective ui value) or a literal.
+"own:color:name" and "own:ui:Flat.key" only take a key the theme defines itself (named
+colors still resolved), so a local value can be preferred over an inherited one.
+"$name" in values is replaced by the variable; a theme where a used variable has no
+value is skipped, unless its source list ends with null, which writes null like a
+missing scheme option always did.
+
+Every file is loaded once, all patches are applied in memory, and it is written back
+only if the document changed. Files are processed in parallel.
+
+Usage:
+    python3 theme_patch.py patches/toolwindow_hover.json
+    python3 theme_patch.py patches/islands.json --dark --dry-run
+    python3 theme_patch.py patches/islands.json --theme autumn --scheme autumn
+"""
+
+import argparse
+import copy
+import sys
+from functools import partial
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple, Union
+
+from theme_backends import json_dumps
+from theme_common import THEMES_DIR, PathLike, cached_load, dump_json, load_json, load_option_values, write_text
+from theme_inheritance import ResolvedTheme, ThemeResolver, flatten_ui
+from theme_log import add_logging_arguments, configure_from_args, get_logger
+from theme_progress import Progress
+from theme_runner import resilient_map
+
+log = get_logger('patch')
+
+PATCHES_DIR = Path(__file__).parent / 'patches'
+
+OPERATIONS = ('set', 'set_if_missing', 'delete', 'insert_after', 'order')
+
+_MISSING = object()
+
+
+def split_path(path: Union[str, List[str]]) -> List[str]:
+    if isinstance(path, list):
+        return path
+    return [part for part in path.split('/') if part]
+
+
+def _lookup(data: Any, keys: List[str]) -> Any:
+    for key in keys:
+        if not isinstance(data, dict) or key not in data:
+            return _MISSING
+        data = data[key]
+    return data
+
+
+def _parent(data: Dict[str, Any], keys: List[str], create: bool) -> Optional[Dict[str, Any]]:
+    """The object holding the last key of `keys`; intermediate objects are appended if `create`."""
+    for key in keys[:-1]:
+        if key not in data:
+            if not create:
+                return None
+            data[key] = {}
+        data = data[key]
+        if not isinstance(data, dict):
+            return None
+    return data
+
+
+def _rebuild(target: Dict[str, Any], items: List[Tuple[str, Any]]) -> None:
+    # Reorder in place so references to `target` held by the parent stay valid
+    target.clear()
+    target.update(items)
+
+
+class ThemePatch:
+    """A named list of operations with the variables they use."""
+
+    def __init__(self, name: str, operations: List[Dict[str, Any]],
+                 variables: Optional[Dict[str, List[Any]]] = None,
+                 when: Optional[Dict[str, Any]] = None,
+                 output_format: Optional[Dict[str, Any]] = None):
+        for operation in operations:
+            if operation.get('op') not in OPERATIONS:
+                raise ValueError(f"{name}: unknown operation {operation.get('op')!r}")
+            if 'path' not in operation:
+                raise ValueError(f"{name}: operation without path: {operation}")
+        self.name = name
+        self.operations = operations
+        self.variables = variables or {}
+        self.when = when or {}
+        self.output_format = output_format or {}
+
+    @classmethod
+    def from_dict(cls, name: str, data: Dict[str, Any]) -> 'ThemePatch':
+        return cls(name, data.get('operations', []), data.get('variables'), data.get('when'), data.get('format'))
+
+    @classmethod
+    def from_file(cls, path: PathLike) -> 'ThemePatch':
+        return cls.from_dict(Path(path).stem, load_json(path))
+
+    def applies_to(self, theme: Dict[str, Any]) -> bool:
+        return all(theme.get(key, False if isinstance(value, bool) else None) == value
+                   for key, value in self.when.items())
+
+    def resolve_variables(self, theme: Dict[str, Any], scheme_path: Optional[Path],
+                          resolver: ThemeResolver) -> Dict[str, Any]:
+        values: Dict[str, Any] = {}
+        resolved: Optional[ResolvedTheme] = None
+        own_ui: Optional[Dict[str, Any]] = None
+        for name, sources in self.variables.items():
+            sources = sources if isinstance(sources, list) else [sources]
+            if sources and sources[-1] is None:
+                values[name] = None
+            for source in sources:
+                value = None
+                if isinstance(source, str) and source.startswith('scheme:'):
+                    if scheme_path is not None:
+                        raw = load_option_values(scheme_path).get(source[len('scheme:'):], '').strip()
+                        value = ('#' + raw.lstrip('#')).upper() if raw else None
+                elif isinstance(source, str) and source.startswith(('color:', 'ui:', 'own:')):
+                    resolved = resolved or resolver.resolve(theme)
+                    own = source.startswith('own:')
+                    kind, key = source[len('own:'):].split(':', 1) if own else source.split(':', 1)
+                    if kind == 'color':
+                        defined = key in (theme.get('colors') or {}) if own else key in resolved.colors
+                        value = resolved.color(key) if defined else None
+                    elif own:
+                        own_ui = own_ui if own_ui is not None else flatten_ui(theme.get('ui') or {})
+                        value = resolved.get(key) if key in own_ui else None
+                    else:
+                        value = resolved.get(key)
+                else:
+                    value = source
+                if value not in (None, ''):
+                    values[name] = value
+                    break
+        return values
+
+    def substitute(self, value: Any, variables: Dict[str, Any]) -> Any:
+        if isinstance(value, str) and value.startswith('$'):
+            if value.startswith('$$'):
+                return value[1:]
+            name = value[1:]
+            if name not in variables:
+                raise KeyError(name)
+            return variables[name]
+        if isinstance(value, dict):
+            return {key: self.substitute(item, variables) for key, item in value.items()}
+        if isinstance(value, list):
+            return [self.substitute(item, variables) for item in value]
+        return value
+
+    def apply(self, theme: Dict[str, Any], variables: Dict[str, Any]) -> None:
+        """Apply every operation to `theme` in place. Raises KeyError for a missing variable."""
+        for operation in self.operations:
+            if 'if_exists' in operation and _lookup(theme, split_path(operation['if_exists'])) is _MISSING:
+                continue
+            op = operation['op']
+            keys = split_path(operation['path'])
+
+            if op == 'order':
+                target = _lookup(theme, keys) if keys else theme
+                if isinstance(target, dict):
+                    first = [key for key in operation.get('keys', []) if key in target]
+                    _rebuild(target, [(key, target[key]) for key in first] +
+                             [(key, value) for key, value in target.items() if key not in first])
+                continue
+
+            if op == 'delete':
+                parent = _parent(theme, keys, create=False)
+                if parent is not None:
+                    parent.pop(keys[-1], None)
+                continue
+
+            value = self.substitute(operation.get('value'), variables)
+            parent = _parent(theme, keys, create=True)
+            if parent is None:
+                log.warning('path_blocked', patch=self.name, path='/'.join(keys))
+                continue
+            key = keys[-1]
+            if op == 'set':
+                parent[key] = value
+            elif op == 'set_if_missing':
+                parent.setdefault(key, value)
+            elif op == 'insert_after':
+                items = [(k, v) for k, v in parent.items() if k != key]
+                after = operation.get('after')
+                position = next((i + 1 for i, (k, _) in enumerate(items) if k == after), len(items))
+                items.insert(position, (key, value))
+                _rebuild(parent, items)
+
+
+def load_patch(path: PathLike) -> ThemePatch:
+    """A patch file, parsed once per process while it is unchanged."""
+    return cached_load('theme-patch', path, ThemePatch.from_file)
+
+
+def format_theme(theme: Dict[str, Any], patches: Iterable[ThemePatch]) -> str:
+    """Serialize like the theme files in the repository, plus the patches' blank-line rules."""
+    indent = 2
+    blank_lines: List[Tuple[int, str]] = []
+    for patch in patches:
+        indent = patch.output_format.get('indent', indent)
+        rule = patch.output_format.get('blank_line_before')
+        if rule:
+            blank_lines += [(rule.get('depth', 1), key) for key in rule.get('keys', [])]
+
+    text = dump_json(theme, indent)
+    for depth, key in blank_lines:
+        prefix = ' ' * (indent * depth)
+        text = text.replace(f',\n{prefix}"{key}"', f',\n\n{prefix}"{key}"')
+    return text
+
+
+def scheme_for_theme(theme_json_path: Path, theme: Dict[str, Any]) -> Optional[Path]:
+    """The editor scheme XML next to a theme.json, via editorScheme or the file stem."""
+    editor_scheme = theme.get('editorScheme')
+    stem = Path(editor_scheme).stem if editor_scheme else theme_json_path.name[:-len('.theme.json')]
+    candidate = theme_json_path.parent / f'{stem}.xml'
+    return candidate if candidate.exists() else None
+
+
+def patch_theme(theme_json_path: PathLike, patches: List[ThemePatch], scheme_path: Optional[PathLike] = None,
+                dry_run: bool = False, resolver: Optional[ThemeResolver] = None) -> Dict[str, Any]:
+    """Load one theme.json, apply `patches` and write it back if it changed."""
+    theme_json_path = Path(theme_json_path)
+    result: Dict[str, Any] = {'theme': theme_json_path.name, 'status': 'unchanged', 'applied': [], 'skipped': {}}
+    try:
+        original = load_json(theme_json_path)
+    except ValueError as e:
+        result.update(status='failed', error=str(e))
+        return result
+
+    theme = copy.deepcopy(original)
+    scheme_path = Path(scheme_path) if scheme_path else scheme_for_theme(theme_json_path, original)
+    resolver = resolver or ThemeResolver()
+
+    applied = []
+    for patch in patches:
+        if not patch.applies_to(theme):
+            continue
+        try:
+            variables = patch.resolve_variables(theme, scheme_path, resolver)
+            candidate = copy.deepcopy(theme)
+            patch.apply(candidate, variables)
+        except KeyError as e:
+            result['skipped'][patch.name] = f'no value for variable {e.args[0]}'
+            log.warning('patch_skipped', theme=theme_json_path.name, patch=patch.name, missing=e.args[0])
+            continue
+        except ValueError as e:
+            result['skipped'][patch.name] = str(e)
+            log.warning('patch_skipped', theme=theme_json_path.name, patch=patch.name, error=str(e))
+            continue
+        theme = candidate
+        applied.append(patch)
+        result['applied'].append(patch.name)
+
+    if not applied:
+        result['status'] = 'skipped' if result['skipped'] else 'unchanged'
+        return result
+
+    # Order matters in theme files, so compare serializations rather than dicts
+    if json_dumps(theme, compact=True) == json_dumps(original, compact=True):
+        return result
+
+    result['status'] = 'updated'
+    if not dry_run:
+        write_text(theme_json_path, format_theme(theme, applied))
+    log.info('theme_patched', theme=theme_json_path.name, patches=result['applied'], dry_run=dry_run)
+    return result
+
+
+def _patch_entry(entry: Tuple[Path, Optional[Path]], patches: List[ThemePatch], dry_run: bool) -> Dict[str, Any]:
+    theme_json_path, scheme_path = entry
+    return patch_theme(theme_json_path, patches, scheme_path, dry_run)
+
+
+def _failed_entry(entry: Tuple[Path, Optional[Path]], error: str) -> Dict[str, Any]:
+    theme_json_path, _ = entry
+    return {'theme': theme_json_path.name, 'status': 'failed', 'applied': [], 'skipped': {}, 'error': error}
+
+
+def patch_themes(entries: List[Tuple[Path, Optional[Path]]], patches: List[ThemePatch],
+                 dry_run: bool = False, workers: Optional[int] = None, timeout: Optional[float] = None,
+                 memory_mb: Optional[int] = None,
+                 on_result: Optional[Callable[[int, Dict[str, Any]], None]] = None,
+                 progress: Optional[Progress] = None) -> List[Dict[str, Any]]:
+    """Apply `patches` to (theme.json, scheme or None) pairs in parallel; results keep input order.
+
+    A theme that runs past `timeout` seconds, or whose worker dies, fails on its own and is
+    retried once (see theme_runner.resilient_map). `on_result` sees every result as it arrives;
+    `progress` should have been begun with the entries' theme names.
+    """
+    return resilient_map(partial(_patch_entry, patches=patches, dry_run=dry_run), entries, _failed_entry,
+                         workers, timeout, memory_mb, on_result=on_result, progress=progress,
+                         preload=ThemeResolver().preload)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Apply declarative patches to theme.json files',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument('patches', nargs='+', type=Path, help='Patch files (JSON), applied in order')
+    parser.add_argument('--themes-dir', type=Path, default=THEMES_DIR, help='Directory with .theme.json files')
+    parser.add_argument('--theme', action='append', help='Patch only <name>.theme.json (repeatable)')
+    parser.add_argument('--scheme', help='Scheme stem for scheme: variables (default: the theme\'s editorScheme)')
+    kind = parser.add_mutually_exclusive_group()
+    kind.add_argument('--dark', action='store_true', help='Patch only dark themes')
+    kind.add_argument('--light', action='store_true', help='Patch only light themes')
+    parser.add_argument('--dry-run', action='store_true', help='Report what would change without writing')
+    parser.add_argument('-j', '--workers', type=int, default=None, help='Worker processes (default: CPU count)')
+    add_logging_arguments(parser)
+
+    args = parser.parse_args()
+    configure_from_args(args)
+
+    try:
+        patches = [load_patch(path) for path in args.patches]
+    except ValueError as e:
+        print(f"❌ {e}")
+        return 1
+
+    if args.theme:
+        paths = [args.themes_dir / f'{name}.theme.json' for name in args.theme]
+    else:
+        paths = sorted(args.themes_dir.glob('*.theme.json'))
+    if args.dark or args.light:
+        paths = [path for path in paths if bool(load_json(path).get('dark', False)) == args.dark]
+    scheme = args.themes_dir / f'{args.scheme}.xml' if args.scheme else None
+    entries = [(path, scheme) for path in paths]
+    if not entries:
+        print("❌ No themes found!")
+        return 1
+
+    results = patch_themes(entries, patches, args.dry_run, args.workers)
+
+    updated = [r for r in results if r['status'] == 'updated']
+    failed = [r for r in results if r['status'] in ('failed', 'skipped')]
+    verb = 'would update' if args.dry_run else 'updated'
+    print(f"✅ {len(updated)}/{len(results)} themes {verb} ({', '.join(p.name for p in patches)})")
+    for result in failed:
+        reason = result.get('error') or '; '.join(f'{k}: {v}' for k, v in result['skipped'].items())
+        print(f"❌ {result['theme']}: {reason}")
+    return 1 if any(r['status'] == 'failed' for r in results) else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
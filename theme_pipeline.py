@@ -0,0 +1,248 @@
+#!/usr/bin/env python3
+"""
+Corpus-wide read/convert/write as an asyncio pipeline.
+
+theme_batch.py hands each worker a whole theme: it reads the files, converts and
+writes, so a worker waiting on the disk holds a core it is not using. Here the three
+steps are separate stages joined by bounded queues and run concurrently:
+
+    read     --readers coroutines load scheme XML and theme.json bytes on a thread pool
+    convert  one coroutine per worker process parses and converts the bytes and returns
+             the serialized outputs (theme_emitters; state preloaded before forking)
+    write    --writers coroutines write the outputs atomically on the thread pool
+             (theme_common.write_text, unchanged files are left alone)
+
+A full queue makes the stage before it wait, so at most --queue-size read themes and
+--queue-size converted themes are held in memory whatever the corpus size. The summary
+compares the time spent in each stage with the wall time to show how much overlapped.
+
+Usage:
+    python3 theme_pipeline.py -o build/converted
+    python3 theme_pipeline.py -t zed -t fleet -o build/converted -j 4 --queue-size 32
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from functools import partial
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from theme_common import (THEMES_DIR, WORKER_CONTEXT, dump_json, init_worker, parse_json_data, parse_scheme_data,
+                          share_with_workers, write_text)
+from theme_emitters import (SCHEME_SOURCE, SnapshotJob, ThemeJob, get_emitter, load_emitters, preload_emitters,
+                            resolve_targets)
+from theme_log import add_logging_arguments, configure_from_args, configure_logging, get_logger
+
+log = get_logger('pipeline')
+
+DEFAULT_QUEUE_SIZE = 16
+DEFAULT_READERS = 8
+DEFAULT_WRITERS = 4
+
+# End-of-stream marker passed down the queues
+_DONE = None
+
+
+def read_job(job: ThemeJob) -> Tuple[bytes, Optional[bytes]]:
+    """Raw bytes of a job's scheme and theme.json. Runs on the I/O thread pool."""
+    theme_json = None
+    if job.theme_json_path is not None and job.theme_json_path.exists():
+        theme_json = job.theme_json_path.read_bytes()
+    return job.scheme_path.read_bytes(), theme_json
+
+
+def convert_data(stem: str, scheme_data: bytes, theme_json_data: Optional[bytes],
+                 targets: List[str]) -> Dict[str, Any]:
+    """Parse and convert one theme from its bytes. Runs inside a worker process.
+
+    Returns 'outputs' as {target: [file name, serialized text]} so the parent only writes.
+    """
+    result: Dict[str, Any] = {'theme': stem, 'outputs': {}, 'errors': {}}
+    try:
+        job = SnapshotJob(stem, parse_scheme_data(scheme_data),
+                          parse_json_data(theme_json_data) if theme_json_data is not None else None)
+    except ValueError as e:
+        result['errors']['parse'] = str(e)
+        return result
+
+    produced: Dict[str, Dict[str, Any]] = {}
+    for name in resolve_targets(targets):
+        emitter = get_emitter(name)
+        if emitter.source != SCHEME_SOURCE and emitter.source not in produced:
+            result['errors'][name] = f"skipped, source '{emitter.source}' failed"
+            continue
+        try:
+            source = job.scheme if emitter.source == SCHEME_SOURCE else produced[emitter.source]
+            produced[name] = emitter.emit(source, job)
+        except Exception as e:
+            result['errors'][name] = f"{type(e).__name__}: {e}"
+            continue
+        if name in targets:
+            result['outputs'][name] = [emitter.output_name(job), dump_json(produced[name], emitter.indent)]
+    return result
+
+
+def write_outputs(outputs: Dict[str, List[str]], out_dir: Path) -> int:
+    """Write serialized outputs; returns how many files changed. Runs on the I/O thread pool."""
+    return sum(1 for file_name, text in outputs.values() if write_text(out_dir / file_name, text))
+
+
+class _StageTimer:
+    """Seconds spent per stage, summed over that stage's coroutines."""
+
+    def __init__(self):
+        self.seconds: Dict[str, float] = {'read': 0.0, 'convert': 0.0, 'write': 0.0}
+
+    async def timed(self, stage: str, future) -> Any:
+        started = time.perf_counter()
+        try:
+            return await future
+        finally:
+            self.seconds[stage] += time.perf_counter() - started
+
+
+async def run_pipeline(jobs: List[ThemeJob], targets: List[str], out_dir: Path, workers: Optional[int] = None,
+                       readers: int = DEFAULT_READERS, writers: int = DEFAULT_WRITERS,
+                       queue_size: int = DEFAULT_QUEUE_SIZE,
+                       log_config: tuple = (0, False)) -> Tuple[List[Dict[str, Any]], Dict[str, float]]:
+    """Convert `jobs` to `targets` into `out_dir`; returns per-theme results and per-stage seconds.
+
+    Results come back in completion order.
+    """
+    out_dir = Path(out_dir)
+    loop = asyncio.get_running_loop()
+    timer = _StageTimer()
+    results: List[Dict[str, Any]] = []
+
+    pending: asyncio.Queue = asyncio.Queue()
+    for job in jobs:
+        pending.put_nowait(job)
+    read_queue: asyncio.Queue = asyncio.Queue(queue_size)
+    write_queue: asyncio.Queue = asyncio.Queue(queue_size)
+
+    preload = partial(preload_emitters, list(targets))
+    share_with_workers(preload)
+    io_pool = ThreadPoolExecutor(readers + writers, thread_name_prefix='theme-io')
+    converters = workers or os.cpu_count() or 1
+    cpu_pool = ProcessPoolExecutor(converters, mp_context=WORKER_CONTEXT, initializer=init_worker,
+                                   initargs=(preload, configure_logging, log_config))
+
+    async def read() -> None:
+        while not pending.empty():
+            job = pending.get_nowait()
+            try:
+                data = await timer.timed('read', loop.run_in_executor(io_pool, read_job, job))
+            except OSError as e:
+                results.append({'theme': job.stem, 'outputs': {}, 'errors': {'read': str(e)}})
+                continue
+            await read_queue.put((job, data))
+
+    async def convert() -> None:
+        while True:
+            item = await read_queue.get()
+            if item is _DONE:
+                return
+            job, (scheme_data, theme_json_data) = item
+            try:
+                result = await timer.timed('convert', loop.run_in_executor(
+                    cpu_pool, convert_data, job.stem, scheme_data, theme_json_data, list(targets)))
+            except Exception as e:
+                # A worker process died (BrokenProcessPool) or the result did not pickle
+                result = {'theme': job.stem, 'outputs': {}, 'errors': {'convert': f'{type(e).__name__}: {e}'}}
+            await write_queue.put(result)
+
+    async def write() -> None:
+        while True:
+            result = await write_queue.get()
+            if result is _DONE:
+                return
+            try:
+                result['changed'] = await timer.timed('write', loop.run_in_executor(
+                    io_pool, write_outputs, result['outputs'], out_dir))
+            except OSError as e:
+                result['errors']['write'] = str(e)
+            result['outputs'] = {name: file_name for name, (file_name, _) in result['outputs'].items()}
+            results.append(result)
+            log.info('theme_done', theme=result['theme'], outputs=sorted(result['outputs'].values()),
+                     errors=result['errors'] or None)
+
+    try:
+        write_tasks = [asyncio.create_task(write()) for _ in range(writers)]
+        convert_tasks = [asyncio.create_task(convert()) for _ in range(converters)]
+        await asyncio.gather(*(read() for _ in range(readers)))
+        for _ in convert_tasks:
+            await read_queue.put(_DONE)
+        await asyncio.gather(*convert_tasks)
+        for _ in write_tasks:
+            await write_queue.put(_DONE)
+        await asyncio.gather(*write_tasks)
+    finally:
+        cpu_pool.shutdown(cancel_futures=True)
+        io_pool.shutdown()
+    return results, timer.seconds
+
+
+def main():
+    load_emitters()
+
+    parser = argparse.ArgumentParser(
+        description='Convert every theme with overlapping read, convert and write stages',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument('-t', '--target', action='append', dest='targets',
+                        help='Target to emit (repeatable, default: all registered targets)')
+    parser.add_argument('-o', '--output', type=Path, default=Path('build/converted'),
+                        help='Output directory (default: build/converted)')
+    parser.add_argument('--themes-dir', type=Path, default=THEMES_DIR, help='Directory with scheme XML files')
+    parser.add_argument('--only', action='append', help='Convert only this scheme stem (repeatable)')
+    parser.add_argument('-j', '--workers', type=int, default=None, help='Converter processes (default: CPU count)')
+    parser.add_argument('--readers', type=int, default=DEFAULT_READERS,
+                        help=f'Concurrent file reads (default: {DEFAULT_READERS})')
+    parser.add_argument('--writers', type=int, default=DEFAULT_WRITERS,
+                        help=f'Concurrent output writes (default: {DEFAULT_WRITERS})')
+    parser.add_argument('--queue-size', type=int, default=DEFAULT_QUEUE_SIZE,
+                        help=f'Themes buffered between stages (default: {DEFAULT_QUEUE_SIZE})')
+    add_logging_arguments(parser)
+
+    args = parser.parse_args()
+    configure_from_args(args)
+
+    targets = args.targets or sorted(load_emitters())
+    try:
+        for name in targets:
+            get_emitter(name)
+    except KeyError as e:
+        print(f"❌ {e.args[0]}")
+        return 1
+
+    from theme_batch import discover_jobs
+    jobs = discover_jobs(args.themes_dir, args.only)
+    if not jobs:
+        print("❌ No schemes found!")
+        return 1
+
+    started = time.perf_counter()
+    results, stages = asyncio.run(run_pipeline(jobs, targets, args.output, args.workers, args.readers,
+                                               args.writers, args.queue_size, (args.verbose, args.log_json)))
+    elapsed = time.perf_counter() - started
+
+    failed = sorted((r for r in results if r['errors']), key=lambda r: r['theme'])
+    changed = sum(r.get('changed', 0) for r in results)
+    print(f"✅ {len(results) - len(failed)}/{len(results)} themes converted to {', '.join(targets)} "
+          f"in {elapsed:.2f}s ({changed} files written)")
+    busy = sum(stages.values())
+    print(f"⏱  read {stages['read']:.2f}s, convert {stages['convert']:.2f}s, write {stages['write']:.2f}s "
+          f"(summed over coroutines), {busy / elapsed if elapsed else 0:.1f}x overlap")
+    for result in failed:
+        for stage, error in result['errors'].items():
+            print(f"❌ {result['theme']} [{stage}]: {error}")
+
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
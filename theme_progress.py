@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+"""
+Progress and throughput of batch runs.
+
+resilient_map (theme_runner) tells a Progress when every task starts and finishes, on
+which worker, and how much CPU time the worker spent on it. From that it reports
+
+    completed/total, themes per second and ETA
+    the slowest themes so far
+    per-worker utilization: the share of its lifetime a worker was running a task, and
+    the share of that time it was on the CPU; a busy worker with low CPU is waiting on I/O
+
+either as one status line rewritten in place on a TTY, or as a JSON snapshot every
+`interval` seconds (and one at the end) for CI logs.
+
+    progress = Progress(mode='json', interval=5)
+    progress.begin([theme names, in the order of items])
+    results = resilient_map(func, items, failed, progress=progress)
+    progress.close()
+"""
+
+import heapq
+import json
+import sys
+import time
+from typing import Any, Dict, List, Optional, TextIO, Tuple
+
+PROGRESS_MODES = ('auto', 'tty', 'json', 'off')
+
+# Slowest tasks kept in snapshots
+SLOWEST = 5
+
+
+class _WorkerStats:
+    def __init__(self, now: float):
+        self.started = now
+        self.stopped: Optional[float] = None
+        self.busy = 0.0
+        self.cpu = 0.0
+        self.tasks = 0
+
+
+class Progress:
+    """Collects task timings from the runner and renders them to `stream`."""
+
+    def __init__(self, mode: str = 'auto', interval: float = 5.0, stream: Optional[TextIO] = None,
+                 unit: str = 'themes'):
+        self.stream = stream or sys.stderr
+        if mode == 'auto':
+            mode = 'tty' if self.stream.isatty() else 'off'
+        if mode not in PROGRESS_MODES:
+            raise ValueError(f"unknown progress mode '{mode}', expected one of {', '.join(PROGRESS_MODES)}")
+        self.mode = mode
+        # Seconds between outputs; the runner wakes up at least this often while tasks run
+        self.interval = {'json': interval, 'tty': 0.2}.get(mode)
+        self.unit = unit
+        self.begin([])
+        self._line_width = 0
+
+    def begin(self, names: List[str]) -> None:
+        """Start timing a run over tasks with these names (by task index)."""
+        self.names = names
+        self.started = time.monotonic()
+        self.completed: Dict[int, float] = {}
+        self.running: Dict[int, Tuple[int, float]] = {}
+        self.workers: Dict[int, _WorkerStats] = {}
+        self._last_render = 0.0
+
+    @property
+    def total(self) -> int:
+        return len(self.names)
+
+    def worker_started(self, worker: int) -> None:
+        self.workers[worker] = _WorkerStats(time.monotonic())
+
+    def worker_stopped(self, worker: int) -> None:
+        if worker in self.workers:
+            self.workers[worker].stopped = time.monotonic()
+
+    def task_started(self, index: int, worker: int) -> None:
+        self.running[index] = (worker, time.monotonic())
+        self.tick()
+
+    def task_finished(self, index: int, cpu: Optional[float] = None) -> None:
+        """Record a finished task; `cpu` is the worker's CPU seconds for it, if known."""
+        worker, started = self.running.pop(index)
+        seconds = time.monotonic() - started
+        # A retried task counts once, with the time of its last attempt
+        self.completed[index] = seconds
+        stats = self.workers.get(worker)
+        if stats is not None:
+            stats.busy += seconds
+            stats.cpu += cpu if cpu is not None else seconds
+            stats.tasks += 1
+        self.tick()
+
+    def snapshot(self) -> Dict[str, Any]:
+        now = time.monotonic()
+        elapsed = now - self.started
+        done = len(self.completed)
+        rate = done / elapsed if elapsed > 0 else 0.0
+        workers = []
+        for pid, stats in sorted(self.workers.items(), key=lambda item: item[1].started):
+            busy = stats.busy + sum(now - started for worker, started in self.running.values() if worker == pid)
+            lifetime = (stats.stopped or now) - stats.started
+            workers.append({
+                'pid': pid,
+                'alive': stats.stopped is None,
+                'tasks': stats.tasks,
+                'busy': round(busy / lifetime, 3) if lifetime > 0 else 0.0,
+                'cpu': round(stats.cpu / stats.busy, 3) if stats.busy > 0 else None,
+            })
+        slowest = heapq.nlargest(SLOWEST, self.completed.items(), key=lambda item: item[1])
+        return {
+            'completed': done,
+            'total': self.total,
+            'elapsed': round(elapsed, 2),
+            'rate': round(rate, 2),
+            'eta': round((self.total - done) / rate, 1) if rate > 0 else None,
+            'slowest': [{'name': self.names[index], 'seconds': round(seconds, 3)} for index, seconds in slowest],
+            'workers': workers,
+        }
+
+    def tick(self, force: bool = False) -> None:
+        """Render if `interval` has passed since the last output (or when forced)."""
+        if self.mode == 'off':
+            return
+        now = time.monotonic()
+        if not force and now - self._last_render < self.interval:
+            return
+        self._last_render = now
+        snapshot = self.snapshot()
+        if self.mode == 'json':
+            self.stream.write(json.dumps({'event': 'progress', **snapshot}) + '\n')
+        else:
+            line = self.status_line(snapshot)
+            self.stream.write('\r' + line.ljust(self._line_width))
+            self._line_width = len(line)
+        self.stream.flush()
+
+    def status_line(self, snapshot: Dict[str, Any]) -> str:
+        eta = f"ETA {snapshot['eta']:.0f}s" if snapshot['eta'] is not None else 'ETA ?'
+        line = f"[{snapshot['completed']}/{snapshot['total']}] {snapshot['rate']:.1f} {self.unit}/s, {eta}"
+        alive = [worker for worker in snapshot['workers'] if worker['alive']]
+        if alive:
+            busy = sum(worker['busy'] for worker in alive) / len(alive)
+            line += f", {len(alive)} workers {busy:.0%} busy"
+        if snapshot['slowest']:
+            slowest = snapshot['slowest'][0]
+            line += f", slowest {slowest['name']} {slowest['seconds']:.2f}s"
+        return line
+
+    def close(self) -> None:
+        """Final output: the last snapshot, and on a TTY the per-worker and slowest breakdown."""
+        if self.mode == 'off':
+            return
+        self.tick(force=True)
+        if self.mode == 'tty':
+            snapshot = self.snapshot()
+            self.stream.write('\n')
+            for worker in snapshot['workers']:
+                cpu = f", {worker['cpu']:.0%} of it on CPU" if worker['cpu'] is not None else ''
+                self.stream.write(f"  worker {worker['pid']:<8} {worker['tasks']:4} tasks, "
+                                  f"{worker['busy']:.0%} busy{cpu}\n")
+            for entry in snapshot['slowest']:
+                self.stream.write(f"  🐢 {entry['name']:<28} {entry['seconds'] * 1000:8.1f} ms\n")
+            self.stream.flush()
+
+
+def add_progress_arguments(parser) -> None:
+    """--progress and --progress-interval, shared by the batch scripts."""
+    parser.add_argument('--progress', choices=PROGRESS_MODES, default='auto',
+                        help='Progress output on stderr: status line, JSON snapshots, or none '
+                             '(default: status line on a TTY)')
+    parser.add_argument('--progress-interval', type=float, default=5.0,
+                        help='Seconds between JSON progress snapshots (default: 5)')
@@ -0,0 +1,258 @@
+#!/usr/bin/env python3
+"""
+Fault-tolerant process pool for the batch scripts.
+
+parallel_map (theme_common) is enough while every theme converts in milliseconds; a
+single file that hangs or blows up memory stalls it or takes the whole run down.
+resilient_map runs the same kind of module-level function, but:
+
+    timeout      a task still running after `timeout` seconds has its worker killed and
+                 replaced; the task gets a failure result
+    memory_mb    every worker caps its address space (RLIMIT_AS), so a runaway task fails
+                 with MemoryError instead of swapping the machine
+    crashes      a worker that dies (segfault, OOM killer) fails its task only
+    retry        failed tasks run once more at the end, each in a fresh worker of its own
+    on_result    called in the parent as every result arrives, e.g. to append it to a
+                 Journal, the JSON-lines checkpoint that --resume reads back
+    progress     a theme_progress.Progress told when tasks start and finish, on which
+                 worker and with how much CPU time
+
+Workers are started once and fed one task at a time over a pipe, so the parent always
+knows which task each worker is on and since when.
+"""
+
+import os
+import time
+from multiprocessing.connection import wait
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Callable, Dict, List, Optional
+
+from theme_backends import json_dumps, json_loads
+from theme_common import WORKER_CONTEXT, init_worker, share_with_workers
+from theme_log import get_logger
+
+if TYPE_CHECKING:
+    from theme_progress import Progress
+
+log = get_logger('runner')
+
+# Seconds a worker gets to exit after being asked to, before it is killed
+STOP_GRACE = 2.0
+
+
+class Journal:
+    """Append-only JSON-lines checkpoint, one record per completed item, flushed to disk as written."""
+
+    def __init__(self, path: Path, key: str = 'theme'):
+        self.path = Path(path)
+        self.key = key
+        self._file = None
+
+    def load(self) -> Dict[str, Dict[str, Any]]:
+        """key -> last record. A line cut off by an interrupted write is ignored."""
+        records: Dict[str, Dict[str, Any]] = {}
+        try:
+            lines = self.path.read_bytes().splitlines()
+        except OSError:
+            return records
+        for line in lines:
+            try:
+                record = json_loads(line)
+            except ValueError:
+                continue
+            if isinstance(record, dict) and self.key in record:
+                records[record[self.key]] = record
+        return records
+
+    def open(self, resume: bool = False) -> None:
+        """Start appending; without `resume` earlier records are discarded."""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._file = open(self.path, 'ab' if resume else 'wb')
+
+    def append(self, record: Dict[str, Any]) -> None:
+        self._file.write(json_dumps(record, compact=True).encode('utf-8') + b'\n')
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+    def close(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def remove(self) -> None:
+        """Drop the journal once its records are stored elsewhere (e.g. in a manifest)."""
+        self.close()
+        try:
+            self.path.unlink()
+        except FileNotFoundError:
+            pass
+
+
+def _limit_memory(memory_mb: int) -> None:
+    import resource
+
+    limit = memory_mb * 1024 * 1024
+    resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+
+
+def _worker_main(conn, func: Callable[[Any], Any], memory_mb: Optional[int],
+                 preload: Optional[Callable[[], Any]], initializer: Optional[Callable], initargs: tuple) -> None:
+    init_worker(preload, initializer, initargs)
+    if memory_mb:
+        _limit_memory(memory_mb)
+    while True:
+        try:
+            task = conn.recv()
+        except EOFError:
+            return
+        if task is None:
+            return
+        index, item = task
+        cpu_start = time.process_time()
+        try:
+            reply = (index, True, func(item))
+        except Exception as e:
+            reply = (index, False, f'{type(e).__name__}: {e}')
+        conn.send(reply + (time.process_time() - cpu_start,))
+
+
+class _Worker:
+    """One worker process and the task it is running."""
+
+    def __init__(self, func: Callable[[Any], Any], memory_mb: Optional[int], preload: Optional[Callable[[], Any]],
+                 initializer: Optional[Callable], initargs: tuple, progress: Optional['Progress'] = None):
+        self.conn, child_conn = WORKER_CONTEXT.Pipe()
+        self.process = WORKER_CONTEXT.Process(target=_worker_main, daemon=True,
+                                              args=(child_conn, func, memory_mb, preload, initializer, initargs))
+        self.process.start()
+        child_conn.close()
+        self.progress = progress
+        if progress is not None:
+            progress.worker_started(self.process.pid)
+        self.index: Optional[int] = None
+        self.deadline: Optional[float] = None
+        self.done = 0
+
+    def submit(self, index: int, item: Any, timeout: Optional[float]) -> None:
+        self.index = index
+        self.deadline = time.monotonic() + timeout if timeout else None
+        if self.progress is not None:
+            self.progress.task_started(index, self.process.pid)
+        self.conn.send((index, item))
+
+    def stop(self) -> None:
+        try:
+            self.conn.send(None)
+        except OSError:
+            pass
+        self.process.join(STOP_GRACE)
+        self.kill()
+
+    def kill(self) -> None:
+        if self.process.is_alive():
+            self.process.kill()
+        self.process.join()
+        self.conn.close()
+        if self.progress is not None:
+            self.progress.worker_stopped(self.process.pid)
+
+
+def _run_pass(func: Callable[[Any], Any], items: List[Any], indices: List[int], results: List[Any],
+              workers: int, timeout: Optional[float], memory_mb: Optional[int],
+              failed: Callable[[Any, str], Any], preload: Optional[Callable[[], Any]],
+              initializer: Optional[Callable], initargs: tuple,
+              on_result: Optional[Callable[[int, Any], None]], progress: Optional['Progress'],
+              tasks_per_worker: Optional[int] = None) -> List[int]:
+    """Run items[i] for i in `indices` into `results`; returns the indices that failed()."""
+    pending = list(reversed(indices))
+    pool: List[_Worker] = []
+    failures = []
+
+    def finish(worker: _Worker, result: Any, ok: bool = True, cpu: Optional[float] = None) -> None:
+        index = worker.index
+        worker.index = worker.deadline = None
+        worker.done += 1
+        if progress is not None:
+            progress.task_finished(index, cpu)
+        if not ok:
+            log.warning('task_failed', item=index, error=result)
+            result = failed(items[index], result)
+            failures.append(index)
+        results[index] = result
+        if on_result is not None:
+            on_result(index, result)
+
+    try:
+        while pending or any(worker.index is not None for worker in pool):
+            for worker in [w for w in pool if w.index is None]:
+                if not pending or (tasks_per_worker and worker.done >= tasks_per_worker):
+                    pool.remove(worker)
+                    worker.stop()
+            while pending and len(pool) < workers:
+                pool.append(_Worker(func, memory_mb, preload, initializer, initargs, progress))
+            for worker in pool:
+                if worker.index is None and pending:
+                    index = pending.pop()
+                    worker.submit(index, items[index], timeout)
+
+            busy = [worker for worker in pool if worker.index is not None]
+            deadlines = [worker.deadline for worker in busy if worker.deadline is not None]
+            if progress is not None and progress.interval:
+                deadlines.append(time.monotonic() + progress.interval)
+            wait_for = max(0.0, min(deadlines) - time.monotonic()) if deadlines else None
+            wait([worker.conn for worker in busy] + [worker.process.sentinel for worker in busy], wait_for)
+
+            for worker in busy:
+                if worker.conn.poll():
+                    cpu = None
+                    try:
+                        _, ok, result, cpu = worker.conn.recv()
+                    except EOFError:
+                        ok, result = False, f'worker exited with code {worker.process.exitcode}'
+                        pool.remove(worker)
+                        worker.kill()
+                    finish(worker, result, ok, cpu)
+                elif not worker.process.is_alive():
+                    pool.remove(worker)
+                    worker.kill()
+                    finish(worker, f'worker exited with code {worker.process.exitcode}', False)
+                elif worker.deadline is not None and time.monotonic() >= worker.deadline:
+                    pool.remove(worker)
+                    worker.kill()
+                    finish(worker, f'timed out after {timeout:g}s', False)
+            if progress is not None:
+                progress.tick()
+    finally:
+        for worker in pool:
+            worker.kill()
+    return failures
+
+
+def resilient_map(func: Callable[[Any], Any], items: List[Any], failed: Callable[[Any, str], Any],
+                  workers: Optional[int] = None, timeout: Optional[float] = None,
+                  memory_mb: Optional[int] = None, retry: Optional[Callable[[Any], bool]] = None,
+                  initializer: Optional[Callable] = None, initargs: tuple = (),
+                  on_result: Optional[Callable[[int, Any], None]] = None,
+                  progress: Optional['Progress'] = None, preload: Optional[Callable[[], Any]] = None) -> List[Any]:
+    """Map `func` over `items` on worker processes, preserving order.
+
+    `failed(item, error)` builds the result for a task that raised, timed out or lost its
+    worker. Those tasks, and any whose result `retry` accepts, run once more in a fresh
+    worker each; the retry's result replaces the first one. `preload` builds state the
+    workers share (see theme_common.share_with_workers).
+    """
+    items = list(items)
+    results: List[Any] = [None] * len(items)
+    if not items:
+        return results
+    workers = max(1, min(workers or os.cpu_count() or 1, len(items)))
+    share_with_workers(preload)
+
+    failures = set(_run_pass(func, items, list(range(len(items))), results, workers, timeout, memory_mb,
+                             failed, preload, initializer, initargs, on_result, progress))
+    again = [index for index in range(len(items)) if index in failures or (retry and retry(results[index]))]
+    if again:
+        log.info('retrying_in_isolation', count=len(again))
+        _run_pass(func, items, again, results, 1, timeout, memory_mb, failed, preload, initializer, initargs,
+                  on_result, progress, tasks_per_worker=1)
+    return results
@@ -1,89 +1,108 @@
 #!/usr/bin/env python3
 """
-Script to run update_light_themes.py for all dark themes.
+Script to apply patches/islands.json to all dark themes, in-process.
 Identifies dark themes by checking the "dark" property in theme.json files.
+
+Each theme gets the edits of update_light_themes.update_theme_json in a parallel
+worker process rather than an update_light_themes.py subprocess; with --log-json
+every per-theme result is emitted as a JSON line on stderr instead of being scraped
+from a subprocess's output.
+
+Each finished theme is appended to a journal under build/; --resume skips the themes an
+interrupted run already patched. --timeout and --max-memory bound every theme's worker.
+--progress shows completed/total, throughput, ETA and worker utilization while it runs.
 """
 
-import json
-import subprocess
+import argparse
 import sys
 from pathlib import Path
 
+from plugin_xml import theme_index
+from theme_log import add_logging_arguments, configure_from_args, get_logger
+from theme_patch import load_patch, patch_themes
+from theme_progress import Progress, add_progress_arguments
+from theme_runner import Journal
+from update_light_themes import ISLANDS_PATCH
 
-def is_dark_theme(theme_json_path):
-    """Check if a theme is a dark theme by reading its JSON file."""
-    try:
-        with open(theme_json_path, 'r', encoding='utf-8') as f:
-            theme_data = json.load(f)
-            return theme_data.get('dark', False)
-    except Exception as e:
-        print(f"Error reading {theme_json_path}: {e}")
-        return False
+log = get_logger('update_all_dark_themes')
+
+JOURNAL_PATH = Path(__file__).parent / 'build' / '.update-dark-themes.jsonl'
 
 
 def get_theme_pairs():
-    """Get all dark theme pairs (theme_name, xml_name)."""
+    """Get all dark theme pairs (theme_name, xml_name) from the theme index."""
     themes_dir = Path(__file__).parent / 'src' / 'main' / 'resources' / 'themes'
     
     dark_themes = []
     
-    # Get all .theme.json files
-    for json_file in themes_dir.glob('*.theme.json'):
-        if is_dark_theme(json_file):
-            theme_name = json_file.stem.replace('.theme', '')
+    for file_name, entry in theme_index(themes_dir).items():
+        if entry['dark']:
+            theme_name = file_name[:-len('.theme.json')]
             
             # Check if corresponding XML exists
             xml_file = themes_dir / f'{theme_name}.xml'
             if xml_file.exists():
                 dark_themes.append((theme_name, theme_name))
-                print(f"Found dark theme: {theme_name}")
+                log.debug('dark_theme_found', theme=theme_name)
             else:
-                print(f"⚠️  Dark theme {theme_name} has no corresponding XML file")
+                log.warning('missing_scheme_xml', theme=theme_name, xml=str(xml_file))
     
     return dark_themes
 
 
 def main():
-    print("🔍 Scanning for dark themes...")
-    
+    parser = argparse.ArgumentParser(description='Run update_light_themes.py for every dark theme')
+    parser.add_argument('-j', '--workers', type=int, default=None, help='Worker processes (default: CPU count)')
+    parser.add_argument('--resume', action='store_true', help='Skip themes an interrupted run already patched')
+    parser.add_argument('--timeout', type=float, default=60.0,
+                        help='Seconds one theme may take before its worker is killed (default: 60, 0 = none)')
+    parser.add_argument('--max-memory', type=int, metavar='MB', help='Address space limit per worker process')
+    add_progress_arguments(parser)
+    add_logging_arguments(parser)
+    args = parser.parse_args()
+    configure_from_args(args)
+
     dark_themes = get_theme_pairs()
     
     if not dark_themes:
         print("❌ No dark themes found!")
         sys.exit(1)
     
-    print(f"\n📋 Found {len(dark_themes)} dark themes to update:")
-    for theme_name, xml_name in dark_themes:
-        print(f"  - {theme_name}")
-    
-    print(f"\n🚀 Starting updates...")
+    log.info('updating_themes', count=len(dark_themes))
     
+    themes_dir = Path(__file__).parent / 'src' / 'main' / 'resources' / 'themes'
+    journal = Journal(JOURNAL_PATH)
+    done = {name: record for name, record in journal.load().items()
+            if record['status'] in ('updated', 'unchanged')} if args.resume else {}
+    entries = [(themes_dir / f'{theme_name}.theme.json', themes_dir / f'{xml_name}.xml')
+               for theme_name, xml_name in dark_themes if f'{theme_name}.theme.json' not in done]
+    if done:
+        print(f"⏩ Resuming: {len(done)} themes already patched")
+
+    progress = Progress(args.progress, args.progress_interval)
+    progress.begin([theme_json_path.name[:-len('.theme.json')] for theme_json_path, _ in entries])
+    journal.open(args.resume)
+    try:
+        patched = iter(patch_themes(entries, [load_patch(ISLANDS_PATCH)], workers=args.workers,
+                                    timeout=args.timeout or None, memory_mb=args.max_memory,
+                                    on_result=lambda index, result: journal.append(result), progress=progress))
+    finally:
+        journal.close()
+        progress.close()
+    results = [done.get(f'{theme_name}.theme.json') or next(patched) for theme_name, _ in dark_themes]
+
     success_count = 0
     failed_themes = []
-    
-    for i, (theme_name, xml_name) in enumerate(dark_themes, 1):
-        print(f"\n[{i}/{len(dark_themes)}] Updating {theme_name}...")
-        
-        try:
-            # Run the update script
-            result = subprocess.run([
-                sys.executable, 'update_light_themes.py', theme_name, xml_name
-            ], capture_output=True, text=True, cwd=Path(__file__).parent)
-            
-            if result.returncode == 0:
-                print(f"✅ {theme_name} updated successfully")
-                success_count += 1
-            else:
-                print(f"❌ {theme_name} failed:")
-                print(f"   stdout: {result.stdout}")
-                print(f"   stderr: {result.stderr}")
-                failed_themes.append(theme_name)
-                
-        except Exception as e:
-            print(f"❌ {theme_name} failed with exception: {e}")
+    for i, ((theme_name, _), result) in enumerate(zip(dark_themes, results), 1):
+        if result['status'] in ('updated', 'unchanged'):
+            log.info('theme_done', theme=theme_name, index=i, total=len(dark_themes), status=result['status'])
+            success_count += 1
+        else:
+            log.error('theme_failed', theme=theme_name, index=i, total=len(dark_themes),
+                      error=result.get('error'), skipped=result['skipped'])
             failed_themes.append(theme_name)
     
-    print(f"\n📊 Summary:")
+    print(f"📊 Summary:")
     print(f"  ✅ Successfully updated: {success_count}/{len(dark_themes)}")
     print(f"  ❌ Failed: {len(failed_themes)}")
     
@@ -93,6 +112,7 @@ def main():
             print(f"  - {theme}")
         sys.exit(1)
     else:
+        journal.remove()
         print(f"\n🎉 All dark themes updated successfully!")
 
 
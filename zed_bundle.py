@@ -0,0 +1,205 @@
+#!/usr/bin/env python3
+"""
+Zed theme family bundles.
+
+intellij_to_zed.py writes one Zed file per scheme, each with the full `style` map and the
+same `players` list. This converts a whole family (gruvbox, gruvboxLight,
+gruvboxMaterial, ...; detected from file names like theme_family.py does, or given with
+--family) into one Zed theme family file with an entry per scheme in `themes`:
+
+    duplicates   entries whose appearance and style equal an earlier entry's are left out
+    defaults     with --defaults (a Zed theme family file such as Zed's own
+                 assets/themes/one/one.json), style keys, syntax entries and the players
+                 list equal to the default theme of the same appearance are left out; Zed
+                 fills them in from its default theme
+
+Usage:
+    python3 zed_bundle.py -o build/zed
+    python3 zed_bundle.py --family gruvbox=gruvbox,gruvboxLight,gruvboxMaterial -o build/zed
+    python3 zed_bundle.py -o build/zed --defaults ~/src/zed/assets/themes/one/one.json
+"""
+
+import argparse
+import sys
+from functools import partial
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from theme_common import THEMES_DIR, canonical_digest, dump_json, load_json, parallel_map, write_text
+from theme_emitters import ThemeJob, get_emitter, preload_emitters
+from theme_family import detect_families
+from theme_log import add_logging_arguments, configure_from_args, get_logger
+
+log = get_logger('zed_bundle')
+
+DEFAULT_OUT_DIR = Path(__file__).parent / 'build' / 'zed'
+
+ZED_SCHEMA = 'https://zed.dev/schema/themes/v0.1.0.json'
+
+
+def _same(value: Any, default: Any) -> bool:
+    # Colors compare case-insensitively: the converter writes "#AABBCC", Zed's themes "#aabbccff"
+    if isinstance(value, str) and isinstance(default, str):
+        value, default = value.lower(), default.lower()
+        if value.startswith('#') and len(value) == 7:
+            value += 'ff'
+        if default.startswith('#') and len(default) == 7:
+            default += 'ff'
+    return value == default
+
+
+def load_zed_defaults(path: Path) -> Dict[str, Dict[str, Any]]:
+    """Style of the first theme per appearance in a Zed theme family file."""
+    defaults: Dict[str, Dict[str, Any]] = {}
+    for theme in load_json(path).get('themes', []):
+        defaults.setdefault(theme.get('appearance', 'dark'), theme.get('style', {}))
+    if not defaults:
+        raise ValueError(f"{path} has no themes")
+    return defaults
+
+
+def _same_entry(entry: Dict[str, Any], default: Dict[str, Any]) -> bool:
+    entry = {key: value for key, value in entry.items() if value is not None}
+    default = {key: value for key, value in default.items() if value is not None}
+    return entry.keys() == default.keys() and all(_same(entry[key], default[key]) for key in entry)
+
+
+def prune_defaults(style: Dict[str, Any], default: Dict[str, Any]) -> Tuple[Dict[str, Any], int]:
+    """Drop style keys (and syntax entries) Zed would take from `default` anyway."""
+    pruned: Dict[str, Any] = {}
+    removed = 0
+    for key, value in style.items():
+        if key == 'syntax' and isinstance(value, dict):
+            default_syntax = default.get('syntax', {})
+            syntax = {name: entry for name, entry in value.items()
+                      if not (name in default_syntax and _same_entry(entry, default_syntax[name]))}
+            removed += len(value) - len(syntax)
+            pruned[key] = syntax
+        elif key == 'players' and isinstance(value, list):
+            default_players = default.get('players', [])
+            if len(value) == len(default_players) and all(
+                    _same_entry(player, other) for player, other in zip(value, default_players)):
+                removed += 1
+            else:
+                pruned[key] = value
+        elif key in default and _same(value, default[key]):
+            removed += 1
+        else:
+            pruned[key] = value
+    return pruned, removed
+
+
+def bundle_family(name: str, documents: List[Dict[str, Any]],
+                  defaults: Optional[Dict[str, Dict[str, Any]]] = None) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+    """One Zed theme family from converted Zed documents: deduplicated, optionally without defaults."""
+    themes = []
+    seen: Dict[str, str] = {}
+    stats: Dict[str, Any] = {'themes': 0, 'duplicates': [], 'defaults': 0}
+    for document in documents:
+        for theme in document.get('themes', []):
+            digest = canonical_digest({'appearance': theme.get('appearance'), 'style': theme.get('style')})
+            if digest in seen:
+                log.info('duplicate_theme', family=name, theme=theme.get('name'), same_as=seen[digest])
+                stats['duplicates'].append(theme.get('name'))
+                continue
+            seen[digest] = theme.get('name')
+            theme = dict(theme)
+            default = (defaults or {}).get(theme.get('appearance', 'dark'))
+            if default is not None:
+                theme['style'], removed = prune_defaults(theme.get('style', {}), default)
+                stats['defaults'] += removed
+            themes.append(theme)
+    stats['themes'] = len(themes)
+
+    authors = {document.get('author') for document in documents}
+    bundle = {
+        '$schema': documents[0].get('$schema', ZED_SCHEMA) if documents else ZED_SCHEMA,
+        'name': name,
+        'author': authors.pop() if len(authors) == 1 else f'Converted from IntelliJ ({name})',
+        'themes': themes,
+    }
+    return bundle, stats
+
+
+def bundle_job(family: Tuple[str, List[ThemeJob]], out_dir: Path,
+               defaults: Optional[Dict[str, Dict[str, Any]]] = None) -> Dict[str, Any]:
+    """Convert the schemes of one family and write the bundle. Runs inside a worker process."""
+    name, jobs = family
+    emitter = get_emitter('zed')
+    try:
+        documents = [emitter.emit(job.scheme, job) for job in jobs]
+    except Exception as e:
+        return {'family': name, 'error': f'{type(e).__name__}: {e}'}
+
+    bundle, stats = bundle_family(name, documents, defaults)
+    text = dump_json(bundle, 2)
+    write_text(out_dir / f'{name}_zed.json', text)
+    return {'family': name, 'variants': [job.stem for job in jobs], **stats,
+            'before': sum(len(dump_json(document, 2)) for document in documents), 'after': len(text)}
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Bundle converted Zed themes into one theme family file per family',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument('--themes-dir', type=Path, default=THEMES_DIR, help='Directory with scheme XML files')
+    parser.add_argument('--family', action='append', metavar='NAME=STEM,STEM',
+                        help='Explicit family (repeatable, default: detected from file names)')
+    parser.add_argument('--defaults', type=Path, metavar='ZED_THEME',
+                        help="Zed theme family whose dark/light styles are Zed's defaults; equal keys are skipped")
+    parser.add_argument('-o', '--output', type=Path, default=DEFAULT_OUT_DIR, help='Output directory')
+    parser.add_argument('-j', '--workers', type=int, default=None, help='Worker processes (default: CPU count)')
+    add_logging_arguments(parser)
+
+    args = parser.parse_args()
+    configure_from_args(args)
+
+    from theme_batch import discover_jobs
+    jobs = {job.stem: job for job in discover_jobs(args.themes_dir)}
+    if args.family:
+        families = {}
+        for spec in args.family:
+            name, _, members = spec.partition('=')
+            families[name] = [stem for stem in members.split(',') if stem]
+    else:
+        families = detect_families(list(jobs))
+
+    unknown = [stem for stems in families.values() for stem in stems if stem not in jobs]
+    if unknown:
+        print(f"❌ No scheme for {', '.join(unknown)}")
+        return 1
+    if not families:
+        print("❌ No families found!")
+        return 1
+
+    try:
+        defaults = load_zed_defaults(args.defaults) if args.defaults else None
+    except ValueError as e:
+        print(f"❌ {e}")
+        return 1
+
+    work = [(name, [jobs[stem] for stem in stems]) for name, stems in sorted(families.items())]
+    results = parallel_map(partial(bundle_job, out_dir=args.output, defaults=defaults), work, args.workers,
+                           preload=partial(preload_emitters, ['zed']))
+
+    failed = 0
+    for result in results:
+        if 'error' in result:
+            failed += 1
+            print(f"❌ {result['family']}: {result['error']}")
+            continue
+        log.info('family_bundled', **result)
+        duplicates = f", {len(result['duplicates'])} duplicates" if result['duplicates'] else ''
+        skipped = f", {result['defaults']} defaults skipped" if defaults else ''
+        print(f"📦 {result['family']:<18} {result['themes']} themes{duplicates}{skipped}, "
+              f"{result['before'] / 1024:.0f} KB -> {result['after'] / 1024:.0f} KB")
+
+    ok = [r for r in results if 'error' not in r]
+    if ok:
+        print(f"\n✅ {len(ok)} family files, {sum(r['themes'] for r in ok)} themes -> {args.output}")
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())